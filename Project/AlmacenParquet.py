@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from pathlib import Path
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ==========================
+# ALMACÉN PARQUET PARTICIONADO
+# ==========================
+@dataclass
+class AlmacenParquet:
+    """Dataset procesado en Parquet, particionado por año/mes (``year=YYYY/month=M``).
+
+    - Cada archivo guarda estadísticas min/max por columna y grupo de filas.
+    - ``leer`` filtra por rango de fechas: con ambos extremos solo se abren los archivos
+      de los meses del rango (ni siquiera para inferir el esquema) y dentro de ellos se
+      descartan grupos de filas por las estadísticas de ``DateTime`` (predicate pushdown).
+
+    Parámetros
+    ----------
+    carpeta: str | Path
+        Carpeta raíz del dataset (p. ej. ``data/processed/power_tetouan_city_processed``).
+    col_fecha: str
+        Columna datetime usada para particionar y filtrar.
+    """
+
+    carpeta: Path
+    col_fecha: str = "DateTime"
+
+    def __post_init__(self) -> None:
+        self.carpeta = Path(self.carpeta)
+
+    def existe(self) -> bool:
+        return self.carpeta.is_dir() and any(self.carpeta.rglob("*.parquet"))
+
+    def escribir(self, df: pd.DataFrame, reemplazar: bool = True) -> Path:
+        """Escribe ``df`` particionado. Con ``reemplazar`` solo se sobrescriben las particiones presentes en ``df``."""
+        fechas = df[self.col_fecha]
+        df = df.assign(year=fechas.dt.year.astype("int16"), month=fechas.dt.month.astype("int8"))
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_to_dataset(
+            tabla,
+            root_path=self.carpeta,
+            partition_cols=["year", "month"],
+            existing_data_behavior="delete_matching" if reemplazar else "overwrite_or_ignore",
+            write_statistics=True,
+        )
+        return self.carpeta
+
+    def eliminar_particion(self, year: int, month: int) -> None:
+        shutil.rmtree(self.carpeta / f"year={year}" / f"month={month}", ignore_errors=True)
+
+    def _filtros(self, desde: pd.Timestamp | None, hasta: pd.Timestamp | None) -> list | None:
+        rango = []
+        if desde is not None:
+            rango.append((self.col_fecha, ">=", desde))
+        if hasta is not None:
+            rango.append((self.col_fecha, "<=", hasta))
+        return rango or None
+
+    def archivos(self, desde: pd.Timestamp, hasta: pd.Timestamp) -> list[str]:
+        """Archivos de las particiones de los meses entre ``desde`` y ``hasta``."""
+        meses = pd.period_range(desde.to_period("M"), hasta.to_period("M"), freq="M")
+        return [str(p) for m in meses
+                for p in sorted((self.carpeta / f"year={m.year}" / f"month={m.month}").glob("*.parquet"))]
+
+    def leer(self, desde=None, hasta=None, columnas: list[str] | None = None,
+             eliminar_datetime: bool = True) -> pd.DataFrame:
+        """Lee el rango ``[desde, hasta]`` en orden temporal, sin las columnas de partición."""
+        desde = pd.Timestamp(desde) if desde is not None else None
+        hasta = pd.Timestamp(hasta) if hasta is not None else None
+        if columnas is not None and self.col_fecha not in columnas:
+            columnas = [*columnas, self.col_fecha]
+        # Con el rango acotado se pasan solo los archivos de sus meses: pyarrow no
+        # recorre ni abre el resto de las particiones.
+        fuente = self.carpeta
+        if desde is not None and hasta is not None:
+            fuente = self.archivos(desde, hasta) or self.carpeta
+        df = pd.read_parquet(
+            fuente,
+            engine="pyarrow",
+            columns=columnas,
+            filters=self._filtros(desde, hasta),
+        )
+        df = (df.drop(columns=["year", "month"], errors="ignore")
+                .sort_values(self.col_fecha, kind="stable")
+                .reset_index(drop=True))
+        if eliminar_datetime:
+            df = df.drop(columns=[self.col_fecha])
+        return df
+
+    def ultimo_mes(self) -> tuple[pd.Timestamp, pd.Timestamp]:
+        """Rango ``(inicio, fin)`` del último mes disponible, para ``leer(*almacen.ultimo_mes())``."""
+        particiones = sorted(
+            (int(p.parent.name.split("=")[1]), int(p.name.split("=")[1]))
+            for p in self.carpeta.glob("year=*/month=*")
+        )
+        if not particiones:
+            raise FileNotFoundError(f"No hay particiones en {self.carpeta}")
+        year, month = particiones[-1]
+        mes = pd.Period(year=year, month=month, freq="M")
+        return mes.start_time, mes.end_time
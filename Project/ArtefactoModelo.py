@@ -0,0 +1,85 @@
+from pathlib import Path
+import hashlib
+import os
+import joblib
+
+# Cabecera de un pickle (protocolo >= 2): joblib sin compresión empieza así
+_PICKLE = b"\x80"
+
+# ==========================
+# ARTEFACTO DE MODELO (MMAP)
+# ==========================
+def esta_comprimido(ruta: str | Path) -> bool:
+    """True si el archivo joblib fue guardado con compresión (zlib, gzip, lzma, ...)."""
+    with open(ruta, "rb") as f:
+        return f.read(1) != _PICKLE
+
+
+def ruta_cache(ruta: str | Path) -> Path:
+    """Copia sin comprimir (mapeable) de un artefacto comprimido: ``<archivo>.mmap``."""
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".mmap")
+
+
+def ruta_arboles(ruta: str | Path) -> Path:
+    """Ensamble compilado en arreglos planos (``PredictorCompilado.guardar``): ``<archivo>.arboles``."""
+    ruta = Path(ruta)
+    return ruta.with_name(ruta.name + ".arboles")
+
+
+def huella(ruta: str | Path) -> str:
+    """SHA-256 del archivo: liga el ``.arboles`` al artefacto del que se compiló.
+
+    A diferencia del mtime, sobrevive a ``COPY``, checkouts de git y copias.
+    """
+    with open(ruta, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def guardar(objeto, ruta: str | Path, comprimir: int = 0) -> Path:
+    """Guarda con joblib.
+
+    - ``comprimir=0``: los arreglos numpy quedan en crudo dentro del archivo y se
+      pueden mapear en memoria al cargar.
+    - ``comprimir`` 1-9: zlib, para almacenar/transferir (p. ej. DVC, MLflow); ``cargar``
+      lo descomprime una sola vez a la caché ``.mmap``.
+
+    La escritura es atómica (temporal + ``os.replace``): un servidor que recarga el
+    modelo mientras se guarda (p. ej. en modo online) nunca lee un archivo a medias.
+    La caché ``.mmap`` y el compilado ``.arboles`` del artefacto anterior se borran.
+    """
+    ruta = Path(ruta)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    joblib.dump(objeto, tmp, compress=comprimir)
+    os.replace(tmp, ruta)
+    ruta_cache(ruta).unlink(missing_ok=True)
+    ruta_arboles(ruta).unlink(missing_ok=True)
+    return ruta
+
+
+def cargar(ruta: str | Path, mmap: bool = True):
+    """Carga un artefacto; con ``mmap`` sus arreglos grandes se mapean en solo lectura.
+
+    Los procesos (workers del servidor) que mapean el mismo archivo comparten sus
+    páginas en la caché del sistema operativo. Si el artefacto está comprimido, se
+    escribe la caché ``.mmap`` sin comprimir la primera vez (o si el original es más
+    nuevo) y se mapea esa copia.
+
+    Los ``Tree`` de scikit-learn (GradientBoosting/RandomForest) copian sus nodos al
+    deserializarse, así que en esos modelos solo quedan mapeados el preprocesamiento y
+    poco más; sí se usan en sitio los nodos de HistGradientBoosting, las estadísticas
+    de imputador/escalador y los coeficientes. Para compartir los árboles entre
+    workers se sirve su versión en arreglos planos (``ruta_arboles``), que sí se mapea.
+    """
+    ruta = Path(ruta)
+    if not mmap:
+        return joblib.load(ruta)
+    if not esta_comprimido(ruta):
+        return joblib.load(ruta, mmap_mode="r")
+
+    cache = ruta_cache(ruta)
+    if not cache.exists() or cache.stat().st_mtime < ruta.stat().st_mtime:
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        joblib.dump(joblib.load(ruta), tmp)
+        os.replace(tmp, cache)   # atómico: otro worker nunca ve una caché a medias
+    return joblib.load(cache, mmap_mode="r")
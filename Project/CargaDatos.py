@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 import pandas as pd
 
+NA_VALS = ["nan", "NAN", "NaT", ""]
+# Filas por bloque en el procesamiento en streaming
+FILAS_BLOQUE = 100_000
+
 @dataclass
 class CargaDatasets:
     """Carga datasets crudos desde una carpeta.
@@ -22,10 +27,18 @@ class CargaDatasets:
         self.carpeta_raw.mkdir(parents=True, exist_ok=True)
 
     def leer(self) -> pd.DataFrame:
-        na_vals = ["nan", "NAN", "NaT", ""]
         df_modificado = pd.read_csv(
             self.carpeta_raw / self.nombre_archivo,
-            na_values=na_vals,
+            na_values=NA_VALS,
             keep_default_na=True,
         )
-        return df_modificado
\ No newline at end of file
+        return df_modificado
+
+    def leer_por_bloques(self, filas: int = FILAS_BLOQUE) -> Iterator[pd.DataFrame]:
+        """Lee el CSV en bloques de ``filas`` filas para procesamiento en streaming."""
+        yield from pd.read_csv(
+            self.carpeta_raw / self.nombre_archivo,
+            na_values=NA_VALS,
+            keep_default_na=True,
+            chunksize=filas,
+        )
\ No newline at end of file
@@ -0,0 +1,11 @@
+from pathlib import Path
+import yaml
+
+# Ruta por defecto: <raíz del proyecto>/config/config.yaml
+RUTA_CONFIG = Path(__file__).resolve().parent.parent / "config" / "config.yaml"
+
+
+def cargar_config(ruta: str | Path | None = None) -> dict:
+    """Lee el archivo de configuración YAML del proyecto y lo devuelve como diccionario."""
+    with open(ruta or RUTA_CONFIG, encoding="utf-8") as f:
+        return yaml.safe_load(f)
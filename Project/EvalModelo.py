@@ -1,16 +1,23 @@
-from sklearn.model_selection import RepeatedKFold, cross_val_score
+from sklearn.model_selection import RepeatedKFold
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import ElasticNet
 from sklearn.svm import SVR
-from sklearn.metrics import mean_squared_error
+from sklearn.metrics import get_scorer, mean_squared_error
+from joblib import Parallel, delayed, hash as joblib_hash
+import time
 import pandas as pd
 import numpy as np
+from Project.Destilacion import Destilacion
+from Project.GestorHilos import GestorHilos
+from Project.Submuestreo import Submuestreo
 
-# Núcleos paralelos por defecto
+# Presupuesto de núcleos por defecto (-1 = todos); GestorHilos lo reparte entre folds
+# y los hilos de cada estimador, que se fijan al ajustar (_mis_modelos deja n_jobs=None)
 N_JOBS = -1
 
 # XGBoost opcional
@@ -20,6 +27,10 @@ try:
 except Exception:
     XGBOOST_AVAILABLE = False
 
+def _puntuar(modelo, Xt_train, y_train, Xt_test, y_test, scorer):
+    """Ajusta un modelo sobre un fold ya preprocesado y devuelve su score."""
+    return scorer(modelo.fit(Xt_train, y_train), Xt_test, y_test)
+
 class Evaluador:
     def __init__(
         self,
@@ -28,7 +39,9 @@ class Evaluador:
         num_cols = ('Temperature','Humidity','WindSpeed','GeneralDiffuseFlows','DiffuseFlows'),
         feature_range=(1,2),
         train_ratio: float = 0.80,
-        random_state: int = 42
+        random_state: int = 42,
+        n_jobs: int = N_JOBS,
+        subsample=None
     ):
         self.df = df.copy()
         self.target = target
@@ -36,6 +49,7 @@ class Evaluador:
         self.feature_range = feature_range
         self.train_ratio = train_ratio
         self.random_state = random_state
+        self.recursos = GestorHilos.desde_n_jobs(n_jobs)
 
         self.df.columns=['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows',
        'DiffuseFlows','PowerConsumption_Zone1',
@@ -63,6 +77,17 @@ class Evaluador:
             remainder='passthrough'
         )
 
+        # búsqueda de modelos (cross_validate) sobre un subconjunto estratificado de x_train:
+        # subsample = n filas o un Submuestreo; None usa todo. fit_best entrena con todo
+        if isinstance(subsample, int):
+            subsample = Submuestreo(subsample, random_state=self.random_state)
+        self.submuestreo = subsample
+        self.idx_busqueda_ = (subsample.indices(self.x_train) if subsample is not None
+                              else np.arange(len(self.x_train)))
+
+        # caché del preprocesamiento: (params de ct, índices del fold) -> (ct ajustado, Xt_train, Xt_test)
+        self._cache_ct = {}
+
         # modelos
         self.modelos, self.nombres = self._mis_modelos()
 
@@ -72,13 +97,15 @@ class Evaluador:
         self.best_estimator_ = None          # modelo base
         self.best_pipeline_ = None           # pipeline(ct + modelo) entrenado en train
         self.test_rmse_ = None
+        self.student_pipeline_ = None        # pipeline(ct + estudiante) destilado del mejor
+        self.distill_report_ = None
 
     def _mis_modelos(self):
         modelos, nombres = [], []
 
         modelos.append(RandomForestRegressor(
             n_estimators=700, min_samples_split=2, min_samples_leaf=1,
-            max_features=3, random_state=self.random_state, n_jobs=N_JOBS
+            max_features=3, random_state=self.random_state
         )); nombres.append('RandomForest')
 
         modelos.append(ElasticNet(
@@ -93,7 +120,7 @@ class Evaluador:
         if XGBOOST_AVAILABLE:
             modelos.append(XGBRegressor(
                 n_estimators=500, learning_rate=0.05, max_depth=5,
-                random_state=self.random_state, n_jobs=N_JOBS
+                random_state=self.random_state
             )); nombres.append('XGBoost')
 
         modelos.append(SVR(kernel='rbf', C=100, epsilon=0.1, gamma='scale'))
@@ -101,17 +128,39 @@ class Evaluador:
 
         return modelos, nombres
 
+    def _transformar(self, idx_train, idx_test):
+        """ct ajustado en x_train[idx_train] y las dos particiones transformadas, una vez por fold.
+
+        Todos los modelos candidatos (y fit_best) comparten el resultado: el
+        preprocesamiento no depende del estimador. La llave incluye los params de
+        ct, así que cambiar self.ct no reutiliza transformaciones viejas.
+        """
+        llave = (joblib_hash(self.ct.get_params()), joblib_hash(idx_train), joblib_hash(idx_test))
+        if llave not in self._cache_ct:
+            ct = clone(self.ct).fit(self.x_train.iloc[idx_train])
+            x_test = self.x_train.iloc[idx_test] if idx_test is not None else self.x_test
+            self._cache_ct[llave] = (ct, ct.transform(self.x_train.iloc[idx_train]), ct.transform(x_test))
+        return self._cache_ct[llave]
+
     def cross_validate(self, n_splits=5, n_repeats=2, scoring='neg_mean_squared_error'):
         cv = RepeatedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=8)
         filas = []
         detalles = {}
 
+        scorer = get_scorer(scoring)
+        sub = self.idx_busqueda_
+        folds = [(sub[idx_train], sub[idx_test], *self._transformar(sub[idx_train], sub[idx_test])[1:])
+                 for idx_train, idx_test in cv.split(sub)]
+
+        # folds en paralelo y el resto de los núcleos como hilos de cada estimador
+        externos, internos = self.recursos.repartir(len(folds))
         for modelo, nombre in zip(self.modelos, self.nombres):
-            pipe = Pipeline(steps=[('ct', self.ct), ('m', modelo)])
-            mse_scores = cross_val_score(
-                pipe, self.x_train, self.y_train,
-                scoring=scoring, cv=cv, n_jobs=N_JOBS
-            )
+            with self.recursos.limitar(externos, internos):
+                mse_scores = np.array(Parallel(n_jobs=externos)(
+                    delayed(_puntuar)(self.recursos.asignar(clone(modelo), internos), Xt_train,
+                                      self.y_train[idx_train], Xt_test, self.y_train[idx_test], scorer)
+                    for idx_train, idx_test, Xt_train, Xt_test in folds
+                ))
             rmse = np.sqrt(-mse_scores)
             filas.append({'model': nombre, 'rmse_mean': rmse.mean(), 'rmse_std': rmse.std()})
             detalles[nombre] = rmse
@@ -125,15 +174,75 @@ class Evaluador:
 
         self.best_name_ = self.cv_results_.iloc[0]['model']
         idx = self.nombres.index(self.best_name_)
-        self.best_estimator_ = self.modelos[idx]
+        # Clon: los hilos fijados aquí no deben quedar en self.modelos (ver cross_validate)
+        self.best_estimator_ = self.recursos.asignar(clone(self.modelos[idx]), self.recursos.nucleos)
 
-        self.best_pipeline_ = Pipeline(steps=[('ct', self.ct), ('m', self.best_estimator_)])
-        self.best_pipeline_.fit(self.x_train, self.y_train)
+        # ct sobre todo x_train, compartido con cualquier otro modelo que se ajuste aquí
+        ct, Xt_train, Xt_test = self._transformar(np.arange(len(self.x_train)), None)
+        with self.recursos.limitar(1, self.recursos.nucleos):
+            self.best_estimator_.fit(Xt_train, self.y_train)
+        self.best_pipeline_ = Pipeline(steps=[('ct', ct), ('m', self.best_estimator_)])
 
-        preds = self.best_pipeline_.predict(self.x_test)
+        preds = self.best_estimator_.predict(Xt_test)
         self.test_rmse_ = float(np.sqrt(mean_squared_error(self.y_test, preds)))
         return self.best_pipeline_, self.test_rmse_
 
+    def distill(self, student=None, n_synthetic=5, noise=0.1):
+        """Destila el mejor pipeline (maestro) en un estudiante barato de servir.
+
+        Por defecto el estudiante es un HistGradientBoosting poco profundo. Devuelve el
+        pipeline del estudiante y la tabla maestro vs. estudiante (RMSE en test,
+        fidelidad al maestro, latencia y tamaño).
+        """
+        if self.best_pipeline_ is None:
+            self.fit_best()
+        if student is None:
+            student = HistGradientBoostingRegressor(max_iter=300, max_depth=6, learning_rate=0.1,
+                                                    random_state=self.random_state)
+        student = self.recursos.asignar(clone(student), self.recursos.nucleos)
+
+        destilacion = Destilacion(
+            maestro=self.best_pipeline_,
+            estudiante=Pipeline(steps=[('ct', clone(self.ct)), ('m', student)]),
+            n_sinteticas=n_synthetic, ruido=noise, columnas_continuas=self.num_cols,
+            random_state=self.random_state,
+        )
+        with self.recursos.limitar(1, self.recursos.nucleos):
+            self.student_pipeline_ = destilacion.ajustar(self.x_train)
+        self.distill_report_ = destilacion.reporte(self.x_test, self.y_test)
+        return self.student_pipeline_, self.distill_report_
+
+    def subsample_report(self, sizes=(5000, 20000), names=None):
+        """Exactitud y tiempo de ajuste con subconjuntos estratificados vs. todo x_train.
+
+        Cada modelo de ``names`` (por defecto todos) se entrena con ``sizes`` filas
+        (Submuestreo con los params de self.submuestreo, o los por defecto) y con todo
+        x_train, y se evalúa en x_test. ``rmse_vs_full`` es el cociente contra el
+        ajuste completo del mismo modelo.
+        """
+        base = self.submuestreo or Submuestreo(0, random_state=self.random_state)
+        filas = []
+        for modelo, nombre in zip(self.modelos, self.nombres):
+            if names is not None and nombre not in names:
+                continue
+            for n in sorted(s for s in sizes if s < len(self.x_train)) + [len(self.x_train)]:
+                sub = Submuestreo(n, base.estratos, base.vida_media, base.random_state).indices(self.x_train)
+                _, Xt_train, Xt_test = self._transformar(sub, None)
+                estimador = self.recursos.asignar(clone(modelo), self.recursos.nucleos)
+                inicio = time.perf_counter()
+                with self.recursos.limitar(1, self.recursos.nucleos):
+                    estimador.fit(Xt_train, self.y_train[sub])
+                filas.append({
+                    'model': nombre,
+                    'rows': n,
+                    'fit_time_s': time.perf_counter() - inicio,
+                    'rmse': float(np.sqrt(mean_squared_error(self.y_test, estimador.predict(Xt_test)))),
+                })
+        reporte = pd.DataFrame(filas)
+        completo = reporte[reporte['rows'] == len(self.x_train)].set_index('model')['rmse']
+        reporte['rmse_vs_full'] = reporte['rmse'] / reporte['model'].map(completo)
+        return reporte
+
     def get_best(self):
         if self.best_pipeline_ is None:
             raise RuntimeError("Aún no hay modelo entrenado. Llama a fit_best().")
@@ -0,0 +1,63 @@
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from joblib import cpu_count, parallel_config
+from sklearn.base import BaseEstimator
+from threadpoolctl import threadpool_limits
+
+# ==========================
+# PRESUPUESTO DE HILOS
+# ==========================
+@dataclass
+class GestorHilos:
+    """Reparte un presupuesto de núcleos entre paralelismo externo e interno.
+
+    Externo: folds de validación cruzada o zonas (procesos de joblib/loky).
+    Interno: hilos de cada estimador (``n_jobs`` de RandomForest/XGBoost) y de las
+    librerías nativas (OpenMP de HistGradientBoosting, BLAS).
+
+    Con ``n_jobs=-1`` en ambos niveles una máquina de 32 núcleos corre 32 x 32 hilos;
+    aquí ``externos x internos <= nucleos``.
+    """
+
+    nucleos: int
+
+    @classmethod
+    def desde_n_jobs(cls, n_jobs: int | None = -1) -> "GestorHilos":
+        """Presupuesto con la convención de joblib (-1 = todos, -2 = todos menos uno, ...).
+
+        Los núcleos disponibles respetan afinidad y cuotas de CPU del contenedor
+        (``joblib.cpu_count``); un ``n_jobs`` mayor se recorta a ellos.
+        """
+        disponibles = cpu_count()
+        if n_jobs is None:
+            n_jobs = 1
+        nucleos = disponibles + 1 + n_jobs if n_jobs < 0 else min(n_jobs, disponibles)
+        return cls(nucleos=max(nucleos, 1))
+
+    def repartir(self, tareas: int) -> tuple[int, int]:
+        """(externos, internos): hasta una tarea por núcleo y el resto como hilos de cada una."""
+        externos = max(1, min(tareas, self.nucleos))
+        return externos, max(1, self.nucleos // externos)
+
+    @staticmethod
+    def asignar(estimador: BaseEstimator, hilos: int) -> BaseEstimator:
+        """Fija en ``hilos`` los ``n_jobs`` del estimador (también los anidados) que son None.
+
+        Un ``n_jobs`` explícito es decisión del usuario y se respeta.
+        """
+        claves = [k for k, v in estimador.get_params(deep=True).items()
+                  if (k == 'n_jobs' or k.endswith('__n_jobs')) and v is None]
+        return estimador.set_params(**{k: hilos for k in claves})
+
+    @staticmethod
+    @contextmanager
+    def limitar(externos: int, internos: int):
+        """Limita hilos nativos (BLAS/OpenMP) a ``internos`` en este proceso y en los workers.
+
+        El backend loky solo se fija cuando hay paralelismo externo: dentro del mismo
+        proceso anularía el ``prefer="threads"`` de RandomForest.
+        """
+        workers = (parallel_config(backend='loky', inner_max_num_threads=internos)
+                   if externos > 1 else nullcontext())
+        with threadpool_limits(limits=internos), workers:
+            yield
@@ -0,0 +1,191 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+import pandas as pd
+from Project.Configuracion import cargar_config
+from Project.Preprocesamiento import Preprocesamiento
+
+# Variables de calendario por nombre de feature_engineering.temporal_features, en el
+# orden de salida (el de Preprocesamiento.features_tiempo y luego las derivadas)
+TEMPORALES = {
+    'day': 'Day',
+    'month': 'Month',
+    'hour': 'Hour',
+    'minute': 'Minute',
+    'day_of_week': 'Day of Week',
+    'quarter': 'Quarter of Year',
+    'day_of_year': 'Day of Year',
+    'season': 'Season',
+    'is_weekend': 'Is Weekend',
+}
+
+# ==========================
+# GRAFO DE PREPROCESAMIENTO
+# ==========================
+@dataclass
+class Paso:
+    """Nodo del grafo: ``funcion`` recibe, en orden, los resultados de ``dependencias``."""
+
+    nombre: str
+    funcion: Callable[..., Any]
+    dependencias: tuple[str, ...] = ()
+
+
+@dataclass
+class GrafoPreprocesamiento:
+    """Ejecuta los pasos de preprocesamiento como un grafo de dependencias.
+
+    Los pasos cuyas dependencias ya terminaron se lanzan en un pool de hilos, de modo
+    que las ramas independientes (reparación de outliers por columna, variables de
+    tiempo, lags y estadísticas móviles) corren en paralelo. Las agregaciones de pandas
+    que dominan cada rama liberan el GIL.
+
+    El grafo se arma desde ``config/config.yaml``:
+    - ``preprocessing``: ventana de outliers, remuestreo y eliminación de DateTime.
+    - ``feature_engineering``: familias de variables (temporales, lags, móviles).
+    Con las temporales de ``Preprocesamiento.features_tiempo`` (de ``day`` a
+    ``day_of_year``) y sin lags ni móviles el resultado es idéntico al de
+    ``Preprocesamiento.ejecutar`` con los mismos parámetros. ``season``, los lags y las
+    móviles son columnas adicionales que ``ModeloEspecial`` usa como features, pero la
+    API solo construye las de calendario base: ``run_full_pipeline`` guarda ese modelo
+    en ``models/grafo_model_pipeline.joblib`` (salvo ``--model_path_override``), no en
+    el artefacto servido.
+    """
+
+    max_workers: int | None = None
+    pasos: dict[str, Paso] = field(default_factory=dict)
+
+    def agregar(self, nombre: str, funcion: Callable[..., Any], *dependencias: str) -> None:
+        if nombre in self.pasos:
+            raise ValueError(f"Paso duplicado en el grafo: {nombre}")
+        self.pasos[nombre] = Paso(nombre, funcion, tuple(dependencias))
+
+    def ejecutar(self) -> dict[str, Any]:
+        """Corre todos los pasos respetando dependencias y devuelve sus resultados por nombre."""
+        resultados: dict[str, Any] = {}
+        pendientes = dict(self.pasos)
+        en_curso = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pendientes or en_curso:
+                listos = [n for n, p in pendientes.items()
+                          if all(d in resultados for d in p.dependencias)]
+                for nombre in listos:
+                    paso = pendientes.pop(nombre)
+                    args = [resultados[d] for d in paso.dependencias]
+                    en_curso[pool.submit(paso.funcion, *args)] = nombre
+
+                if not en_curso:
+                    raise ValueError(f"Dependencias no resolubles en: {sorted(pendientes)}")
+
+                hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for fut in hechos:
+                    resultados[en_curso.pop(fut)] = fut.result()
+
+        return resultados
+
+    # ---------- Construcción desde configuración ----------
+    @staticmethod
+    def _base(df_modificado: pd.DataFrame, col_fecha: str, frecuencia: str | None,
+              max_hueco: int, dtype: str = "float64") -> pd.DataFrame:
+        """Tramo secuencial: tipos, DateTime, remuestreo opcional e imputación por mediana."""
+        df = df_modificado.copy()
+        df = Preprocesamiento.tranformar_numerica(df)
+        df = Preprocesamiento.a_dtype(df, dtype)
+        df = Preprocesamiento.drop_col_si_existe(df, "mixed_type_col")
+        df = Preprocesamiento.limpiar_parsear_datetime(df, col_fecha)
+        if frecuencia is not None:
+            df = Preprocesamiento.remuestrear_grilla(df, col_fecha, frecuencia, max_hueco)
+        df = Preprocesamiento.imputar_numericos_mediana(df)
+        return Preprocesamiento.orden_temporal(df, col_fecha)
+
+    @staticmethod
+    def _temporales(fechas: pd.DataFrame, col_fecha: str, nombres: list[str]) -> pd.DataFrame:
+        """Columnas de calendario pedidas en ``nombres`` (claves de ``TEMPORALES``)."""
+        desconocidas = sorted(set(nombres) - set(TEMPORALES))
+        if desconocidas:
+            raise ValueError(f"Variables temporales desconocidas: {desconocidas}. Opciones: {list(TEMPORALES)}")
+        df = Preprocesamiento.features_tiempo(fechas.copy(), col_fecha)
+        df["Season"] = df["Month"] % 12 // 3 + 1          # 1 = invierno (dic-feb) ... 4 = otoño
+        df["Is Weekend"] = (df["Day of Week"] >= 6).astype(int)
+        return df[[col for nombre, col in TEMPORALES.items() if nombre in nombres]]
+
+    @staticmethod
+    def _lags(s: pd.Series, lags: list[int]) -> pd.DataFrame:
+        return pd.DataFrame({f"{s.name} lag {k}": s.shift(k) for k in lags}, index=s.index)
+
+    @staticmethod
+    def _moviles(s: pd.Series, ventanas: list[int], stats: list[str]) -> pd.DataFrame:
+        # Solo ventanas pasadas (shift 1) para no filtrar el valor actual.
+        pasado = s.shift(1)
+        cols = {}
+        for w in ventanas:
+            rod = pasado.rolling(window=w, min_periods=w)
+            for st in stats:
+                cols[f"{s.name} roll{w} {st}"] = getattr(rod, st)()
+        return pd.DataFrame(cols, index=s.index)
+
+    @staticmethod
+    def _unir(base: pd.DataFrame, col_fecha: str, eliminar_datetime: bool,
+              reparadas: dict[str, pd.Series], extras: list[pd.DataFrame]) -> pd.DataFrame:
+        df = base.assign(**reparadas)
+        df = pd.concat([df, *extras], axis=1)
+        return Preprocesamiento.finalizar(df, col_fecha, eliminar_datetime)
+
+    @classmethod
+    def desde_config(cls, df_modificado: pd.DataFrame, config: dict | None = None,
+                     col_fecha: str = "DateTime") -> "GrafoPreprocesamiento":
+        config = config or cargar_config()
+        prep = config.get("preprocessing", {})
+        fe = config.get("feature_engineering", {})
+        target = config.get("data", {}).get("validation", {}).get("target_column", "Power Consumption")
+
+        frecuencia = prep.get("resample_frequency") if prep.get("missing_strategy") == "interpolate" else None
+        ventana = prep.get("outlier_window", 25)
+        eliminar_datetime = prep.get("drop_datetime", True)
+
+        grafo = cls(max_workers=prep.get("max_workers"))
+        grafo.agregar("base", lambda: cls._base(df_modificado, col_fecha, frecuencia,
+                                                prep.get("max_gap", 6), prep.get("dtype", "float64")))
+
+        # La base solo se conoce tras ejecutarla; las columnas numéricas salen del crudo.
+        num = [c for c in df_modificado.columns[1:9] if c != col_fecha]
+        for c in num:
+            grafo.agregar(f"outliers:{c}",
+                          lambda b, c=c: Preprocesamiento.outliers_columna(b[c], ventana), "base")
+
+        extras = []
+        temporales = fe.get("temporal_features") or []
+        if temporales:
+            grafo.agregar("tiempo", lambda b: cls._temporales(b[[col_fecha]], col_fecha, temporales), "base")
+            extras.append("tiempo")
+
+        lag_cfg = fe.get("lag_features", {})
+        if lag_cfg.get("enabled", False):
+            for c in num:
+                lags = lag_cfg.get("target_lags" if target in c else "feature_lags", [])
+                if lags:
+                    grafo.agregar(f"lags:{c}", lambda s, lags=lags: cls._lags(s, lags), f"outliers:{c}")
+                    extras.append(f"lags:{c}")
+
+        roll_cfg = fe.get("rolling_features", {})
+        if roll_cfg.get("enabled", False):
+            for c in num:
+                grafo.agregar(f"moviles:{c}",
+                              lambda s: cls._moviles(s, roll_cfg["windows"], roll_cfg["stats"]),
+                              f"outliers:{c}")
+                extras.append(f"moviles:{c}")
+
+        deps = ["base", *(f"outliers:{c}" for c in num), *extras]
+
+        def unir(base, *resto):
+            reparadas = dict(zip(num, resto[:len(num)]))
+            return cls._unir(base, col_fecha, eliminar_datetime, reparadas, list(resto[len(num):]))
+
+        grafo.agregar("final", unir, *deps)
+        return grafo
+
+    @classmethod
+    def correr(cls, df_modificado: pd.DataFrame, config: dict | None = None) -> pd.DataFrame:
+        """Construye el grafo desde la configuración, lo ejecuta y devuelve el dataset final."""
+        return cls.desde_config(df_modificado, config).ejecutar()["final"]
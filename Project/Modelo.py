@@ -1,159 +1,596 @@
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import MinMaxScaler
+from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
 from sklearn.compose import ColumnTransformer
-from sklearn.base import RegressorMixin
+from sklearn.base import RegressorMixin, clone
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.multioutput import MultiOutputRegressor
 import pandas as pd
 import numpy as np
-import joblib
+import copy
+import json
 import os
-from typing import Tuple
-import mlflow
-import mlflow.sklearn
+import time
+from contextlib import nullcontext
+from typing import Iterable, Sequence, Tuple
 from sklearn.metrics import mean_squared_error, r2_score
 from datetime import datetime
-import dagshub
+from Project import ArtefactoModelo
+from Project.GestorHilos import GestorHilos
+from Project.ModeloONNX import exportar_onnx
+from Project.ModeloOnline import ImputadorIncremental, RegresorIncremental, agregar_ciclicas
+from Project.ParadaTemprana import ParadaTemprana
+from Project.PerfilRecursos import PerfilRecursos
+from Project.PuntoControl import PuntoControl
+from Project.PredictorCompilado import PredictorCompilado
+from Project.RegistroAsincrono import RegistroAsincrono
+
+COLUMNS = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows',
+           'DiffuseFlows','PowerConsumption_Zone1',
+           'PowerConsumption_Zone2', 'PowerConsumption_Zone3' ,'Day',
+           'Month', 'Hour', 'Minute', 'DayWeek', 'QuarterYear',
+           'DayYear']
+
+# Processed-data names (Preprocesamiento output), renamed to COLUMNS by _xy
+PROCESSED_COLUMNS = ['Temperature', 'Humidity', 'Wind Speed', 'general diffuse flows',
+                     'diffuse flows', 'Zone 1 Power Consumption',
+                     'Zone 2  Power Consumption', 'Zone 3  Power Consumption', 'Day',
+                     'Month', 'Hour', 'Minute', 'Day of Week', 'Quarter of Year',
+                     'Day of Year']
+
+ZONES = ('PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3')
+
+# train_and_save(profile=True) report, next to run_full_pipeline's actual_metrics.json
+PROFILE_PATH = os.path.join("outputs", "train_profile.json")
+
+# Estimators selectable from config (models.training.estimator)
+ESTIMATORS = {
+    'gradient_boosting': GradientBoostingRegressor,
+    'hist_gradient_boosting': HistGradientBoostingRegressor,
+}
 
 class ModeloEspecial:
     """
     Handles training, saving, loading, and predicting for a production environment.
+
+    mlflow and dagshub are training-only and imported lazily (see _setup_tracking),
+    so loading and predicting do not pay for them.
     """
+
+    # Background MLflow logger, created on first train_and_save
+    _tracker: RegistroAsincrono = None
     
     def __init__(
         self,
         model_path: str,
         model: RegressorMixin = None,
         df: pd.DataFrame = None,
-        target: str = "PowerConsumption_Zone2",
+        target: str | Sequence[str] = "PowerConsumption_Zone2",
         num_cols: Tuple = ('Temperature','Humidity','WindSpeed','GeneralDiffuseFlows','DiffuseFlows'),
         feature_range: Tuple = (1,2),
         train_ratio: float = 0.80,
         exp: str = "Power_Consumption_Pred",
-        run_nm : str = None
+        run_nm : str = None,
+        dtype: str = "float64",
+        n_jobs: int = -1,
+        compress: int = 0,
+        mmap: bool = True,
+        early_stopping: ParadaTemprana = None,
+        checkpoint_every: int = None
     ):
         self.model_path = model_path
         self.target = target
+        # Several targets (e.g. ZONES) are fitted together on one preprocessed matrix
+        self.targets = [target] if isinstance(target, str) else list(target)
         self.num_cols = list(num_cols)
         self.feature_range = feature_range
         self.train_ratio = train_ratio
         self.exp = exp
         self.run_nm = run_nm
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        # Core budget (n_jobs, joblib convention) split between zones and estimator threads
+        self.resources = GestorHilos.desde_n_jobs(n_jobs)
+        # Artifact: compress (0-9) on save; memory-map its arrays on load
+        self.compress = compress
+        self.mmap = mmap
+        # Temporal-validation / time-budget stopping for boosting (None = fixed size)
+        self.early_stopping = early_stopping
+        self.early_stopping_report_ = None
+        self.profile_ = None
+        # Grow the ensemble in blocks, checkpointing to <model_path>.ckpt (None = one fit)
+        if early_stopping is not None and checkpoint_every:
+            raise ValueError("early_stopping and checkpoint_every cannot be combined")
+        self.checkpoint = PuntoControl(model_path + ".ckpt", checkpoint_every) if checkpoint_every else None
         
         # Initialize pipeline as None
         self.pipeline_ = None 
+        # Array-based copy of pipeline_ for small calls (see compile_model)
+        self.compiled_ = None
 
         
 
     def _setup_preprocessor(self):
-        """Helper to create the preprocessing components."""
-        num_pipeline = Pipeline(steps=[
+        """Helper to create the preprocessing components.
+
+        With dtype="float32" every branch is cast on entry, so the imputer, the
+        scaler and the estimator all run on float32 (also when serving).
+        """
+        steps = [
             ('impMediana', SimpleImputer(strategy='median')),
             ('escalaNum', MinMaxScaler(feature_range=self.feature_range)),
-        ])
+        ]
+        remainder = 'passthrough'
+        if self.dtype != "float64":
+            steps.insert(0, ('dtype', self._cast()))
+            remainder = self._cast()
+        num_pipeline = Pipeline(steps=steps)
         return ColumnTransformer(
             transformers=[('numpipe', num_pipeline, self.num_cols)],
-            remainder='passthrough'
+            remainder=remainder
         )
+
+    def _cast(self) -> FunctionTransformer:
+        return FunctionTransformer(np.asarray, kw_args={'dtype': self.dtype},
+                                   feature_names_out='one-to-one')
+
+    @property
+    def multi_target(self) -> bool:
+        return len(self.targets) > 1
+
+    def _build_pipeline(self, model: RegressorMixin) -> Pipeline:
+        """Preprocessor + estimator, unfitted.
+
+        With several targets the preprocessor is fitted and applied once and one
+        clone of ``model`` per target is fitted on that matrix. The ``n_jobs`` core
+        budget is split (see GestorHilos): zones in parallel, the rest as threads of
+        each estimator, so zones x threads never exceeds it. An explicit ``n_jobs``
+        on ``model`` is kept as given; ``model`` itself is not modified (a clone is used).
+        """
+        outer, inner = self.resources.repartir(len(self.targets))
+        model = self.resources.asignar(clone(model), inner)
+        if self.multi_target:
+            model = MultiOutputRegressor(model, n_jobs=outer)
+        return Pipeline(steps=[('ct', self._setup_preprocessor()), ('m', model)])
         
-    def train_and_save(self, df: pd.DataFrame, model: RegressorMixin):
+    def _thread_limits(self, parallel_targets: bool = True):
+        """Native thread limits for a fit: per zone worker, or all cores for sequential fits."""
+        return self.resources.limitar(*self.resources.repartir(len(self.targets) if parallel_targets else 1))
+
+    @staticmethod
+    def build_estimator(training: dict) -> RegressorMixin:
+        """Estimator named by ``training['estimator']`` with its params from ``training[name]``.
+
+        ``hist_gradient_boosting`` bins features into histograms, uses every core and
+        stops early on a held-out fraction, so it fits far faster than the exact
+        ``gradient_boosting`` baseline.
         """
-        1. Splits data (X, y).
-        2. Fits the full pipeline (preprocessor + model).
-        3. Saves the fitted pipeline to disk.
+        name = training.get('estimator', 'gradient_boosting')
+        if name not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator '{name}'. Options: {sorted(ESTIMATORS)}")
+        return ESTIMATORS[name](**(training.get(name) or {}))
+
+    def _xy(self, df: pd.DataFrame):
+        """Features and target(s) of a processed DataFrame.
+
+        Processed names are renamed (in place) to COLUMNS. Any other column, such as
+        the lags, rolling stats or extra calendar features of GrafoPreprocesamiento,
+        is kept as a feature.
+        """
+        df.rename(columns=dict(zip(PROCESSED_COLUMNS, COLUMNS)), inplace=True)
+
+        X = df.drop(columns=[col for col in ZONES if col in df.columns])
+        y = df[self.targets].values
+        if not self.multi_target:
+            y = y.ravel()
+        return X, y
+
+    def split(self, df: pd.DataFrame):
+        """Temporal train/test split (first ``train_ratio`` of rows for training)."""
+        X, y = self._xy(df)
+
+        n = len(df)
+        i = int(n * self.train_ratio)
+        return X.iloc[:i], y[:i], X.iloc[i:], y[i:]
+
+    def compare_estimators(self, df: pd.DataFrame, models: dict) -> pd.DataFrame:
+        """Fits each ``{name: estimator}`` on the same split; returns fit time and test RMSE.
+
+        No MLflow run is opened, so it can be used to decide whether the fast
+        estimator is accurate enough before switching the config.
         """
-        # Initial set for MLFlow
+        x_train, y_train, x_test, y_test = self.split(df)
+        rows = []
+        for name, model in models.items():
+            pipe = self._build_pipeline(model)
+            start = time.perf_counter()
+            with self._thread_limits():
+                pipe.fit(x_train, y_train)
+            fit_time = time.perf_counter() - start
+            rmse = np.sqrt(mean_squared_error(y_test, pipe.predict(x_test)))
+            fitted = pipe.named_steps['m']
+            fitted = fitted.estimators_[0] if self.multi_target else fitted
+            rows.append({
+                'estimator': name,
+                'fit_time_s': fit_time,
+                'rmse': rmse,
+                'n_iter': getattr(fitted, 'n_iter_', getattr(fitted, 'n_estimators_', None)),
+            })
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _setup_tracking(exp: str):
+        """Points MLflow to DagsHub (or to local files with RUN_LOCAL=1). Runs in the upload worker."""
+        import mlflow
+        import dagshub
+
         use_local = os.getenv("RUN_LOCAL", "0") == "1"
 
         if use_local:
             print("⚠️ RUNNING IN LOCAL MODE — MLflow (DagsHub) DISABLED")
             mlflow.set_tracking_uri("file:/app/mlruns")
-            mlflow.set_experiment(self.exp)
+            mlflow.set_experiment(exp)
         else:
             # Normal behavior (remote tracking)
             print("🌐 Using remote MLflow tracking on DagsHub")
             dagshub.init(repo_owner='garc1a0scar', repo_name='mna-mlops-team43', mlflow=True)
             mlflow.set_tracking_uri("https://dagshub.com/garc1a0scar/mna-mlops-team43.mlflow")
-            mlflow.set_experiment(self.exp)
+            mlflow.set_experiment(exp)
 
+    @classmethod
+    def tracker(cls) -> RegistroAsincrono:
+        """Spool-backed MLflow logger shared by every ModeloEspecial (started on first use)."""
+        if cls._tracker is None:
+            cls._tracker = RegistroAsincrono(cls._setup_tracking)
+        return cls._tracker
 
+    def train_and_save(self, df: pd.DataFrame, model: RegressorMixin, profile: bool = False):
+        """
+        1. Splits data (X, y).
+        2. Fits the full pipeline (preprocessor + model).
+        3. Saves the fitted pipeline to disk.
+        Params, metrics and the artifact go to a local spool and are uploaded to
+        MLflow in the background, so tracking latency does not delay training.
+        With ``profile`` the cost of the fit (time, peak RSS, threads), of predicting
+        the test split and the artifact size are logged and written to PROFILE_PATH.
+        """
         # 1. Prepare Data
-        df.columns=['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows',
-                   'DiffuseFlows','PowerConsumption_Zone1',
-                   'PowerConsumption_Zone2', 'PowerConsumption_Zone3' ,'Day',
-                   'Month', 'Hour', 'Minute', 'DayWeek', 'QuarterYear',
-                   'DayYear']
-        
-        X = df.drop(columns=[col for col in df.columns if 'PowerConsumption_Zone' in col])
-        y = df[[self.target]].values.ravel()
-        
-        n = len(df)
-        i = int(n * self.train_ratio)
-
-        x_train = X.iloc[:i]
-        y_train= y[:i]
+        x_train, y_train, x_test, y_test = self.split(df)
 
-        x_test = X.iloc[i:]
-        y_test = y[i:]
-
-        run_name = f"{self.run_nm}_{self.target}_{datetime.now().strftime('%Y%m%d_%H%M')}"
-        with mlflow.start_run(run_name=run_name):
+        target_name = "AllZones" if self.multi_target else self.target
+        run_name = f"{self.run_nm}_{target_name}_{datetime.now().strftime('%Y%m%d_%H%M')}"
+        with self.tracker().start_run(self.exp, run_name) as run:
 
             # 2. Create and Fit Pipeline
-            ct = self._setup_preprocessor()
-            self.pipeline_ = Pipeline(steps=[('ct', ct), ('m', model)])
+            self.pipeline_ = self._build_pipeline(model)
+            self.compiled_ = None
 
             print("Starting model training...")
-            self.pipeline_.fit(x_train, y_train)
-            print("Training complete.")
+            fit_profile = PerfilRecursos() if profile else nullcontext()
+            start = time.perf_counter()
+            sequential = self.early_stopping is not None or self.checkpoint is not None
+            with fit_profile, self._thread_limits(parallel_targets=not sequential):
+                if self.early_stopping is not None:
+                    self.early_stopping_report_ = self._fit_early_stopping(x_train, y_train)
+                elif self.checkpoint is not None:
+                    self._fit_checkpointed(x_train, y_train, model)
+                else:
+                    self.pipeline_.fit(x_train, y_train)
+            fit_time = time.perf_counter() - start
+            print(f"Training complete ({fit_time:.1f}s).")
 
             input_example = x_train.head(1)
 
             if hasattr(model, 'get_params'):
-                mlflow.log_params({
+                run.log_params({
                     'estimator': type(model).__name__,
                     'train_ratio': self.train_ratio,
+                    'dtype': self.dtype,
+                    'targets': ",".join(self.targets),
                     # Log model-specific hyperparameters (e.g., n_estimators)
                     'model_params': model.get_params()
                 })
             
             # Log Metrics
+            start = time.perf_counter()
             y_pred_test = self.pipeline_.predict(x_test)
+            predict_time = time.perf_counter() - start
             mse = mean_squared_error(y_test, y_pred_test)
             rmse = np.sqrt(mse)
             r2 = r2_score(y_test, y_pred_test)
             
-            mlflow.log_metric("rmse", rmse)
-            mlflow.log_metric("r2_score", r2)
+            run.log_metric("rmse", rmse)
+            run.log_metric("r2_score", r2)
+            if self.multi_target:
+                for j, target in enumerate(self.targets):
+                    run.log_metric(f"rmse_{target}", np.sqrt(mean_squared_error(y_test[:, j], y_pred_test[:, j])))
+            run.log_metric("fit_time_s", fit_time)
+            if self.early_stopping_report_ is not None:
+                for target, report in self.early_stopping_report_.items():
+                    suffix = f"_{target}" if self.multi_target else ""
+                    run.log_metric(f"n_iter{suffix}", report['n_iter'])
+                    run.log_metric(f"best_iter{suffix}", report['best_iter'])
+                    run.log_metric(f"model_iter{suffix}", report['model_iter'])
+                    run.log_metric(f"val_rmse{suffix}", report['val_rmse'])
+                    run.log_params({f"stop_reason{suffix}": report['stop_reason']})
+            elif hasattr(self.pipeline_.named_steps['m'], 'n_iter_'):
+                run.log_metric("n_iter", self.pipeline_.named_steps['m'].n_iter_)
 
             # Log Model Artifact to MLFlow
             """mlflow.sklearn.log_model(
             sk_model=self.pipeline_,
             name="model", # Path inside the MLFlow run
-            registered_model_name=f"{self.target}_Pipeline", # Optional: Register for deployment
+            registered_model_name=f"{target_name}_Pipeline", # Optional: Register for deployment
             input_example=input_example
             )"""
 
-            # Save the Fitted Pipeline
-            joblib.dump(self.pipeline_, self.model_path)
-            print(f"Model successfully saved to: {self.model_path}")
-
-            print(f"Uploading artifacts...")
+            # Save the Fitted Pipeline (target names travel with the artifact)
+            self.pipeline_.targets_ = self.targets
+            self.save_model()
 
-            mlflow.log_artifact(local_path=self.model_path, artifact_path="model")
-            print(f"MLFlow Run ID: {mlflow.active_run().info.run_id}")
+            if profile:
+                self.profile_ = self._profile_report(model, fit_profile, fit_time, predict_time, len(x_test), rmse)
+                for key in ('predict_time_s', 'peak_rss_mb', 'threads_max', 'artifact_size_mb'):
+                    run.log_metric(key, self.profile_[key])
+                os.makedirs(os.path.dirname(PROFILE_PATH), exist_ok=True)
+                with open(PROFILE_PATH, "w") as f:
+                    json.dump(self.profile_, f, indent=4)
+                print(f"Training profile saved to: {PROFILE_PATH}")
 
-            final_run_id = mlflow.active_run().info.run_id
-            print(f"MLFLOW_TEST_RUN_ID:{final_run_id}")
+            # Copied to the spool now; the worker prints the MLflow run id once uploaded
+            run.log_artifact(local_path=self.model_path, artifact_path="model")
+            print(f"Tracking run spooled ({run.id}); uploading in background...")
 
             print(f"\nModel performance on the x_test dataset:")
             print(f"Test RMSE: {rmse:.3f}")
 
         return x_test, y_test
     
+    def _profile_report(self, model: RegressorMixin, fit_profile: PerfilRecursos, fit_time: float,
+                        predict_time: float, predict_rows: int, rmse: float) -> dict:
+        """Cost of the last train_and_save, to compare candidate models beyond RMSE."""
+        from threadpoolctl import threadpool_info
+
+        return {
+            'estimator': type(model).__name__,
+            'targets': self.targets,
+            'dtype': self.dtype,
+            'rmse': float(rmse),
+            'fit_time_s': fit_time,
+            'predict_time_s': predict_time,
+            'predict_rows': predict_rows,
+            'predict_us_per_row': predict_time / predict_rows * 1e6,
+            # Process + child workers (loky); sampled during the fit
+            'rss_start_mb': fit_profile.rss_inicial_mb,
+            'peak_rss_mb': fit_profile.pico_rss_mb,
+            'threads_max': fit_profile.hilos_max,
+            'cores': self.resources.nucleos,
+            'n_jobs': model.get_params().get('n_jobs'),
+            'threadpools': {p['internal_api']: p['num_threads'] for p in threadpool_info()},
+            'artifact_size_mb': os.path.getsize(self.model_path) / 2**20,
+        }
+
+    def _fit_early_stopping(self, x_train: pd.DataFrame, y_train: np.ndarray) -> dict:
+        """
+        Fits ``pipeline_`` with ``early_stopping``: the preprocessor on the whole train
+        segment, then the estimator grown until the temporal validation tail plateaus
+        or the time budget runs out, then refit at ``best_iter`` on the whole segment
+        when that fits in the budget (see ParadaTemprana).
+        With several targets each zone gets an equal share of the budget that is left.
+        Returns ``{target: report}``.
+        """
+        Xt = self.pipeline_.named_steps['ct'].fit_transform(x_train)
+        model = self.pipeline_.named_steps['m']
+        if not self.multi_target:
+            return {self.target: self.early_stopping.ajustar(model, Xt, y_train)}
+
+        budget = self.early_stopping.presupuesto_s
+        start = time.perf_counter()
+        reports, model.estimators_ = {}, []
+        for j, target in enumerate(self.targets):
+            left = None if budget is None else (budget - (time.perf_counter() - start)) / (len(self.targets) - j)
+            estimator = self.resources.asignar(clone(model.estimator), self.resources.nucleos)
+            reports[target] = self.early_stopping.ajustar(estimator, Xt, y_train[:, j], presupuesto_s=left)
+            print(f"  {target}: {reports[target]['n_iter']} iterations ({reports[target]['stop_reason']})")
+            model.estimators_.append(estimator)
+        model.n_features_in_ = Xt.shape[1]
+        return reports
+
+    def _fit_checkpointed(self, x_train: pd.DataFrame, y_train: np.ndarray, model: RegressorMixin):
+        """
+        Fits ``pipeline_`` growing ``checkpoint_every`` trees/iterations at a time and
+        saving the partial pipeline after each block. A checkpoint left by an
+        interrupted run on the same data and params is resumed; it is deleted once
+        the ensemble reaches the size configured in ``model``.
+        """
+        checkpoint = self.checkpoint
+        fingerprint = checkpoint.huella(x_train, y_train, model)
+        resumed = checkpoint.cargar(fingerprint)
+        if resumed is not None:
+            self.pipeline_ = resumed
+            print(f"Resuming from checkpoint: {checkpoint.ruta}")
+        else:
+            self.pipeline_.named_steps['ct'].fit(x_train)
+
+        Xt = self.pipeline_.named_steps['ct'].transform(x_train)
+        save = lambda: checkpoint.guardar(self.pipeline_, fingerprint)
+        fitted = self.pipeline_.named_steps['m']
+        if not self.multi_target:
+            checkpoint.crecer(fitted, Xt, y_train, model, save)
+        else:
+            # Zones one after another; a resumed run continues with the last one saved
+            if not hasattr(fitted, 'estimators_'):
+                fitted.estimators_, fitted.n_features_in_ = [], Xt.shape[1]
+            for j, target in enumerate(self.targets):
+                if j == len(fitted.estimators_):
+                    fitted.estimators_.append(self.resources.asignar(clone(fitted.estimator), self.resources.nucleos))
+                checkpoint.crecer(fitted.estimators_[j], Xt, y_train[:, j], model, save)
+        checkpoint.limpiar()
+
+    @staticmethod
+    def _warm_start(model: RegressorMixin, extra_iter: int, X, y) -> RegressorMixin:
+        """Keeps the fitted stages/trees of ``model`` and fits ``extra_iter`` more on ``X, y``.
+
+        warm_start is only on during this fit and is restored afterwards (as in
+        ParadaTemprana), so a later plain fit of the saved model refits from scratch.
+        The size param is left at the number of fitted stages/trees.
+        """
+        params = model.get_params()
+        if 'warm_start' not in params:
+            raise ValueError(f"{type(model).__name__} does not support warm start")
+        size = 'max_iter' if 'max_iter' in params else 'n_estimators'
+        fitted = getattr(model, 'n_iter_', None) or getattr(model, 'n_estimators_', None) or len(model.estimators_)
+        model.set_params(warm_start=True, **{size: fitted + extra_iter}).fit(X, y)
+        return model.set_params(warm_start=params['warm_start'])
+
+    def retrain_incremental(self, df: pd.DataFrame, extra_iter: int = 50,
+                            recent_rows: int = 7 * 144, tolerance: float = 0.0):
+        """
+        Extends the saved pipeline instead of refitting it:
+        1. Loads the artifact at ``model_path`` (the fitted preprocessor is kept as is).
+        2. Adds ``extra_iter`` boosting stages/trees fitted on the last ``recent_rows``
+           training rows (default: one week of 10-minute readings).
+        3. Validates old vs. new on the test split and saves the new pipeline only if
+           its RMSE is at most ``(1 + tolerance)`` times the previous one.
+        Returns ``x_test, y_test, report``.
+        """
+        if not self.load_model():
+            raise FileNotFoundError(f"No previous model to warm-start from: {self.model_path}")
+        previous = self.pipeline_
+        x_train, y_train, x_test, y_test = self.split(df)
+        x_recent, y_recent = x_train.iloc[-recent_rows:], y_train[-recent_rows:]
+
+        candidate = copy.deepcopy(previous)
+        Xt = candidate.named_steps['ct'].transform(x_recent)
+        model = candidate.named_steps['m']
+
+        start = time.perf_counter()
+        with self._thread_limits(parallel_targets=False):
+            if isinstance(model, MultiOutputRegressor):
+                for j, estimator in enumerate(model.estimators_):
+                    self.resources.asignar(estimator, self.resources.nucleos)
+                    self._warm_start(estimator, extra_iter, Xt, y_recent[:, j])
+            else:
+                self.resources.asignar(model, self.resources.nucleos)
+                self._warm_start(model, extra_iter, Xt, y_recent)
+        fit_time = time.perf_counter() - start
+
+        rmse_previous = np.sqrt(mean_squared_error(y_test, previous.predict(x_test)))
+        rmse_new = np.sqrt(mean_squared_error(y_test, candidate.predict(x_test)))
+        accepted = rmse_new <= rmse_previous * (1 + tolerance)
+
+        self.compiled_ = None
+        if accepted:
+            self.pipeline_ = candidate
+            self.save_model()
+        else:
+            self.pipeline_ = previous
+            print(f"Warm-started model rejected (RMSE {rmse_new:.3f} > {rmse_previous:.3f}); keeping previous.")
+
+        report = {
+            'fit_time_s': fit_time,
+            'recent_rows': len(x_recent),
+            'extra_iter': extra_iter,
+            'rmse_previous': float(rmse_previous),
+            'rmse_new': float(rmse_new),
+            'accepted': bool(accepted),
+        }
+        return x_test, y_test, report
+
+    def _build_online_pipeline(self, model: RegressorMixin) -> Pipeline:
+        """Online counterpart of _build_pipeline: every step supports partial_fit.
+
+        Calendar columns also get sin/cos encodings and all columns are standardized,
+        not only num_cols: SGD/MLP need both, unlike the tree ensembles of
+        _build_pipeline. StandardScaler replaces the (1, 2) MinMaxScaler because with
+        every column in [1, 2] each one looks like the intercept and SGD barely converges.
+        """
+        ct = Pipeline(steps=[
+            ('ciclicas', FunctionTransformer(agregar_ciclicas)),
+            ('impMediana', ImputadorIncremental()),
+            ('escalaNum', StandardScaler()),
+        ])
+        return Pipeline(steps=[('ct', ct), ('m', RegresorIncremental(model))])
+
+    def partial_fit(self, df_batch: pd.DataFrame, model: RegressorMixin = None):
+        """
+        Updates the online pipeline with one batch of processed rows: the imputer
+        window, the scaler's mean/variance and the regressor each take one incremental step.
+        The first call builds the pipeline around ``model`` (partial_fit capable,
+        see ModeloOnline.ESTIMADORES_ONLINE; default SGDRegressor).
+        """
+        if self.pipeline_ is None:
+            self.pipeline_ = self._build_online_pipeline(model)
+            self.pipeline_.targets_ = self.targets
+        elif not isinstance(self.pipeline_.named_steps['m'], RegresorIncremental):
+            raise ValueError("The loaded pipeline was trained offline; partial_fit needs an online pipeline")
+
+        X, y = self._xy(df_batch.copy())
+        for _, step in self.pipeline_.named_steps['ct'].steps:
+            # Stateless steps (cyclic encoding) have no partial_fit; fit is a no-op for them
+            X = (step.partial_fit(X) if hasattr(step, 'partial_fit') else step.fit(X)).transform(X)
+        self.pipeline_.named_steps['m'].partial_fit(X, y)
+        self.compiled_ = None
+        return self
+
+    def train_online(self, batches: Iterable[pd.DataFrame], model: RegressorMixin = None,
+                     save_every: int = 1, warmup_rows: int = 0) -> dict:
+        """
+        Online mode: keeps the model current by updating it batch by batch
+        (e.g. ModeloOnline.lotes_streaming) instead of periodic full retrains.
+        Each batch is first predicted with the current model and then learned
+        (prequential test-then-train evaluation). Batches that start within the
+        first ``warmup_rows`` rows are learned but not scored: with single-row
+        updates the first predictions come from scalers fitted on a handful of rows
+        and would dominate the prequential RMSE. The artifact is saved every
+        ``save_every`` batches and at the end; saves are atomic, so a server that
+        reloads ``model_path`` never reads a partial file.
+        Returns a report with the prequential RMSE.
+        """
+        squared_error, evaluated, n_batches, update_time, seen = 0.0, 0, 0, 0.0, 0
+        for batch in batches:
+            if self.pipeline_ is not None and seen >= warmup_rows:
+                X, y = self._xy(batch.copy())
+                squared_error += float(((self.pipeline_.predict(X) - y) ** 2).sum())
+                evaluated += y.size
+            start = time.perf_counter()
+            self.partial_fit(batch, model)
+            update_time += time.perf_counter() - start
+            seen += len(batch)
+            n_batches += 1
+            if n_batches % save_every == 0:
+                self.save_model()
+        self.save_model()
+
+        return {
+            'batches': n_batches,
+            'rows_evaluated': evaluated // len(self.targets),
+            'warmup_rows': warmup_rows,
+            'rmse_prequential': float(np.sqrt(squared_error / evaluated)) if evaluated else None,
+            'update_time_ms': update_time / max(n_batches, 1) * 1e3,
+        }
+
+    def save_model(self):
+        """Saves the fitted pipeline (see ArtefactoModelo: mmap-able, optionally compressed)."""
+        ArtefactoModelo.guardar(self.pipeline_, self.model_path, comprimir=self.compress)
+        print(f"Model successfully saved to: {self.model_path}")
+
     def load_model(self):
-        """Loads the fitted pipeline from disk."""
+        """Loads the fitted pipeline from disk.
+
+        With ``mmap``, a compiled ``<model_path>.arboles`` (see compile_model) made
+        from this very artifact (same SHA-256) is memory-mapped as well and serves
+        small calls.
+        """
         if os.path.exists(self.model_path):
-            self.pipeline_ = joblib.load(self.model_path)
+            self.pipeline_ = ArtefactoModelo.cargar(self.model_path, mmap=self.mmap)
+            self.compiled_ = None
+            trees = ArtefactoModelo.ruta_arboles(self.model_path)
+            if self.mmap and trees.exists():
+                compiled = PredictorCompilado.cargar(trees)
+                if compiled.huella_origen == ArtefactoModelo.huella(self.model_path):
+                    self.compiled_ = compiled
+            self.targets = getattr(self.pipeline_, 'targets_', self.targets)
             print(f"Model successfully loaded from: {self.model_path}")
             return True
         else:
@@ -168,4 +605,46 @@ class ModeloEspecial:
         if self.pipeline_ is None:
             raise RuntimeError("Model is not loaded. Please call load_model() first.")
             
-        return self.pipeline_.predict(X_new)
\ No newline at end of file
+        if self.compiled_ is not None and len(X_new) <= self.compiled_.max_filas:
+            return self.compiled_.predict(X_new)
+        return self.pipeline_.predict(X_new)
+
+    def compile_model(self, path: str = None, X_sample: pd.DataFrame = None) -> PredictorCompilado:
+        """Flattens the fitted pipeline (imputer, scaler, tree ensembles) into NumPy arrays.
+
+        predict() then serves calls of up to ``compiled_.max_filas`` rows from the
+        arrays, with predictions bit-for-bit equal to the pipeline's. Larger batches
+        keep using the pipeline. With ``X_sample`` that cutoff is measured on this
+        machine (PredictorCompilado.calibrar) instead of the 32-row default. The
+        SHA-256 of the saved artifact, if any, is recorded so loaders can tell a
+        stale ``.arboles`` apart. With ``path`` the compiled predictor is also saved as
+        plain arrays (PredictorCompilado.guardar), which load_model and app/ serving
+        memory-map when it is ArtefactoModelo.ruta_arboles(model_path).
+        """
+        if self.pipeline_ is None:
+            raise RuntimeError("Model is not loaded. Please call load_model() first.")
+        self.compiled_ = PredictorCompilado.desde_pipeline(self.pipeline_)
+        if X_sample is not None:
+            self.compiled_.calibrar(self.pipeline_, X_sample)
+        if os.path.exists(self.model_path):
+            self.compiled_.huella_origen = ArtefactoModelo.huella(self.model_path)
+        if path is not None:
+            self.compiled_.guardar(path)
+        return self.compiled_
+
+    def export_onnx(self, path: str = None) -> str:
+        """Exports the fitted pipeline to ONNX (default: model_path with .onnx suffix).
+
+        Serve it with ModeloONNX.PredictorONNX (ONNX Runtime, CPU). Needs skl2onnx.
+        """
+        if self.pipeline_ is None:
+            raise RuntimeError("Model is not loaded. Please call load_model() first.")
+        path = path or os.path.splitext(self.model_path)[0] + ".onnx"
+        exportar_onnx(self.pipeline_, path)
+        print(f"ONNX model saved to: {path}")
+        return path
+
+    def predict_zones(self, X_new: pd.DataFrame) -> pd.DataFrame:
+        """Predicts every trained target in one call; one column per target."""
+        y = self.predict(X_new).reshape(len(X_new), -1)
+        return pd.DataFrame(y, columns=self.targets, index=X_new.index)
@@ -0,0 +1,79 @@
+from pathlib import Path
+import copy
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+# Opsets: ai.onnx.ml 3 admite umbrales/pesos double en los ensambles de árboles
+TARGET_OPSET = {'': 17, 'ai.onnx.ml': 3}
+
+# ==========================
+# EXPORTACIÓN A ONNX
+# ==========================
+def _sin_cast(pipeline: Pipeline) -> Pipeline:
+    """Copia del pipeline sin los pasos de cast a dtype de ``ModeloEspecial``.
+
+    Son ``FunctionTransformer(np.asarray)`` (sin convertidor ONNX) y no hacen falta:
+    la entrada del grafo ONNX ya es float32.
+    """
+    pipeline = copy.deepcopy(pipeline)
+    ct = pipeline.named_steps['ct']
+    numpipe = ct.named_transformers_['numpipe']
+    numpipe.steps = [paso for paso in numpipe.steps if paso[0] != 'dtype']
+    ct.transformers_ = [(nombre, 'passthrough' if nombre == 'remainder' else t, cols)
+                        for nombre, t, cols in ct.transformers_]
+    return pipeline
+
+
+def exportar_onnx(pipeline: Pipeline, ruta: str | Path) -> Path:
+    """Convierte el ``Pipeline`` (ColumnTransformer + regresor) a ONNX.
+
+    El grafo tiene una entrada float32 ``[None, 1]`` por columna (con su nombre),
+    igual que la selección por nombre del ColumnTransformer. Los targets se guardan
+    en los metadatos del modelo. Requiere ``skl2onnx`` (solo al exportar).
+    """
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import FloatTensorType
+
+    columnas = list(pipeline.named_steps['ct'].feature_names_in_)
+    onx = to_onnx(
+        _sin_cast(pipeline),
+        initial_types=[(c, FloatTensorType([None, 1])) for c in columnas],
+        target_opset=TARGET_OPSET,
+    )
+    targets = getattr(pipeline, 'targets_', None)
+    if targets:
+        meta = onx.metadata_props.add()
+        meta.key, meta.value = "targets", ",".join(targets)
+
+    ruta = Path(ruta)
+    ruta.write_bytes(onx.SerializeToString())
+    return ruta
+
+
+# ==========================
+# INFERENCIA CON ONNX RUNTIME
+# ==========================
+class PredictorONNX:
+    """Predice con ONNX Runtime (CPU) a partir del archivo de ``exportar_onnx``.
+
+    Solo necesita ``onnxruntime``, ``numpy`` y ``pandas``. La salida es float64 con la
+    misma forma que ``Pipeline.predict``: (n,) para un target, (n, zonas) para varios.
+    """
+
+    def __init__(self, ruta: str | Path, n_hilos: int | None = None):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        if n_hilos:
+            opciones.intra_op_num_threads = n_hilos
+        self.sesion = ort.InferenceSession(str(ruta), opciones, providers=["CPUExecutionProvider"])
+        self.columnas = [entrada.name for entrada in self.sesion.get_inputs()]
+        self.salida = self.sesion.get_outputs()[0].name
+        targets = self.sesion.get_modelmeta().custom_metadata_map.get("targets")
+        self.targets = targets.split(",") if targets else None
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        y = self.sesion.run([self.salida], {c: X[[c]].to_numpy(np.float32) for c in self.columnas})[0]
+        y = y.astype(np.float64)
+        return y.ravel() if y.shape[1] == 1 else y
@@ -0,0 +1,135 @@
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin, TransformerMixin, clone
+from sklearn.linear_model import SGDRegressor
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.validation import check_is_fitted
+
+# app/Project/ModeloOnline.py es la copia de serving de estas clases: los artefactos
+# online las referencian por Project.ModeloOnline y la imagen de la API solo lleva app/
+
+# Regresores con partial_fit seleccionables desde config (models.online.estimator)
+ESTIMADORES_ONLINE = {
+    'sgd': SGDRegressor,
+    'mlp': MLPRegressor,
+}
+
+# Periodo de las columnas de calendario que se codifican como seno/coseno
+PERIODOS = {'Hour': 24, 'DayWeek': 7, 'Month': 12, 'DayYear': 365.25}
+
+# ==========================
+# CODIFICACIÓN CÍCLICA
+# ==========================
+def agregar_ciclicas(X: pd.DataFrame) -> pd.DataFrame:
+    """Agrega ``<col>_sin``/``<col>_cos`` de las columnas de ``PERIODOS`` presentes.
+
+    Un regresor lineal u online no puede aprender de ``Hour`` en crudo que las 23:00
+    están junto a las 00:00; en el círculo unitario sí es una relación lineal.
+    """
+    X = X.copy()
+    for columna, periodo in PERIODOS.items():
+        if columna in X.columns:
+            angulo = 2 * np.pi * X[columna].to_numpy(dtype=np.float64) / periodo
+            X[f"{columna}_sin"], X[f"{columna}_cos"] = np.sin(angulo), np.cos(angulo)
+    return X
+
+
+# ==========================
+# IMPUTADOR INCREMENTAL
+# ==========================
+class ImputadorIncremental(TransformerMixin, BaseEstimator):
+    """Imputa NaN con la mediana de las últimas ``ventana`` lecturas válidas de cada columna.
+
+    La mediana exacta no se puede actualizar por lotes; una ventana deslizante
+    (por defecto una semana de lecturas de 10 minutos) la aproxima y además sigue
+    los cambios de estación. Una columna sin lecturas válidas se imputa con 0.
+    """
+
+    def __init__(self, ventana: int = 7 * 144):
+        self.ventana = ventana
+
+    def fit(self, X, y=None):
+        for atributo in ('recientes_', 'statistics_'):
+            self.__dict__.pop(atributo, None)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = np.asarray(X, dtype=np.float64)
+        if not hasattr(self, 'recientes_'):
+            self.n_features_in_ = X.shape[1]
+            self.recientes_ = [np.empty(0) for _ in range(X.shape[1])]
+        for j, columna in enumerate(X.T):
+            validos = columna[~np.isnan(columna)]
+            self.recientes_[j] = np.concatenate([self.recientes_[j], validos])[-self.ventana:]
+        self.statistics_ = np.array([np.median(r) if len(r) else 0.0 for r in self.recientes_])
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, 'statistics_')
+        if isinstance(X, pd.DataFrame) and hasattr(self, 'feature_names_in_'):
+            X = X[list(self.feature_names_in_)]
+        X = np.array(X, dtype=np.float64)
+        faltantes = np.isnan(X)
+        if faltantes.any():
+            X[faltantes] = np.broadcast_to(self.statistics_, X.shape)[faltantes]
+        return X
+
+
+# ==========================
+# REGRESOR INCREMENTAL
+# ==========================
+class RegresorIncremental(RegressorMixin, BaseEstimator):
+    """``partial_fit`` de ``estimador`` sobre el target estandarizado, un clon por target.
+
+    El consumo (~10^4 kW) está lejos de la escala en que SGD/MLP aprenden de forma
+    estable, así que cada lote se estandariza con media y desviación acumuladas
+    (``StandardScaler.partial_fit``) y ``predict`` deshace la escala.
+    """
+
+    def __init__(self, estimador: RegressorMixin = None):
+        self.estimador = estimador
+
+    def fit(self, X, y):
+        for atributo in ('estimadores_', 'escala_y_'):
+            self.__dict__.pop(atributo, None)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        y = np.asarray(y, dtype=np.float64).reshape(len(y), -1)
+        if not hasattr(self, 'estimadores_'):
+            plantilla = self.estimador if self.estimador is not None else SGDRegressor()
+            self.estimadores_ = [clone(plantilla) for _ in range(y.shape[1])]
+            self.escala_y_ = StandardScaler()
+            self.n_features_in_ = X.shape[1]
+        z = self.escala_y_.partial_fit(y).transform(y)
+        for j, estimador in enumerate(self.estimadores_):
+            estimador.partial_fit(X, z[:, j])
+        return self
+
+    def predict(self, X):
+        check_is_fitted(self, 'estimadores_')
+        z = np.column_stack([estimador.predict(X) for estimador in self.estimadores_])
+        y = self.escala_y_.inverse_transform(z)
+        return y.ravel() if y.shape[1] == 1 else y
+
+
+# ==========================
+# LOTES EN STREAMING
+# ==========================
+def lotes_streaming(fuente: pd.DataFrame | str | Path, filas_lote: int = 1) -> Iterator[pd.DataFrame]:
+    """Lotes consecutivos de ``filas_lote`` lecturas, en orden de llegada.
+
+    ``fuente`` es un DataFrame ya procesado o la ruta a un CSV procesado; el CSV se
+    lee por bloques (``chunksize``), sin cargarlo completo. ``filas_lote=1`` es una
+    lectura de 10 minutos por actualización.
+    """
+    if isinstance(fuente, pd.DataFrame):
+        for inicio in range(0, len(fuente), filas_lote):
+            yield fuente.iloc[inicio:inicio + filas_lote]
+    else:
+        yield from pd.read_csv(fuente, chunksize=filas_lote)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+import time
+import numpy as np
+from sklearn.base import RegressorMixin
+from sklearn.metrics import mean_squared_error
+
+# ==========================
+# PARADA TEMPRANA POR VALIDACIÓN TEMPORAL Y TIEMPO
+# ==========================
+@dataclass
+class ParadaTemprana:
+    """Ajusta un boosting por bloques de iteraciones y se detiene cuando no ayuda más.
+
+    El último ``fraccion_validacion`` de las filas de entrenamiento (las más recientes,
+    sin barajar) se aparta como validación. El modelo crece ``bloque`` iteraciones a
+    la vez con ``warm_start`` y, tras cada bloque, se mide el RMSE de validación. Se
+    detiene cuando:
+
+    - ``plateau``: pasan ``paciencia`` iteraciones sin mejorar el mejor RMSE en más de
+      ``tolerancia`` (relativa);
+    - ``time_budget``: el tiempo de ajuste alcanza ``presupuesto_s`` (se revisa al
+      terminar cada bloque, así que puede excederse en un bloque);
+    - ``max_iter``: llega al tamaño configurado del estimador (``n_estimators`` /
+      ``max_iter``), que actúa como tope.
+
+    Al terminar por ``plateau`` o ``max_iter``, el modelo se reajusta con ``best_iter``
+    iteraciones sobre todas las filas de entrenamiento (incluida la cola de
+    validación), sin las iteraciones de paciencia. El reajuste no se hace si agotaría
+    el presupuesto (su costo se estima con el tiempo por iteración medido) ni tras
+    ``time_budget``: ahí se conservan las ``n_iter`` iteraciones ya ajustadas sobre las
+    filas sin la cola. ``model_iter`` del reporte es el tamaño del modelo que queda.
+
+    Sirve para ``GradientBoostingRegressor`` e ``HistGradientBoostingRegressor``; la
+    parada interna del estimador (aleatoria) se desactiva durante el ajuste.
+    """
+
+    fraccion_validacion: float = 0.1
+    paciencia: int = 20
+    tolerancia: float = 1e-4
+    presupuesto_s: float | None = None
+    bloque: int = 10
+
+    @classmethod
+    def desde_config(cls, config: dict) -> "ParadaTemprana":
+        """Desde ``models.training.early_stopping`` de config.yaml."""
+        return cls(
+            fraccion_validacion=config.get('validation_fraction', 0.1),
+            paciencia=config.get('n_iter_no_change', 20),
+            tolerancia=config.get('tol', 1e-4),
+            presupuesto_s=config.get('time_budget_s'),
+            bloque=config.get('step', 10),
+        )
+
+    def ajustar(self, modelo: RegressorMixin, X, y, presupuesto_s: float | None = None) -> dict:
+        """Ajusta ``modelo`` en sitio sobre ``X, y`` (ya preprocesados) y devuelve el reporte.
+
+        ``presupuesto_s`` reemplaza al del objeto (p. ej. lo que queda para cada zona).
+        """
+        params = modelo.get_params()
+        if 'warm_start' not in params:
+            raise ValueError(f"{type(modelo).__name__} does not support warm start")
+        tamano = 'max_iter' if 'max_iter' in params else 'n_estimators'
+        parada_interna = 'early_stopping' if 'early_stopping' in params else 'n_iter_no_change'
+        maximo = params[tamano]
+        presupuesto = self.presupuesto_s if presupuesto_s is None else presupuesto_s
+
+        corte = int(len(X) * (1 - self.fraccion_validacion))
+        X_fit, y_fit, X_val, y_val = X[:corte], y[:corte], X[corte:], y[corte:]
+
+        modelo.set_params(warm_start=True, **{parada_interna: False if parada_interna == 'early_stopping' else None})
+        curva = []
+        mejor, mejor_iter, n, motivo = np.inf, 0, 0, 'max_iter'
+        inicio = time.perf_counter()
+        transcurrido = 0.0
+        while n < maximo:
+            n = min(n + self.bloque, maximo)
+            modelo.set_params(**{tamano: n}).fit(X_fit, y_fit)
+            rmse = float(np.sqrt(mean_squared_error(y_val, modelo.predict(X_val))))
+            curva.append([n, rmse])
+            if rmse < mejor * (1 - self.tolerancia):
+                mejor, mejor_iter = rmse, n
+            if n - mejor_iter >= self.paciencia:
+                motivo = 'plateau'
+                break
+            transcurrido = time.perf_counter() - inicio
+            if presupuesto is not None and transcurrido >= presupuesto:
+                motivo = 'time_budget'
+                break
+
+        # Reajuste desde cero con el mejor tamaño sobre todas las filas, si cabe en el
+        # presupuesto; el tamaño queda en los params, así que reentrenar da ese tamaño
+        costo_reajuste = transcurrido / n * mejor_iter * len(X) / corte
+        reajustar = motivo != 'time_budget' and (presupuesto is None or transcurrido + costo_reajuste <= presupuesto)
+        if reajustar:
+            modelo.set_params(warm_start=False, **{tamano: mejor_iter}).fit(X, y)
+        modelo.set_params(warm_start=params['warm_start'], **{parada_interna: params[parada_interna]})
+
+        return {
+            'n_iter': n,
+            'best_iter': mejor_iter,
+            'model_iter': mejor_iter if reajustar else n,
+            'refit': reajustar,
+            'max_iter': maximo,
+            'val_rmse': mejor,
+            'stop_reason': motivo,
+            'fit_time_s': time.perf_counter() - inicio,
+            'validation_rows': len(X_val),
+            'curve': curva,
+        }
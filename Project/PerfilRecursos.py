@@ -0,0 +1,54 @@
+import threading
+import time
+import psutil
+
+# ==========================
+# PERFIL DE RECURSOS
+# ==========================
+class PerfilRecursos:
+    """Mide tiempo, pico de RSS e hilos de un bloque ``with``.
+
+    Un hilo en segundo plano muestrea cada ``intervalo`` segundos la memoria residente
+    del proceso más la de sus hijos (workers de joblib/loky) y el número de hilos del
+    proceso (sin contar el del muestreo). Un pico más corto que ``intervalo`` puede no
+    registrarse; la RSS al entrar y al salir siempre se incluyen.
+    """
+
+    def __init__(self, intervalo: float = 0.05):
+        self.intervalo = intervalo
+        self.proceso = psutil.Process()
+        self.segundos = 0.0
+        self.rss_inicial_mb = 0.0
+        self.pico_rss_mb = 0.0
+        self.hilos_max = 0
+        self._fin = threading.Event()
+        self._hilo = None
+
+    def _muestrear(self) -> None:
+        rss = self.proceso.memory_info().rss
+        hilos = self.proceso.num_threads() - (self._hilo is not None and self._hilo.is_alive())
+        for hijo in self.proceso.children(recursive=True):
+            try:
+                rss += hijo.memory_info().rss
+            except psutil.Error:   # el hijo terminó entre children() y memory_info()
+                pass
+        self.pico_rss_mb = max(self.pico_rss_mb, rss / 2**20)
+        self.hilos_max = max(self.hilos_max, hilos)
+
+    def _trabajar(self) -> None:
+        while not self._fin.wait(self.intervalo):
+            self._muestrear()
+
+    def __enter__(self) -> "PerfilRecursos":
+        self._muestrear()
+        self.rss_inicial_mb = self.pico_rss_mb
+        self._hilo = threading.Thread(target=self._trabajar, name="perfil-recursos", daemon=True)
+        self._hilo.start()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.segundos = time.perf_counter() - self._inicio
+        self._fin.set()
+        self._hilo.join()
+        self._muestrear()
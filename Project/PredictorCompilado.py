@@ -0,0 +1,257 @@
+from dataclasses import dataclass, fields
+from pathlib import Path
+import time
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import (ExtraTreesRegressor, GradientBoostingRegressor,
+                              HistGradientBoostingRegressor, RandomForestRegressor)
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.pipeline import Pipeline
+from Project import ArtefactoModelo
+
+# Filas por bloque al predecir: la matriz (árboles x filas) de nodos activos cabe en caché
+FILAS_BLOQUE = 32
+
+# Hasta cuántas filas conviene el predictor compilado si no se calibró (GBR de 600
+# árboles: 0.33 vs 2.54 ms con 1 fila, pero 4.52 vs 3.95 ms con 128)
+MAX_FILAS = 32
+
+# Tamaños de lote medidos por calibrar(), de menor a mayor
+TAMANOS_CALIBRACION = (1, 8, 16, 32, 64, 128, 256)
+
+# ==========================
+# ÁRBOLES EN ARREGLOS PLANOS
+# ==========================
+@dataclass
+class ArbolesPlanos:
+    """Ensamble de árboles concatenado en arreglos contiguos (un nodo por posición).
+
+    Los hijos del nodo ``i`` están en ``hijos[2i]`` (izquierdo) y ``hijos[2i + 1]``
+    (derecho) y las hojas apuntan a sí mismas, así el recorrido vectorizado avanza
+    ``profundidad`` pasos sobre todos los árboles y filas a la vez sin ramas. La suma
+    de hojas se acumula en el mismo orden que scikit-learn (árbol por árbol), por lo
+    que la predicción coincide bit a bit.
+    """
+
+    atributo: np.ndarray       # intp: columna evaluada en cada nodo
+    umbral: np.ndarray         # float64: ir a la izquierda si x <= umbral
+    nan_izq: np.ndarray        # bool: dirección de los NaN
+    hijos: np.ndarray          # intp: índices globales [izq, der] intercalados
+    valor: np.ndarray          # float64: valor de la hoja (ya escalado por learning_rate)
+    raices: np.ndarray         # int64: nodo raíz de cada árbol
+    profundidad: int
+    base: float                # predicción inicial (init_ / baseline)
+    dtype_entrada: str         # float32 para Tree de sklearn, float64 para HistGradientBoosting
+    promedio: bool = False     # RandomForest/ExtraTrees: media de los árboles
+
+    @staticmethod
+    def _concatenar(arboles: list[dict], **kwargs) -> "ArbolesPlanos":
+        tamanos = np.array([len(a["izq"]) for a in arboles])
+        desfases = np.concatenate([[0], np.cumsum(tamanos)[:-1]])
+        campos = {campo: np.concatenate([a[campo] for a in arboles])
+                  for campo in ("atributo", "umbral", "nan_izq", "valor")}
+        hijos = np.empty(2 * tamanos.sum(), dtype=np.intp)
+        hijos[0::2] = np.concatenate([a["izq"] + d for a, d in zip(arboles, desfases)])
+        hijos[1::2] = np.concatenate([a["der"] + d for a, d in zip(arboles, desfases)])
+        return ArbolesPlanos(hijos=hijos, raices=desfases.astype(np.intp),
+                             profundidad=max(a["profundidad"] for a in arboles), **campos, **kwargs)
+
+    @staticmethod
+    def _arbol_sklearn(tree, escala: float, usa_nan: bool) -> dict:
+        hoja = tree.children_left == -1
+        propio = np.arange(tree.node_count)
+        return {
+            "atributo": np.where(hoja, 0, tree.feature).astype(np.intp),
+            "umbral": tree.threshold.astype(np.float64),
+            "nan_izq": (tree.missing_go_to_left.astype(bool) if usa_nan
+                        else np.zeros(tree.node_count, dtype=bool)),
+            "izq": np.where(hoja, propio, tree.children_left).astype(np.int64),
+            "der": np.where(hoja, propio, tree.children_right).astype(np.int64),
+            "valor": escala * tree.value[:, 0, 0],
+            "profundidad": tree.max_depth,
+        }
+
+    @staticmethod
+    def _arbol_hist(predictor) -> dict:
+        nodos = predictor.nodes
+        if nodos["is_categorical"].any():
+            raise ValueError("Categorical splits are not supported by the compiled predictor")
+        hoja = nodos["is_leaf"].astype(bool)
+        propio = np.arange(len(nodos))
+        return {
+            "atributo": np.where(hoja, 0, nodos["feature_idx"]).astype(np.intp),
+            "umbral": nodos["num_threshold"].astype(np.float64),
+            "nan_izq": nodos["missing_go_to_left"].astype(bool),
+            "izq": np.where(hoja, propio, nodos["left"]).astype(np.int64),
+            "der": np.where(hoja, propio, nodos["right"]).astype(np.int64),
+            "valor": nodos["value"].astype(np.float64),
+            "profundidad": int(nodos["depth"].max()),
+        }
+
+    @classmethod
+    def desde_estimador(cls, modelo, n_atributos: int) -> "ArbolesPlanos":
+        """GradientBoosting, HistGradientBoosting, RandomForest o ExtraTrees ya entrenados."""
+        if isinstance(modelo, GradientBoostingRegressor):
+            # predict_stages compara x <= umbral sin tratar NaN (van a la derecha)
+            base = float(modelo._raw_predict_init(np.zeros((1, n_atributos), dtype=np.float32))[0, 0])
+            arboles = [cls._arbol_sklearn(e.tree_, modelo.learning_rate, usa_nan=False)
+                       for e in modelo.estimators_[:, 0]]
+            return cls._concatenar(arboles, base=base, dtype_entrada="float32")
+
+        if isinstance(modelo, (RandomForestRegressor, ExtraTreesRegressor)):
+            arboles = [cls._arbol_sklearn(e.tree_, 1.0, usa_nan=True) for e in modelo.estimators_]
+            return cls._concatenar(arboles, base=0.0, dtype_entrada="float32", promedio=True)
+
+        if isinstance(modelo, HistGradientBoostingRegressor):
+            if modelo._loss.link.__class__.__name__ != "IdentityLink":
+                raise ValueError(f"Loss '{modelo.loss}' is not supported by the compiled predictor")
+            arboles = [cls._arbol_hist(p[0]) for p in modelo._predictors]
+            return cls._concatenar(arboles, base=float(np.ravel(modelo._baseline_prediction)[0]),
+                                   dtype_entrada="float64")
+
+        raise ValueError(f"{type(modelo).__name__} cannot be compiled to flat tree arrays")
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=self.dtype_entrada)
+        n_arboles, n_cols = len(self.raices), X.shape[1]
+        salida = np.empty(len(X))
+        for inicio in range(0, len(X), FILAS_BLOQUE):
+            bloque = X[inicio:inicio + FILAS_BLOQUE]
+            plano, n = bloque.ravel(), len(bloque)
+            desfase_fila = np.arange(n, dtype=np.intp) * n_cols
+            con_nan = np.isnan(bloque).any()
+
+            nodo = np.repeat(self.raices[:, None], n, axis=1)   # (árboles, filas)
+            for _ in range(self.profundidad):
+                x = plano.take(self.atributo.take(nodo) + desfase_fila)
+                derecha = x > self.umbral.take(nodo)
+                if con_nan:
+                    derecha = np.where(np.isnan(x), ~self.nan_izq.take(nodo), derecha)
+                nodo = self.hijos.take(2 * nodo + derecha)
+
+            # [base, v1, v2, ...] acumulado en orden: ((base + v1) + v2) + ... como sklearn
+            sumandos = np.empty((n_arboles + 1, n))
+            sumandos[0] = self.base
+            self.valor.take(nodo, out=sumandos[1:])
+            salida[inicio:inicio + n] = np.add.accumulate(sumandos, axis=0)[-1]
+        if self.promedio:
+            salida /= n_arboles
+        return salida
+
+
+# ==========================
+# PREDICTOR COMPILADO
+# ==========================
+@dataclass
+class PredictorCompilado:
+    """Pipeline ``ct`` (mediana + MinMaxScaler) + ensamble de árboles en arreglos NumPy.
+
+    Reproduce ``Pipeline.predict`` de ``ModeloEspecial`` sin ``ColumnTransformer`` ni
+    despacho por estimador: selección de columnas, imputación y escalado son
+    operaciones sobre arreglos y cada zona se predice con un recorrido vectorizado.
+
+    ``guardar`` escribe solo arreglos NumPy y tipos básicos (sin clases de Project ni
+    ``Tree`` de scikit-learn), así ``cargar`` los mapea en memoria y se usan en sitio:
+    los workers del servidor comparten esas páginas, a diferencia de los ``Tree`` de
+    GradientBoosting/RandomForest, que copian sus nodos al deserializarse.
+    """
+
+    columnas: list[str]        # orden de entrada (feature_names_in_ del ColumnTransformer)
+    idx_num: np.ndarray        # columnas numéricas imputadas/escaladas (van primero)
+    idx_resto: np.ndarray      # columnas en passthrough (van después)
+    dtype: str                 # dtype de salida del preprocesamiento (float64/float32)
+    mediana: np.ndarray
+    escala: np.ndarray
+    minimo: np.ndarray
+    ensambles: list[ArbolesPlanos]
+    targets: list[str] | None = None
+    max_filas: int = MAX_FILAS  # lotes de hasta max_filas filas van por aquí (ver calibrar)
+    huella_origen: str | None = None  # ArtefactoModelo.huella del artefacto compilado
+
+    @classmethod
+    def desde_pipeline(cls, pipeline: Pipeline) -> "PredictorCompilado":
+        ct: ColumnTransformer = pipeline.named_steps['ct']
+        columnas = list(ct.feature_names_in_)
+        numpipe = ct.named_transformers_['numpipe']
+        idx_num = np.array([columnas.index(c) for c in ct.transformers_[0][2]])
+        idx_resto = np.array([columnas.index(c) if isinstance(c, str) else c
+                              for nombre, _, cols in ct.transformers_
+                              if nombre == 'remainder' for c in cols], dtype=np.int64)
+
+        dtype = numpipe.named_steps['dtype'].kw_args['dtype'] if 'dtype' in numpipe.named_steps else "float64"
+        imputador = numpipe.named_steps['impMediana']
+        escalador = numpipe.named_steps['escalaNum']
+
+        modelo = pipeline.named_steps['m']
+        n_atributos = len(idx_num) + len(idx_resto)
+        estimadores = modelo.estimators_ if isinstance(modelo, MultiOutputRegressor) else [modelo]
+        return cls(
+            columnas=columnas, idx_num=idx_num, idx_resto=idx_resto, dtype=str(np.dtype(dtype)),
+            mediana=imputador.statistics_, escala=escalador.scale_, minimo=escalador.min_,
+            ensambles=[ArbolesPlanos.desde_estimador(e, n_atributos) for e in estimadores],
+            targets=getattr(pipeline, 'targets_', None),
+        )
+
+    def a_arreglos(self) -> dict:
+        """Campos como dict de arreglos y tipos básicos; se deserializa sin importar Project."""
+        campos = {f.name: getattr(self, f.name) for f in fields(self)}
+        campos['ensambles'] = [{f.name: getattr(e, f.name) for f in fields(e)} for e in self.ensambles]
+        return campos
+
+    @classmethod
+    def desde_arreglos(cls, campos: dict) -> "PredictorCompilado":
+        return cls(**{**campos, 'ensambles': [ArbolesPlanos(**e) for e in campos['ensambles']]})
+
+    def guardar(self, ruta: str | Path) -> Path:
+        """Guarda sin comprimir (mapeable), con escritura atómica."""
+        return ArtefactoModelo.guardar(self.a_arreglos(), ruta)
+
+    @classmethod
+    def cargar(cls, ruta: str | Path, mmap: bool = True) -> "PredictorCompilado":
+        return cls.desde_arreglos(ArtefactoModelo.cargar(ruta, mmap=mmap))
+
+    def calibrar(self, pipeline: Pipeline, X: pd.DataFrame, tamanos=TAMANOS_CALIBRACION,
+                 repeticiones: int = 5) -> int:
+        """Mide pipeline vs arreglos por tamaño de lote y fija ``max_filas`` en esta máquina.
+
+        El recorrido vectorizado crece con filas x árboles mientras el pipeline paga un
+        costo fijo por llamada, así que el cruce depende del ensamble y de la CPU.
+        ``max_filas`` queda en el mayor tamaño (consecutivo desde el más chico) en que
+        los arreglos son más rápidos; 0 si nunca lo son.
+        """
+        def mejor(predecir, lote):
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                predecir(lote)
+                tiempos.append(time.perf_counter() - inicio)
+            return min(tiempos)
+
+        self.max_filas = 0
+        for n in tamanos:
+            lote = X.iloc[np.resize(np.arange(len(X)), n)]
+            if mejor(self.predict, lote) >= mejor(pipeline.predict, lote):
+                break
+            self.max_filas = n
+        return self.max_filas
+
+    def transformar(self, X) -> np.ndarray:
+        """Equivalente a ``ct.transform``: numéricas imputadas y escaladas + passthrough."""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.columnas].to_numpy(dtype=np.float64)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+        num = X[:, self.idx_num].astype(self.dtype)
+        faltantes = np.isnan(num)
+        if faltantes.any():
+            num[faltantes] = np.broadcast_to(self.mediana.astype(self.dtype), num.shape)[faltantes]
+        # Mismas operaciones en sitio que MinMaxScaler.transform
+        num *= self.escala
+        num += self.minimo
+        return np.hstack([num, X[:, self.idx_resto].astype(self.dtype)])
+
+    def predict(self, X) -> np.ndarray:
+        Xt = self.transformar(X)
+        salidas = [e.predict(Xt) for e in self.ensambles]
+        return salidas[0] if len(salidas) == 1 else np.column_stack(salidas)
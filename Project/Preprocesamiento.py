@@ -1,7 +1,15 @@
 from dataclasses import dataclass
+from typing import Iterable
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from Project.CargaDatos import CargaDatasets
+from Project.AlmacenParquet import AlmacenParquet
+from Project.CargaDatos import FILAS_BLOQUE, CargaDatasets
+from Project.SketchCuantiles import SketchKLL
+from Project.ValidacionDatos import ValidadorDatos
+
+# Marca de filas agregadas por la grilla dentro de huecos largos (no se imputan)
+HUECO = "__hueco__"
 
 # ==========================
 # PREPROCESAMIENTO
@@ -13,13 +21,16 @@ class Preprocesamiento:
     - Elimina columna "mixed_type_col" si existe.
     - Limpia y convierte DateTime con distintos formatos.
     - Imputa DateTime faltante con vecino a ±10 min o punto medio.
+    - (Opcional) Remuestrea a una grilla regular e interpola huecos cortos; descarta los largos.
     - Imputa numéricos con mediana por columna.
     - Maneja outliers mediante IQR + mediana rodante (ventana configurable).
+    - (Opcional) Estima medianas y cuartiles con sketches KLL fusionables.
+    - (Opcional) Trabaja en float32 de punta a punta (``dtype="float32"``).
     - Crea variables de tiempo y elimina DateTime si se solicita.
     """
 
     @staticmethod
-    def _tranformar_numerica(df: pd.DataFrame) -> pd.DataFrame:
+    def tranformar_numerica(df: pd.DataFrame) -> pd.DataFrame:
         cols = df.columns[1:9]
         df[cols] = (
             df[cols]
@@ -31,11 +42,42 @@ class Preprocesamiento:
         return df
 
     @staticmethod
-    def _drop_col_si_existe(df: pd.DataFrame, col: str) -> pd.DataFrame:
+    def a_dtype(df: pd.DataFrame, dtype: str) -> pd.DataFrame:
+        """Convierte las columnas flotantes a ``dtype`` (p. ej. float32 para media memoria)."""
+        flot = df.select_dtypes("floating").columns
+        if len(flot) and dtype != "float64":
+            df[flot] = df[flot].astype(dtype)
+        return df
+
+    @staticmethod
+    def drop_col_si_existe(df: pd.DataFrame, col: str) -> pd.DataFrame:
         return df.drop(columns=[col], errors="ignore")
 
     @staticmethod
-    def _limpiar_parsear_datetime(df: pd.DataFrame, col: str) -> pd.DataFrame:
+    def _es_creciente(t: pd.Series, estricto: bool = False) -> bool:
+        """Verificación O(n) de orden temporal (sin NaT)."""
+        v = t.to_numpy()
+        if v.size < 2:
+            return True
+        return bool((v[1:] > v[:-1]).all() if estricto else (v[1:] >= v[:-1]).all())
+
+    @staticmethod
+    def orden_temporal(df: pd.DataFrame, col_fecha: str) -> pd.DataFrame:
+        """Ordena por ``col_fecha`` con NaT al final, como ``sort_values``.
+
+        Si las fechas válidas ya están en orden (caso habitual en exportaciones de
+        sensores) se evita el sort O(n log n): devuelve ``df`` tal cual, o solo mueve
+        las filas NaT al final. El llamador no debe asumir que recibe una copia.
+        """
+        nat = df[col_fecha].isna().to_numpy()
+        if not Preprocesamiento._es_creciente(df[col_fecha][~nat]):
+            return df.sort_values(col_fecha, kind="stable")
+        if not nat.any():
+            return df
+        return df.take(np.r_[np.flatnonzero(~nat), np.flatnonzero(nat)])
+
+    @staticmethod
+    def limpiar_parsear_datetime(df: pd.DataFrame, col: str) -> pd.DataFrame:
         s = (
             df[col].astype(str)
             .str.replace(r"[\r\n\t]+", " ", regex=True)
@@ -66,7 +108,12 @@ class Preprocesamiento:
 
         df[col] = dt
 
-        valid = df['DateTime'].notna() & ~df['DateTime'].astype(str).str.strip().str.lower().eq('nan')
+        # dt es datetime64: las fechas inválidas ya son NaT.
+        valid = df[col].notna()
+        if df.index.is_monotonic_increasing and Preprocesamiento._es_creciente(dt[valid], estricto=True):
+            # Ya en orden y sin duplicados: no hay nada que deduplicar ni reordenar.
+            return df.reset_index(drop=True)
+
         df['__score__'] = df.drop(columns=['DateTime']).notna().sum(axis=1)
         keep = (df.loc[valid]
                 .sort_values(['DateTime','__score__'], ascending=[True, False])
@@ -79,31 +126,118 @@ class Preprocesamiento:
         return df
     
     @staticmethod
-    def _imputar_numericos_mediana(df: pd.DataFrame) -> pd.DataFrame:
+    def _largo_huecos(mask: np.ndarray) -> np.ndarray:
+        """Para cada posición faltante devuelve el largo de la racha de NaN que la contiene."""
+        bordes = np.flatnonzero(np.diff(np.r_[0, mask.astype(np.int8), 0]))
+        largos = bordes[1::2] - bordes[::2]
+        out = np.zeros(mask.shape[0], dtype=np.int64)
+        out[mask] = np.repeat(largos, largos)
+        return out
+
+    @staticmethod
+    def remuestrear_grilla(df: pd.DataFrame, col_fecha: str, frecuencia: str = "10min",
+                            max_hueco: int = 6) -> pd.DataFrame:
+        """Ajusta la serie a una grilla regular e interpola huecos de forma vectorizada.
+
+        Cada marca de tiempo se redondea a ``frecuencia`` y la serie se reindexa sobre
+        la grilla completa. Solo se interpolan (linealmente) los huecos interiores de
+        hasta ``max_hueco`` pasos. Las filas agregadas por la grilla dentro de huecos más
+        largos se marcan en ``HUECO``: la imputación por mediana no las rellena y se
+        descartan con el ``dropna`` posterior, en lugar de inventar lecturas constantes.
+        Con la grilla regular, un lag de k pasos es un ``shift(k)`` (y un lag que cruza
+        un hueco largo queda NaN).
+        """
+        df = df.loc[df[col_fecha].notna()].copy()
+        df[col_fecha] = df[col_fecha].dt.round(frecuencia)
+        df = (Preprocesamiento.orden_temporal(df, col_fecha)
+                .drop_duplicates(subset=[col_fecha], keep="first")
+                .set_index(col_fecha))
+        if df.empty:
+            return df.reset_index()
+
+        grilla = pd.date_range(df.index[0], df.index[-1], freq=frecuencia, name=col_fecha)
+        originales = grilla.isin(df.index)
+        df = df.reindex(grilla)
+
+        num = df.select_dtypes("number").columns
+        valores = df[num].to_numpy()
+        faltantes = np.isnan(valores)
+        interpolado = df[num].interpolate(method="linear", limit_area="inside").to_numpy()
+        largos = np.zeros(faltantes.shape, dtype=np.int64)
+        for j in range(len(num)):
+            largos[:, j] = Preprocesamiento._largo_huecos(faltantes[:, j])
+        rellenar = faltantes & (largos <= max_hueco)
+        df[num] = np.where(rellenar, interpolado, valores)
+        df[HUECO] = ~originales & df[num].isna().any(axis=1).to_numpy()
+        return df.reset_index()
+
+    @staticmethod
+    def estimar_sketches(bloques: Iterable[pd.DataFrame], k: int = 200,
+                         seed: int | None = None) -> dict[str, SketchKLL]:
+        """Recorre bloques crudos una sola vez y devuelve un sketch KLL por columna numérica.
+
+        Los sketches de distintas particiones se combinan con ``SketchKLL.fusionar``.
+        """
+        sketches: dict[str, SketchKLL] = {}
+        for bloque in bloques:
+            bloque = Preprocesamiento.tranformar_numerica(bloque.copy())
+            bloque = Preprocesamiento.drop_col_si_existe(bloque, "mixed_type_col")
+            for c in bloque.select_dtypes("number").columns:
+                sketches.setdefault(c, SketchKLL(k, seed)).actualizar(bloque[c].to_numpy())
+        return sketches
+
+    @staticmethod
+    def imputar_numericos_mediana(df: pd.DataFrame,
+                                   sketches: dict[str, SketchKLL] | None = None) -> pd.DataFrame:
+        """Rellena NaN con la mediana; las filas de huecos largos (``HUECO``) quedan NaN."""
         num_cols = df.select_dtypes(include="number").columns
+        hueco = df.pop(HUECO).to_numpy(dtype=bool) if HUECO in df.columns else np.zeros(len(df), bool)
         medianas = df[num_cols].median()
-        df[num_cols] = df[num_cols].fillna(medianas)
+        if sketches is not None:
+            for c in num_cols.intersection(list(sketches)):
+                medianas[c] = sketches[c].cuantil(0.5)
+                # El sketch refleja los valores imputados, igual que el cálculo exacto.
+                sketches[c].actualizar([medianas[c]], peso=int(df.loc[~hueco, c].isna().sum()))
+        df.loc[~hueco, num_cols] = df.loc[~hueco, num_cols].fillna(medianas)
         return df
     
     @staticmethod
-    def _outliers_mediana_rodante(df: pd.DataFrame, col_fecha: str, ventana_mediana: int) -> pd.DataFrame:
-        df = df.sort_values(col_fecha).copy()
-        num = df.select_dtypes("number").columns
-
-        Q1, Q3 = df[num].quantile(0.25), df[num].quantile(0.75)
+    def outliers_columna(s: pd.Series, ventana_mediana: int,
+                          sketch: SketchKLL | None = None) -> pd.Series:
+        """Reemplaza los outliers (IQR) de una columna ya ordenada por su mediana rodante."""
+        if sketch is not None:
+            Q1, mediana, Q3 = sketch.cuantiles([0.25, 0.5, 0.75])
+        else:
+            Q1, Q3 = s.quantile(0.25), s.quantile(0.75)
+            mediana = None
         IQR = Q3 - Q1
         lo, hi = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
-        mask = (df[num] < lo) | (df[num] > hi)
+        mask = (s < lo) | (s > hi)
+
+        rmed = s.rolling(window=ventana_mediana, center=True, min_periods=1).median()
+        s = s.copy()
+        s[mask] = rmed[mask].fillna(s.median() if mediana is None else mediana).astype(s.dtype)
+        return s
+
+    @staticmethod
+    def outliers_mediana_rodante(df: pd.DataFrame, col_fecha: str, ventana_mediana: int,
+                                  sketches: dict[str, SketchKLL] | None = None) -> pd.DataFrame:
+        # ``ordenado`` puede ser el mismo objeto que ``df`` (fast path): no se escribe en él.
+        # Las columnas numéricas reparadas son Series nuevas y el resultado se arma de una vez.
+        ordenado = Preprocesamiento.orden_temporal(df, col_fecha)
+        num = ordenado.select_dtypes("number").columns
+        sketches = sketches or {}
 
+        columnas = {c: ordenado[c] for c in ordenado.columns}
         for c in num:
-            rmed = df[c].rolling(window=ventana_mediana, center=True, min_periods=1).median()
-            df.loc[mask[c], c] = rmed[mask[c]].fillna(df[c].median())
-        
+            columnas[c] = Preprocesamiento.outliers_columna(ordenado[c], ventana_mediana, sketches.get(c))
+
+        df = pd.DataFrame(columnas, index=ordenado.index, copy=False)
         df=df.dropna()
         return df
     
     @staticmethod
-    def _features_tiempo(df: pd.DataFrame, col_fecha: str) -> pd.DataFrame:
+    def features_tiempo(df: pd.DataFrame, col_fecha: str) -> pd.DataFrame:
         dt = df[col_fecha]
         df["Day"] = dt.dt.day
         df["Month"] = dt.dt.month
@@ -122,22 +256,30 @@ class Preprocesamiento:
         return df
 
     @staticmethod
-    def _finalizar(df: pd.DataFrame, col_fecha: str, eliminar_datetime: bool) -> pd.DataFrame:
+    def finalizar(df: pd.DataFrame, col_fecha: str, eliminar_datetime: bool) -> pd.DataFrame:
         df = df.dropna().copy()
         if eliminar_datetime and col_fecha in df.columns:
             df = df.drop(columns=[col_fecha])
         return df
 
     @staticmethod
-    def ejecutar(df_modificado: pd.DataFrame, *, ventana_mediana: int, eliminar_datetime: bool) -> pd.DataFrame:
+    def ejecutar(df_modificado: pd.DataFrame, *, ventana_mediana: int, eliminar_datetime: bool,
+                 frecuencia: str | None = None, max_hueco: int = 6,
+                 sketches: dict[str, SketchKLL] | None = None,
+                 dtype: str = "float64") -> pd.DataFrame:
+        if sketches is not None:
+            sketches = {c: sk.copia() for c, sk in sketches.items()}
         df = df_modificado.copy()
-        df = Preprocesamiento._tranformar_numerica(df)
-        df = Preprocesamiento._drop_col_si_existe(df, "mixed_type_col")
-        df = Preprocesamiento._limpiar_parsear_datetime(df, "DateTime")
-        df = Preprocesamiento._imputar_numericos_mediana(df)
-        df = Preprocesamiento._outliers_mediana_rodante(df, "DateTime", ventana_mediana)
-        df = Preprocesamiento._features_tiempo(df, "DateTime")
-        df = Preprocesamiento._finalizar(df, "DateTime", eliminar_datetime)
+        df = Preprocesamiento.tranformar_numerica(df)
+        df = Preprocesamiento.a_dtype(df, dtype)
+        df = Preprocesamiento.drop_col_si_existe(df, "mixed_type_col")
+        df = Preprocesamiento.limpiar_parsear_datetime(df, "DateTime")
+        if frecuencia is not None:
+            df = Preprocesamiento.remuestrear_grilla(df, "DateTime", frecuencia, max_hueco)
+        df = Preprocesamiento.imputar_numericos_mediana(df, sketches)
+        df = Preprocesamiento.outliers_mediana_rodante(df, "DateTime", ventana_mediana, sketches)
+        df = Preprocesamiento.features_tiempo(df, "DateTime")
+        df = Preprocesamiento.finalizar(df, "DateTime", eliminar_datetime)
         return df
 
 
@@ -149,14 +291,34 @@ class Preprocesamiento:
         nombre_modificado: str = "power_tetouan_city_modified.csv",
         ventana_mediana: int = 25,
         eliminar_datetime: bool = True,
+        frecuencia: str | None = None,
+        max_hueco: int = 6,
+        validar: bool = True,
+        precision_cuantiles: int | None = None,
+        formato: str = "csv",
     ) -> Path:
         carpeta_processed = Path(carpeta_processed)
         carpeta_processed.mkdir(parents=True, exist_ok=True)
 
         loader = CargaDatasets(carpeta_raw, nombre_modificado)
         df_modificado = loader.leer()
+        if validar:
+            ValidadorDatos.desde_config().validar(df_modificado)
+
+        sketches = None
+        if precision_cuantiles is not None:
+            # El CSV ya está en memoria: los sketches se alimentan por bloques de filas de
+            # ``df_modificado`` en lugar de volver a leer el archivo.
+            bloques = (df_modificado.iloc[i:i + FILAS_BLOQUE] for i in range(0, len(df_modificado), FILAS_BLOQUE))
+            sketches = Preprocesamiento.estimar_sketches(bloques, k=precision_cuantiles)
+
+        # Parquet particiona por fecha: DateTime se conserva en el almacén y se quita al leer.
+        df_final = Preprocesamiento.ejecutar(df_modificado,ventana_mediana=ventana_mediana,
+                                             eliminar_datetime=eliminar_datetime and formato != "parquet",
+                                             frecuencia=frecuencia,max_hueco=max_hueco,sketches=sketches,)
 
-        df_final = Preprocesamiento.ejecutar(df_modificado,ventana_mediana=ventana_mediana,eliminar_datetime=eliminar_datetime,)
+        if formato == "parquet":
+            return AlmacenParquet(carpeta_processed / Path(nombre_salida).stem).escribir(df_final)
 
         ruta_out = carpeta_processed / nombre_salida
         df_final.to_csv(ruta_out, index=False)
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import hashlib
+import pandas as pd
+from sklearn.base import RegressorMixin
+from Project import ArtefactoModelo
+
+# ==========================
+# PUNTOS DE CONTROL DEL ENTRENAMIENTO
+# ==========================
+@dataclass
+class PuntoControl:
+    """Entrenamiento por bloques con checkpoint del ensamble parcial en disco.
+
+    El estimador (RandomForest/ExtraTrees, GradientBoosting o HistGradientBoosting)
+    crece ``cada`` árboles/iteraciones a la vez con ``warm_start`` y tras cada bloque
+    el pipeline parcial se guarda en ``ruta``. Si el proceso se interrumpe, la
+    siguiente corrida con los mismos datos y el mismo estimador retoma desde ahí; con
+    ``random_state`` fijo el resultado es idéntico al de un ajuste sin interrupciones.
+
+    El checkpoint lleva una huella de datos + estimador: uno que no coincide se ignora
+    (se empieza de cero) en vez de mezclar árboles de otro entrenamiento.
+    """
+
+    ruta: Path
+    cada: int = 50
+
+    @staticmethod
+    def tamano(modelo: RegressorMixin) -> str:
+        params = modelo.get_params()
+        if 'warm_start' not in params:
+            raise ValueError(f"{type(modelo).__name__} does not support warm start")
+        return 'max_iter' if 'max_iter' in params else 'n_estimators'
+
+    @staticmethod
+    def ajustados(modelo: RegressorMixin) -> int:
+        """Árboles/iteraciones ya ajustados (0 si el estimador no está ajustado)."""
+        return (getattr(modelo, 'n_iter_', None) or getattr(modelo, 'n_estimators_', None)
+                or len(getattr(modelo, 'estimators_', [])))
+
+    @classmethod
+    def huella(cls, X: pd.DataFrame, y, modelo: RegressorMixin) -> str:
+        """Hash de las filas de entrenamiento, el target y los params (sin el tamaño)."""
+        params = {k: v for k, v in modelo.get_params().items() if k not in ('warm_start', cls.tamano(modelo))}
+        h = hashlib.sha1()
+        h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+        h.update(pd.util.hash_array(pd.DataFrame(y).to_numpy().ravel()).tobytes())
+        h.update(f"{type(modelo).__name__}{sorted(params.items())}".encode())
+        return h.hexdigest()
+
+    def guardar(self, pipeline, huella: str) -> None:
+        """Escritura atómica: una interrupción a mitad nunca deja un checkpoint corrupto."""
+        ArtefactoModelo.guardar({'huella': huella, 'pipeline': pipeline}, self.ruta)
+
+    def cargar(self, huella: str):
+        """Pipeline parcial guardado, o None si no hay checkpoint o es de otro entrenamiento."""
+        if not Path(self.ruta).exists():
+            return None
+        guardado = ArtefactoModelo.cargar(self.ruta, mmap=False)
+        if guardado['huella'] != huella:
+            print(f"[WARNING] Checkpoint {self.ruta} is from different data/params; starting over.")
+            return None
+        return guardado['pipeline']
+
+    def limpiar(self) -> None:
+        Path(self.ruta).unlink(missing_ok=True)
+
+    def crecer(self, modelo: RegressorMixin, X, y, plantilla: RegressorMixin,
+               al_terminar_bloque: Callable[[], None]) -> RegressorMixin:
+        """Ajusta ``modelo`` desde lo que ya tenga hasta el tamaño de ``plantilla``, por bloques.
+
+        ``plantilla`` es el estimador configurado (sin ajustar): al terminar, ``modelo``
+        queda con su tamaño y su ``warm_start``.
+        """
+        tamano = self.tamano(plantilla)
+        tamano_final, warm_start = plantilla.get_params()[tamano], plantilla.get_params()['warm_start']
+        n = self.ajustados(modelo)
+        while n < tamano_final:
+            objetivo = min(n + self.cada, tamano_final)
+            modelo.set_params(warm_start=True, **{tamano: objetivo}).fit(X, y)
+            n = self.ajustados(modelo)
+            al_terminar_bloque()
+            if n < objetivo:   # la parada temprana propia del estimador lo detuvo
+                break
+        modelo.set_params(warm_start=warm_start, **{tamano: max(n, tamano_final)})
+        return modelo
@@ -0,0 +1,176 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+import atexit
+import json
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+# ==========================
+# RUN EN SPOOL LOCAL
+# ==========================
+def _escribir(carpeta: Path, datos: dict) -> None:
+    """Reescribe ``run.json`` de forma atómica (temporal + ``replace``)."""
+    tmp = carpeta / "run.json.tmp"
+    tmp.write_text(json.dumps(datos, indent=2))
+    tmp.replace(carpeta / "run.json")
+
+
+class RunSpool:
+    """Run de MLflow escrito en disco local: ``run.json`` + carpeta ``artifacts/``.
+
+    Cada llamada reescribe ``run.json`` de forma atómica, así un proceso interrumpido
+    deja en el spool lo registrado hasta ese momento.
+    """
+
+    def __init__(self, carpeta: Path, experimento: str, run_name: str):
+        self.carpeta = carpeta
+        self.id = carpeta.name
+        self.datos = {"experimento": experimento, "run_name": run_name,
+                      "params": {}, "metrics": {}, "estado": "abierto"}
+        (self.carpeta / "artifacts").mkdir(parents=True, exist_ok=True)
+        self._guardar()
+
+    def _guardar(self) -> None:
+        _escribir(self.carpeta, self.datos)
+
+    def log_params(self, params: dict) -> None:
+        # MLflow guarda los parámetros como texto; se convierten aquí para poder serializarlos
+        self.datos["params"].update({k: str(v) for k, v in params.items()})
+        self._guardar()
+
+    def log_metric(self, clave: str, valor: float) -> None:
+        self.datos["metrics"][clave] = float(valor)
+        self._guardar()
+
+    def log_artifact(self, local_path: str, artifact_path: str | None = None) -> None:
+        """Copia el archivo al spool (el original puede sobrescribirse antes de subirlo)."""
+        destino = self.carpeta / "artifacts" / (artifact_path or "")
+        destino.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(local_path, destino)
+
+    def cerrar(self, estado: str = "cerrado") -> None:
+        """Marca el run como listo para subir: ``cerrado`` o ``fallido`` (excepción en el bloque)."""
+        self.datos["estado"] = estado
+        self._guardar()
+
+
+# ==========================
+# REGISTRO ASÍNCRONO
+# ==========================
+class RegistroAsincrono:
+    """Registro de MLflow fuera del camino crítico del entrenamiento.
+
+    - ``start_run`` escribe parámetros, métricas y artefactos en un spool local (inmediato).
+    - Al cerrar el run, un hilo en segundo plano configura el tracking (``configurar``,
+      p. ej. ``dagshub.init`` + URI remota) y lo sube con reintentos y espera exponencial.
+    - Un run subido se borra del spool; uno que agota los reintentos queda ahí y se
+      reencola la próxima vez que se crea un registro sobre la misma carpeta.
+    - El ``run_id`` de MLflow se anota en el spool antes de registrar nada: un reintento
+      (en este proceso o en el siguiente) retoma ese mismo run en lugar de crear otro.
+    - Un bloque ``with`` que termina con una excepción sube el run como FAILED.
+    - Al salir del proceso se espera a la cola hasta ``espera_salida`` segundos; lo que
+      no se subió sigue en el spool para la próxima vez. Un script que debe dejar todo
+      subido (p. ej. ``run_full_pipeline``) llama a ``esperar()`` al terminar.
+
+    Parámetros
+    ----------
+    configurar: Callable[[str], None]
+        Recibe el nombre del experimento y deja listo ``mlflow`` para ``start_run``.
+    carpeta_spool: str | Path
+        Carpeta local del spool.
+    reintentos: int
+        Intentos de subida por run.
+    espera: float
+        Segundos antes del primer reintento; se duplica en cada intento.
+    espera_salida: float
+        Máximo de segundos que la salida del proceso espera a la cola.
+    """
+
+    def __init__(self, configurar: Callable[[str], None], carpeta_spool: str | Path = "mlruns_spool",
+                 reintentos: int = 5, espera: float = 2.0, espera_salida: float = 5.0):
+        self.configurar = configurar
+        self.carpeta = Path(carpeta_spool)
+        self.reintentos = reintentos
+        self.espera = espera
+        self.espera_salida = espera_salida
+        self.subidos: dict[str, str] = {}   # id de spool -> run_id de MLflow
+        self._cola: queue.Queue = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name="registro-mlflow", daemon=True)
+        self._hilo.start()
+        atexit.register(self.al_salir)
+
+        for pendiente in sorted(self.carpeta.glob("*/run.json")):
+            if json.loads(pendiente.read_text())["estado"] in ("cerrado", "fallido"):
+                self._cola.put(pendiente.parent)
+
+    @contextmanager
+    def start_run(self, experimento: str, run_name: str):
+        """Abre un run en el spool; al salir del bloque (también por excepción) queda encolado."""
+        run = RunSpool(self.carpeta / uuid.uuid4().hex, experimento, run_name)
+        estado = "fallido"
+        try:
+            yield run
+            estado = "cerrado"
+        finally:
+            run.cerrar(estado)
+            self._cola.put(run.carpeta)
+
+    def esperar(self, timeout: float | None = None) -> bool:
+        """Bloquea hasta subir lo encolado; devuelve False si vence ``timeout``."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if limite is not None and time.monotonic() > limite:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def al_salir(self) -> bool:
+        """Hook de ``atexit``: una subida que falla no retiene la salida durante los reintentos."""
+        return self.esperar(timeout=self.espera_salida)
+
+    def _trabajar(self) -> None:
+        while True:
+            carpeta = self._cola.get()
+            try:
+                self._subir_con_reintentos(carpeta)
+            finally:
+                self._cola.task_done()
+
+    def _subir_con_reintentos(self, carpeta: Path) -> None:
+        for intento in range(self.reintentos):
+            try:
+                self.subidos[carpeta.name] = self._subir(carpeta)
+                shutil.rmtree(carpeta, ignore_errors=True)
+                return
+            except Exception as e:
+                if intento + 1 == self.reintentos:
+                    print(f"[WARNING] MLflow upload failed, kept in spool: {carpeta} ({type(e).__name__}: {e})")
+                    return
+                time.sleep(self.espera * 2 ** intento)
+
+    def _subir(self, carpeta: Path) -> str:
+        import mlflow  # solo lo carga el hilo de subida
+
+        datos = json.loads((carpeta / "run.json").read_text())
+        self.configurar(datos["experimento"])
+        # Un intento previo ya creó el run (quizá quedó RUNNING): se retoma el mismo
+        retomar = {"run_id": datos["run_id"]} if datos.get("run_id") else {"run_name": datos["run_name"]}
+        with mlflow.start_run(**retomar) as run:
+            if not datos.get("run_id"):
+                datos["run_id"] = run.info.run_id
+                _escribir(carpeta, datos)
+            if datos["params"]:
+                mlflow.log_params(datos["params"])
+            if datos["metrics"]:
+                mlflow.log_metrics(datos["metrics"])
+            if any((carpeta / "artifacts").iterdir()):
+                mlflow.log_artifacts(str(carpeta / "artifacts"))
+            run_id = run.info.run_id
+            if datos["estado"] == "fallido":
+                mlflow.end_run(status="FAILED")
+        print(f"MLFlow Run ID: {run_id}")
+        return run_id
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+import hashlib
+import json
+import math
+import pandas as pd
+from Project.AlmacenParquet import AlmacenParquet
+from Project.Preprocesamiento import Preprocesamiento
+from Project.ValidacionDatos import ValidadorDatos
+
+# ==========================
+# REPROCESO INCREMENTAL
+# ==========================
+@dataclass
+class ReprocesoIncremental:
+    """Reprocesa solo los días del crudo que cambiaron y los fusiona en el almacén Parquet.
+
+    - Cada día del crudo se resume con un hash de contenido (``_hashes_diarios.json``
+      en la raíz del almacén).
+    - Se reprocesan los días nuevos, modificados o eliminados, usando como contexto los
+      días vecinos que cubre la ventana de la mediana rodante.
+    - Medianas y cuartiles globales salen de sketches KLL sobre todo el crudo (una pasada),
+      así el tramo reprocesado usa estadísticos de la historia completa.
+    - Solo se reescriben las particiones mensuales que contienen días cambiados.
+    Sin manifiesto previo se hace una construcción completa (estadísticos exactos).
+    """
+
+    almacen: AlmacenParquet
+    ventana_mediana: int = 25
+    frecuencia: str | None = None
+    max_hueco: int = 6
+    dtype: str = "float64"
+    precision_cuantiles: int = 1000
+    col_fecha: str = "DateTime"
+    lecturas_por_dia: int = 144
+
+    @property
+    def _ruta_manifiesto(self):
+        return self.almacen.carpeta / "_hashes_diarios.json"
+
+    def _dias(self, df_raw: pd.DataFrame) -> pd.Series:
+        """Día de cada fila cruda; filas con fecha ilegible heredan el día anterior."""
+        fechas = pd.Series(ValidadorDatos.a_fechas(df_raw[self.col_fecha]), index=df_raw.index)
+        return fechas.ffill().bfill().dt.floor("D")
+
+    def hashes_diarios(self, df_raw: pd.DataFrame) -> dict[str, str]:
+        filas = pd.util.hash_pandas_object(df_raw, index=False).to_numpy()
+        dias = self._dias(df_raw).to_numpy()
+        out = {}
+        for dia, idx in pd.Series(range(len(dias))).groupby(dias).groups.items():
+            out[pd.Timestamp(dia).strftime("%Y-%m-%d")] = hashlib.sha1(filas[idx].tobytes()).hexdigest()
+        return out
+
+    def _leer_manifiesto(self) -> dict[str, str] | None:
+        if not (self._ruta_manifiesto.exists() and self.almacen.existe()):
+            return None
+        return json.loads(self._ruta_manifiesto.read_text())
+
+    def _procesar(self, df_raw: pd.DataFrame, sketches=None) -> pd.DataFrame:
+        return Preprocesamiento.ejecutar(
+            df_raw, ventana_mediana=self.ventana_mediana, eliminar_datetime=False,
+            frecuencia=self.frecuencia, max_hueco=self.max_hueco,
+            sketches=sketches, dtype=self.dtype,
+        )
+
+    def actualizar(self, df_raw: pd.DataFrame) -> list[str]:
+        """Sincroniza el almacén con ``df_raw``; devuelve los días reprocesados (``YYYY-MM-DD``)."""
+        nuevos = self.hashes_diarios(df_raw)
+        previos = self._leer_manifiesto()
+
+        if previos is None:
+            self.almacen.escribir(self._procesar(df_raw))
+            self._ruta_manifiesto.write_text(json.dumps(nuevos))
+            return sorted(nuevos)
+
+        cambiados = sorted(d for d in nuevos.keys() | previos.keys() if nuevos.get(d) != previos.get(d))
+        if not cambiados:
+            return []
+
+        dias_cambiados = pd.to_datetime(cambiados)
+        contexto = math.ceil(self.ventana_mediana / 2 / self.lecturas_por_dia)
+        dias_raw = self._dias(df_raw)
+        vecinos = dias_cambiados.union(
+            pd.DatetimeIndex([d + pd.Timedelta(days=k) for d in dias_cambiados
+                              for k in range(-contexto, contexto + 1)])
+        )
+
+        sketches = Preprocesamiento.estimar_sketches([df_raw], k=self.precision_cuantiles, seed=0)
+        tramo = self._procesar(df_raw.loc[dias_raw.isin(vecinos)], sketches)
+        tramo = tramo.loc[tramo[self.col_fecha].dt.floor("D").isin(dias_cambiados)]
+
+        # Fusión: solo se reescriben los meses afectados.
+        partes = []
+        for mes in dias_cambiados.to_period("M").unique():
+            actual = self.almacen.leer(mes.start_time, mes.end_time, eliminar_datetime=False)
+            partes.append(actual.loc[~actual[self.col_fecha].dt.floor("D").isin(dias_cambiados)])
+        fusion = pd.concat([*partes, tramo]).sort_values(self.col_fecha, kind="stable")
+
+        meses_vacios = set(dias_cambiados.to_period("M").unique()) - set(fusion[self.col_fecha].dt.to_period("M"))
+        self.almacen.escribir(fusion.reset_index(drop=True))
+        for mes in meses_vacios:
+            self.almacen.eliminar_particion(mes.year, mes.month)
+
+        self._ruta_manifiesto.write_text(json.dumps(nuevos))
+        return cambiados
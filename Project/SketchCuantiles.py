@@ -0,0 +1,95 @@
+import numpy as np
+
+# ==========================
+# SKETCH DE CUANTILES (KLL)
+# ==========================
+class SketchKLL:
+    """Sketch de cuantiles KLL: una pasada, memoria acotada y fusionable entre particiones.
+
+    Cada nivel ``h`` guarda elementos con peso ``2**h``. Cuando un nivel supera su
+    capacidad se ordena y se promueve uno de cada dos elementos (con desfase aleatorio)
+    al nivel siguiente. El error de rango es del orden de ``1/k``: ``k=200`` da ~1%.
+    Los valores NaN se ignoran.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = None):
+        if k < 8:
+            raise ValueError("k debe ser al menos 8")
+        self.k = k
+        self.seed = seed
+        self.n = 0
+        self.niveles: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacidad(self, h: int) -> int:
+        altura = len(self.niveles)
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (altura - 1 - h))))
+
+    def _compactar(self) -> None:
+        h = 0
+        while h < len(self.niveles):
+            nivel = self.niveles[h]
+            if nivel.size <= self._capacidad(h):
+                h += 1
+                continue
+            if h + 1 == len(self.niveles):
+                self.niveles.append(np.empty(0))
+            nivel = np.sort(nivel)
+            impar = nivel.size % 2
+            promovidos = nivel[impar:][self._rng.integers(2)::2]
+            self.niveles[h + 1] = np.concatenate([self.niveles[h + 1], promovidos])
+            self.niveles[h] = nivel[:impar]
+            # Un nivel nuevo reduce la capacidad de los inferiores: se revisa desde abajo.
+            h = 0
+
+    def actualizar(self, valores, peso: int = 1) -> "SketchKLL":
+        """Agrega un lote de valores; ``peso`` entero cuenta cada valor ``peso`` veces."""
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        if valores.size == 0 or peso <= 0:
+            return self
+
+        h = 0
+        while peso:
+            if peso & 1:
+                while len(self.niveles) <= h:
+                    self.niveles.append(np.empty(0))
+                self.niveles[h] = np.concatenate([self.niveles[h], valores])
+                self.n += valores.size << h
+            peso >>= 1
+            h += 1
+        self._compactar()
+        return self
+
+    def fusionar(self, otro: "SketchKLL") -> "SketchKLL":
+        """Combina ``otro`` en este sketch (p. ej. sketches de distintas particiones)."""
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append(np.empty(0))
+        for h, nivel in enumerate(otro.niveles):
+            self.niveles[h] = np.concatenate([self.niveles[h], nivel])
+        self.n += otro.n
+        self.k = min(self.k, otro.k)
+        self._compactar()
+        return self
+
+    def copia(self) -> "SketchKLL":
+        """Copia independiente con el mismo estado del generador: compacta igual que el original."""
+        nuevo = SketchKLL(self.k, self.seed)
+        nuevo.n = self.n
+        nuevo.niveles = [nivel.copy() for nivel in self.niveles]
+        nuevo._rng.bit_generator.state = self._rng.bit_generator.state
+        return nuevo
+
+    def cuantiles(self, qs) -> np.ndarray:
+        """Estima los cuantiles ``qs`` (en [0, 1])."""
+        if self.n == 0:
+            return np.full(np.shape(qs), np.nan)
+        items = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(nivel.size, 2.0 ** h) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(items, kind="stable")
+        acumulado = np.cumsum(pesos[orden])
+        idx = np.searchsorted(acumulado, np.asarray(qs) * acumulado[-1], side="left")
+        return items[orden][np.clip(idx, 0, items.size - 1)]
+
+    def cuantil(self, q: float) -> float:
+        return float(self.cuantiles([q])[0])
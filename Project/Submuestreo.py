@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+# Estratos por defecto: hora del día, día de la semana y estación (trimestre)
+ESTRATOS = ['Hour', 'DayWeek', 'QuarterYear']
+
+# ==========================
+# SUBMUESTREO ESTRATIFICADO
+# ==========================
+@dataclass
+class Submuestreo:
+    """Subconjunto representativo de ``n_filas`` de un historial largo.
+
+    - Cada combinación de ``estratos`` recibe filas en proporción a su tamaño (mayor
+      residuo), al menos una si el total lo permite, así ninguna hora/día/estación
+      queda fuera del ajuste.
+    - Dentro de cada estrato se muestrea sin reemplazo con probabilidad que decae
+      con la antigüedad: una fila ``vida_media`` filas más vieja pesa la mitad (las
+      filas están en orden temporal). ``vida_media=None`` muestrea uniforme.
+
+    Los índices se devuelven ordenados, así el subconjunto conserva el orden temporal.
+    """
+
+    n_filas: int
+    estratos: list[str] = field(default_factory=lambda: list(ESTRATOS))
+    vida_media: int | None = 365 * 144     # un año de lecturas de 10 minutos
+    random_state: int = 0
+
+    def pesos(self, n: int) -> np.ndarray:
+        if self.vida_media is None:
+            return np.ones(n)
+        return 0.5 ** ((n - 1 - np.arange(n)) / self.vida_media)
+
+    def indices(self, X: pd.DataFrame) -> np.ndarray:
+        """Posiciones (``iloc``) de las filas elegidas; todas si ``n_filas >= len(X)``."""
+        if self.n_filas >= len(X):
+            return np.arange(len(X))
+        rng = np.random.default_rng(self.random_state)
+        columnas = [c for c in self.estratos if c in X.columns]
+        grupos = (list(pd.RangeIndex(len(X)).groupby(pd.MultiIndex.from_frame(X[columnas])).values())
+                  if columnas else [np.arange(len(X))])
+        grupos = [np.asarray(g) for g in grupos]
+
+        # Asignación proporcional por mayor residuo, con mínimo de 1 por estrato
+        tamanos = np.array([len(g) for g in grupos])
+        cuota = tamanos / tamanos.sum() * self.n_filas
+        asignadas = np.floor(cuota).astype(int)
+        if self.n_filas >= len(grupos):
+            asignadas = np.maximum(asignadas, 1)
+        faltan = self.n_filas - asignadas.sum()
+        if faltan > 0:
+            asignadas[np.argsort(asignadas - cuota)[:faltan]] += 1
+        elif faltan < 0:   # los mínimos de 1 excedieron el total: se quitan de los más grandes
+            for j in np.argsort(-asignadas)[:-faltan]:
+                asignadas[j] -= 1
+        asignadas = np.minimum(asignadas, tamanos)
+
+        peso = self.pesos(len(X))
+        elegidas = [rng.choice(g, size=k, replace=False, p=peso[g] / peso[g].sum())
+                    for g, k in zip(grupos, asignadas) if k > 0]
+        return np.sort(np.concatenate(elegidas))
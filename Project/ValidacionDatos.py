@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from Project.Configuracion import cargar_config
+
+
+class ErrorValidacion(ValueError):
+    """El dataset crudo no cumple las reglas de ``data.validation``."""
+
+
+# ==========================
+# VALIDACIÓN DE DATOS CRUDOS
+# ==========================
+@dataclass
+class ValidadorDatos:
+    """Compuerta de calidad entre ``CargaDatasets`` y ``Preprocesamiento``.
+
+    Todas las verificaciones numéricas se calculan sobre una sola matriz en una pasada
+    vectorizada:
+    - Esquema: columnas requeridas presentes (falla inmediata, antes de convertir nada).
+    - Porcentaje de faltantes por columna (incluye valores no numéricos y fechas inválidas).
+    - Porcentaje de valores fuera de los rangos físicos configurados.
+    - Porcentaje de pasos de tiempo que retroceden (orden temporal).
+    """
+
+    required_columns: list[str]
+    datetime_column: str = "DateTime"
+    max_missing_percentage: float = 0.05
+    max_out_of_range_percentage: float = 0.05
+    max_unordered_percentage: float = 0.05
+    ranges: dict[str, tuple[float, float]] = field(default_factory=dict)
+
+    @classmethod
+    def desde_config(cls, config: dict | None = None) -> "ValidadorDatos":
+        config = config or cargar_config()
+        val = config["data"]["validation"]
+        return cls(
+            required_columns=list(val["required_columns"]),
+            datetime_column=val.get("datetime_column", "DateTime"),
+            max_missing_percentage=val.get("max_missing_percentage", 0.05),
+            max_out_of_range_percentage=val.get("max_out_of_range_percentage", 0.05),
+            max_unordered_percentage=val.get("max_unordered_percentage", 0.05),
+            ranges={c: tuple(r) for c, r in (val.get("ranges") or {}).items()},
+        )
+
+    @staticmethod
+    def _a_matriz(df: pd.DataFrame, cols: list[str]) -> np.ndarray:
+        """Convierte las columnas a una matriz float (coma decimal admitida, basura -> NaN)."""
+        bloque = df[cols]
+        obj = bloque.select_dtypes(exclude="number").columns
+        if len(obj):
+            bloque = bloque.copy()
+            bloque[obj] = bloque[obj].apply(
+                lambda s: pd.to_numeric(s.astype(str).str.replace(',', '.', regex=False).str.strip(),
+                                        errors='coerce')
+            )
+        return bloque.to_numpy(dtype=float)
+
+    @staticmethod
+    def a_fechas(s: pd.Series) -> np.ndarray:
+        dt = pd.to_datetime(s, format="%m/%d/%Y %H:%M", errors="coerce")
+        miss = dt.isna() & s.notna()
+        if miss.any():
+            dt.loc[miss] = pd.to_datetime(s[miss], errors="coerce", format="mixed")
+        return dt.to_numpy(dtype="datetime64[ns]")
+
+    def validar(self, df: pd.DataFrame) -> dict:
+        """Valida ``df`` y devuelve un reporte; lanza ``ErrorValidacion`` si alguna regla falla."""
+        faltan = [c for c in self.required_columns if c not in df.columns]
+        if faltan:
+            raise ErrorValidacion(f"Columnas requeridas ausentes: {faltan}")
+        if len(df) == 0:
+            raise ErrorValidacion("El dataset está vacío")
+
+        num = [c for c in self.required_columns if c != self.datetime_column]
+        X = self._a_matriz(df, num)
+        fechas = self.a_fechas(df[self.datetime_column])
+        nat = np.isnat(fechas)
+
+        faltantes = dict(zip([self.datetime_column, *num],
+                             np.r_[nat.mean(), np.isnan(X).mean(axis=0)].tolist()))
+
+        lo = np.array([self.ranges.get(c, (-np.inf, np.inf))[0] for c in num], dtype=float)
+        hi = np.array([self.ranges.get(c, (-np.inf, np.inf))[1] for c in num], dtype=float)
+        with np.errstate(invalid="ignore"):
+            fuera = ((X < lo) | (X > hi)).mean(axis=0)
+        fuera_rango = dict(zip(num, fuera.tolist()))
+
+        t = fechas[~nat].astype(np.int64)
+        desorden = float((np.diff(t) < 0).mean()) if t.size > 1 else 0.0
+
+        errores = [f"{c}: {p:.2%} faltantes (máx {self.max_missing_percentage:.2%})"
+                   for c, p in faltantes.items() if p > self.max_missing_percentage]
+        errores += [f"{c}: {p:.2%} fuera de rango {self.ranges[c]} (máx {self.max_out_of_range_percentage:.2%})"
+                    for c, p in fuera_rango.items() if p > self.max_out_of_range_percentage]
+        if desorden > self.max_unordered_percentage:
+            errores.append(f"{self.datetime_column}: {desorden:.2%} de pasos fuera de orden "
+                           f"(máx {self.max_unordered_percentage:.2%})")
+
+        if errores:
+            raise ErrorValidacion("Validación de datos fallida:\n  - " + "\n  - ".join(errores))
+
+        return {
+            "filas": len(df),
+            "faltantes": faltantes,
+            "fuera_de_rango": fuera_rango,
+            "pasos_fuera_de_orden": desorden,
+        }
@@ -34,6 +34,8 @@ warnings.filterwarnings('ignore')
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from Project.AlmacenParquet import AlmacenParquet
+
 # Evidently imports (v0.7.14)
 try:
     from evidently.core.report import Report
@@ -54,15 +56,19 @@ def print_header(message: str, char: str = "="):
     print(f"{char * width}\n")
 
 
-def load_reference_data(data_path: Path) -> pd.DataFrame:
+def load_reference_data(data_path: Path, desde=None, hasta=None) -> pd.DataFrame:
     """
     Load reference dataset (training data).
 
     This represents the "baseline" distribution against which we'll
-    compare new data.
+    compare new data. If ``data_path`` is a partitioned Parquet store,
+    only the partitions overlapping [desde, hasta] are read.
     """
     print("Loading reference dataset (training/validation data)...")
-    df = pd.read_csv(data_path)
+    if data_path.is_dir():
+        df = AlmacenParquet(data_path).leer(desde, hasta)
+    else:
+        df = pd.read_csv(data_path)
 
     # Normalize column names to match model expectations
     df.columns = [
@@ -365,7 +371,9 @@ def main():
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
     # Configuration
-    DATA_PATH = project_root / "data" / "processed" / "power_tetouan_city_processed.csv"
+    DATA_PATH = project_root / "data" / "processed" / "power_tetouan_city_processed"
+    if not AlmacenParquet(DATA_PATH).existe():
+        DATA_PATH = DATA_PATH.with_suffix(".csv")
     MODEL_PATH = project_root / "models" / "best_model_pipeline.joblib"
     OUTPUT_DIR = project_root / "reports" / "evidently"
     TARGET_COL = "PowerConsumption_Zone2"
@@ -376,12 +384,19 @@ def main():
     try:
         # Step 1: Load reference data
         print_header("Step 1: Loading Data", "-")
-        reference_df = load_reference_data(DATA_PATH)
+        if DATA_PATH.is_dir():
+            # Current window = last month: only that partition is read;
+            # the reference is the history before it
+            desde, hasta = AlmacenParquet(DATA_PATH).ultimo_mes()
+            validation_data = load_reference_data(DATA_PATH, desde, hasta)
+            reference_data = load_reference_data(DATA_PATH, hasta=desde - pd.Timedelta(1, "ns"))
+        else:
+            reference_df = load_reference_data(DATA_PATH)
 
-        # Split reference into training (reference) and validation (for comparison)
-        split_idx = int(len(reference_df) * 0.80)
-        reference_data = reference_df.iloc[:split_idx].copy()
-        validation_data = reference_df.iloc[split_idx:].copy()
+            # Split reference into training (reference) and validation (for comparison)
+            split_idx = int(len(reference_df) * 0.80)
+            reference_data = reference_df.iloc[:split_idx].copy()
+            validation_data = reference_df.iloc[split_idx:].copy()
 
         print(f"Reference data: {len(reference_data):,} rows")
         print(f"Validation data: {len(validation_data):,} rows")
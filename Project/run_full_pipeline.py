@@ -21,7 +21,6 @@ from pathlib import Path
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 import argparse
 import json
@@ -31,9 +30,17 @@ from joblib import load
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from Project.AlmacenParquet import AlmacenParquet
 from Project.CargaDatos import CargaDatasets
+from Project.Configuracion import cargar_config
 from Project.Preprocesamiento import Preprocesamiento
-from Project.Modelo import ModeloEspecial
+from Project.GrafoPreprocesamiento import GrafoPreprocesamiento
+from Project.ReprocesoIncremental import ReprocesoIncremental
+from Project.ValidacionDatos import ValidadorDatos
+from Project import ArtefactoModelo
+from Project.Modelo import ESTIMATORS, PROCESSED_COLUMNS, ZONES, ModeloEspecial
+from Project.ModeloOnline import ESTIMADORES_ONLINE, lotes_streaming
+from Project.ParadaTemprana import ParadaTemprana
 
 
 def print_header(message: str, char: str = "="):
@@ -61,9 +68,80 @@ def parse_args():
         default=None,
         help="Ruta de archivo completa para guardar el modelo entrenado. Si no se proporciona, usa 'models/best_model_pipeline.joblib'."
     )
+    parser.add_argument(
+        "--usar_grafo",
+        action="store_true",
+        help="Preprocesa con el grafo paralelo construido desde config/config.yaml."
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        help="Preprocesa, entrena y sirve en float32 (mitad de memoria que float64)."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reprocesa solo los días del crudo que cambiaron desde la última corrida (almacén Parquet)."
+    )
+    parser.add_argument(
+        "--comparar_estimadores",
+        action="store_true",
+        help="Antes de entrenar, reporta tiempo de ajuste y RMSE de cada estimador configurado."
+    )
+    parser.add_argument(
+        "--multizona",
+        action="store_true",
+        help="Entrena Zone1/Zone2/Zone3 en una sola corrida y un solo artefacto."
+    )
+    parser.add_argument(
+        "--reentrenar_incremental",
+        action="store_true",
+        help="Extiende el modelo guardado (warm start) con datos recientes en vez de reentrenar desde cero."
+    )
+    parser.add_argument(
+        "--parada_temprana",
+        action="store_true",
+        help="Detiene el boosting cuando el RMSE de la cola temporal de validación deja de mejorar."
+    )
+    parser.add_argument(
+        "--presupuesto_s",
+        type=float,
+        default=None,
+        help="Tiempo máximo de ajuste en segundos (implica --parada_temprana)."
+    )
+    parser.add_argument(
+        "--checkpoint_cada",
+        type=int,
+        default=None,
+        help="Guarda el ensamble parcial cada N árboles/iteraciones y retoma una corrida interrumpida."
+    )
+    parser.add_argument(
+        "--perfilar",
+        action="store_true",
+        help="Mide tiempo de ajuste/predicción, pico de RSS, hilos y tamaño del artefacto (outputs/train_profile.json)."
+    )
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Entrena en modo online: partial_fit sobre lotes en streaming del segmento de entrenamiento."
+    )
+    parser.add_argument(
+        "--exportar_onnx",
+        action="store_true",
+        help="Exporta también el pipeline a ONNX (.onnx junto al .joblib) y verifica paridad con ONNX Runtime."
+    )
+    parser.add_argument(
+        "--compilar",
+        action="store_true",
+        help="Guarda el ensamble en arreglos planos (.arboles junto al .joblib); app/ lo sirve mapeado en memoria."
+    )
     return parser.parse_args()
 
-def main(model_path_override: str = None):
+def main(model_path_override: str = None, usar_grafo: bool = False, float32: bool = False,
+         incremental: bool = False, comparar_estimadores: bool = False, multizona: bool = False,
+         reentrenar_incremental: bool = False, exportar_onnx: bool = False,
+         parada_temprana: bool = False, presupuesto_s: float = None, checkpoint_cada: int = None,
+         perfilar: bool = False, online: bool = False, compilar: bool = False):
     """Execute the full ML pipeline."""
 
     print_header("MLOps Pipeline - Equipo 43", "=")
@@ -76,6 +154,8 @@ def main(model_path_override: str = None):
     FILENAME_RAW = "power_tetouan_city_modified.csv"
     FILENAME_PROCESSED = "power_tetouan_city_processed.csv"
 
+    DTYPE = "float32" if float32 else "float64"
+
     # Lógica para determinar la RUTA FINAL del modelo
     if model_path_override:
         MODEL_PATH = Path(model_path_override)
@@ -101,23 +181,54 @@ def main(model_path_override: str = None):
         print(f"[OK] Loaded dataset: {df_raw.shape[0]:,} rows × {df_raw.shape[1]} columns")
         print(f"[OK] Source: {DATA_RAW_DIR / FILENAME_RAW}")
 
+        reporte = ValidadorDatos.desde_config().validar(df_raw)
+        peor = max(reporte["faltantes"], key=reporte["faltantes"].get)
+        print(f"[OK] Validation passed (max missing: {peor} {reporte['faltantes'][peor]:.2%})")
+
         # =================================================================
         # STEP 2: DATA PREPROCESSING
         # =================================================================
         print_step(2, "Preprocessing Data")
 
-        print("  -> Executing preprocessing pipeline...")
-        df_clean = Preprocesamiento.ejecutar(
-            df_raw,
-            ventana_mediana=25,
-            eliminar_datetime=True
-        )
+        # DateTime is kept until the partitioned Parquet store is written
+        almacen = AlmacenParquet(DATA_PROCESSED_DIR / Path(FILENAME_PROCESSED).stem)
+        if incremental:
+            print("  -> Reprocessing changed days only...")
+            dias = ReprocesoIncremental(almacen, ventana_mediana=25, dtype=DTYPE).actualizar(df_raw)
+            print(f"  -> {len(dias)} day(s) reprocessed")
+            df_full = almacen.leer(eliminar_datetime=False)
+        elif usar_grafo:
+            print("  -> Executing config-driven preprocessing graph...")
+            config = cargar_config()
+            config["preprocessing"]["drop_datetime"] = False
+            config["preprocessing"]["dtype"] = DTYPE
+            df_full = GrafoPreprocesamiento.correr(df_raw, config)
+        else:
+            print("  -> Executing preprocessing pipeline...")
+            df_full = Preprocesamiento.ejecutar(
+                df_raw,
+                ventana_mediana=25,
+                eliminar_datetime=False,
+                dtype=DTYPE
+            )
+        df_clean = df_full.drop(columns=["DateTime"])
 
         # Save processed data
         processed_path = DATA_PROCESSED_DIR / FILENAME_PROCESSED
         df_clean.to_csv(processed_path, index=False)
+        parquet_path = almacen.carpeta if incremental else almacen.escribir(df_full)
         print(f"\n[OK] Preprocessing complete: {df_clean.shape[0]:,} rows × {df_clean.shape[1]} columns")
         print(f"[OK] Saved to: {processed_path}")
+        print(f"[OK] Partitioned Parquet (year/month): {parquet_path}")
+
+        # app/api.py builds only the base features; a model trained on more columns
+        # (graph season/lags/rolling stats) must not replace the served artifact
+        extra_features = [c for c in df_clean.columns if c not in PROCESSED_COLUMNS]
+        if extra_features and not model_path_override:
+            MODEL_PATH = MODEL_DIR / "grafo_model_pipeline.joblib"
+            print(f"\n  [WARN] {len(extra_features)} feature(s) the API does not build "
+                  f"({', '.join(extra_features[:5])}{', ...' if len(extra_features) > 5 else ''}); "
+                  f"model will be saved to {MODEL_PATH}, not the served artifact")
 
         # Display info
         print(f"\n  Missing values after preprocessing:")
@@ -132,29 +243,91 @@ def main(model_path_override: str = None):
         # =================================================================
         print_step(3, "Training Machine Learning Model")
 
-        # Initialize model trainer
+        # Initialize model trainer (estimator and artifact settings from config.models)
+        config = cargar_config()
+        config_modelos = config["models"]
+        parada = None
+        if parada_temprana or presupuesto_s is not None:
+            parada = ParadaTemprana.desde_config(config_modelos["training"].get("early_stopping") or {})
+            if presupuesto_s is not None:
+                parada.presupuesto_s = presupuesto_s
         modelo = ModeloEspecial(
             model_path=str(MODEL_PATH),
             exp="Full_Pipeline_Execution",
-            run_nm=f"AutoRun_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        )
-
-        # Define the best model (based on previous experiments)
-        print("  -> Using Gradient Boost Regressor")
-        print("     - n_estimators: 600")
-        print("     - learning_rate: 0.1")
-        print("     - max_depth: 5")
-        print("     - min_samples_split: 5")
-        print("     - min_samples_leaf: 3")
-        print("     - random_state: 42")
-
-        rf_model = GradientBoostingRegressor(
-            n_estimators=600, learning_rate=0.1, max_depth=5,
-            min_samples_split=5, min_samples_leaf=3, random_state=42
+            run_nm=f"AutoRun_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            dtype=DTYPE,
+            target=ZONES if multizona else "PowerConsumption_Zone2",
+            compress=config_modelos["artifact"]["compress"],
+            mmap=config_modelos["artifact"]["mmap"],
+            early_stopping=parada,
+            checkpoint_every=checkpoint_cada,
+            n_jobs=config.get("resources", {}).get("n_jobs", -1)
         )
-
-        print(f"\n  -> Training model...")
-        x_test, y_test = modelo.train_and_save(df=df_clean, model=rf_model)
+        if multizona:
+            print(f"  -> Multi-zone mode: {', '.join(ZONES)} (one fit per zone, in parallel)")
+
+        # Estimator from config (models.training)
+        training = config_modelos["training"]
+        rf_model = ModeloEspecial.build_estimator(training)
+        print(f"  -> Using {type(rf_model).__name__} ({training['estimator']})")
+        for param, valor in (training.get(training["estimator"]) or {}).items():
+            print(f"     - {param}: {valor}")
+
+        if comparar_estimadores:
+            print("\n  -> Comparing configured estimators (same temporal split)...")
+            comparacion = modelo.compare_estimators(
+                df_clean,
+                {nombre: ModeloEspecial.build_estimator({**training, "estimator": nombre})
+                 for nombre in ESTIMATORS}
+            )
+            print(comparacion.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+            comparacion_path = Path("outputs") / "estimator_comparison.json"
+            comparacion_path.parent.mkdir(parents=True, exist_ok=True)
+            comparacion.to_json(comparacion_path, orient="records", indent=4)
+            print(f"  [OK] Comparison saved to: {comparacion_path}")
+
+        if online:
+            config_online = config_modelos["online"]
+            nombre_online = config_online["estimator"]
+            modelo_online = ESTIMADORES_ONLINE[nombre_online](**(config_online.get(nombre_online) or {}))
+            print(f"\n  -> Online training with {type(modelo_online).__name__} "
+                  f"({config_online['batch_rows']} rows per update)...")
+            corte = int(len(df_clean) * modelo.train_ratio)
+            reporte_online = modelo.train_online(
+                lotes_streaming(df_clean.iloc[:corte], config_online["batch_rows"]),
+                modelo_online, save_every=config_online["save_every"],
+                warmup_rows=config_online.get("warmup_rows", 0)
+            )
+            print(f"  [OK] {reporte_online['batches']:,} updates, {reporte_online['update_time_ms']:.1f} ms each, "
+                  f"prequential RMSE {reporte_online['rmse_prequential']:.3f}")
+            _, _, x_test, y_test = modelo.split(df_clean)
+        elif reentrenar_incremental and MODEL_PATH.exists():
+            print(f"\n  -> Warm-starting previous model with recent data...")
+            x_test, y_test, reporte_reentreno = modelo.retrain_incremental(df_clean)
+            print(f"  [OK] {reporte_reentreno['fit_time_s']:.1f}s, RMSE "
+                  f"{reporte_reentreno['rmse_previous']:.3f} -> {reporte_reentreno['rmse_new']:.3f} "
+                  f"({'accepted' if reporte_reentreno['accepted'] else 'rejected'})")
+            reentreno_path = Path("outputs") / "retrain_report.json"
+            reentreno_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(reentreno_path, "w") as f:
+                json.dump(reporte_reentreno, f, indent=4)
+        else:
+            print(f"\n  -> Training model...")
+            x_test, y_test = modelo.train_and_save(df=df_clean, model=rf_model, profile=perfilar)
+            if modelo.profile_:
+                perfil = modelo.profile_
+                print(f"  [OK] Profile: fit {perfil['fit_time_s']:.1f}s, predict "
+                      f"{perfil['predict_us_per_row']:.1f} us/row, peak RSS {perfil['peak_rss_mb']:.0f} MB, "
+                      f"{perfil['threads_max']} threads, artifact {perfil['artifact_size_mb']:.1f} MB")
+            if modelo.early_stopping_report_:
+                for target, reporte in modelo.early_stopping_report_.items():
+                    print(f"  [OK] {target}: {reporte['n_iter']}/{reporte['max_iter']} iterations "
+                          f"(best {reporte['best_iter']}, kept {reporte['model_iter']}, stop: {reporte['stop_reason']}, "
+                          f"val RMSE {reporte['val_rmse']:.3f})")
+                parada_path = Path("outputs") / "early_stopping.json"
+                parada_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(parada_path, "w") as f:
+                    json.dump(modelo.early_stopping_report_, f, indent=4)
 
         print(f"\n[OK] Model training complete!")
         print(f"[OK] Model saved to: {MODEL_PATH}")
@@ -168,6 +341,19 @@ def main(model_path_override: str = None):
         # Make predictions on test set
         y_pred = modelo.predict(x_test)
 
+        if compilar:
+            arboles_path = ArtefactoModelo.ruta_arboles(MODEL_PATH)
+            compilado = modelo.compile_model(path=str(arboles_path), X_sample=x_test)
+            print(f"[OK] Compiled tree arrays saved to: {arboles_path} "
+                  f"(serves batches of up to {compilado.max_filas} rows)")
+
+        if exportar_onnx:
+            from Project.ModeloONNX import PredictorONNX
+            onnx_path = modelo.export_onnx()
+            y_onnx = PredictorONNX(onnx_path).predict(x_test)
+            diferencia = np.max(np.abs(y_onnx - y_pred) / np.maximum(np.abs(y_pred), 1.0))
+            print(f"[OK] ONNX parity on test set: max relative difference {diferencia:.2e}")
+
         # Calculate metrics
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
         r2 = r2_score(y_test, y_pred)
@@ -181,6 +367,9 @@ def main(model_path_override: str = None):
         print(f"  MAPE (Mean Absolute % Error):    {mape:>12.2f} %")
         print(f"  R²   (Coefficient of Determination): {r2:>8.4f}")
         print("  " + "-" * 50)
+        if modelo.multi_target:
+            for j, zona in enumerate(modelo.targets):
+                print(f"  RMSE {zona}: {np.sqrt(mean_squared_error(y_test[:, j], y_pred[:, j])):>12.2f} kW")
 
         # Performance evaluation against targets
         print("\n  Performance vs. Target Metrics:")
@@ -230,6 +419,10 @@ def main(model_path_override: str = None):
         
         print(f"✔ Parámetros del modelo ACTUAL guardados en: {OUTPUT_DIR / 'actual_params.json'}")
 
+        # Explicit flush: the atexit wait is bounded and could cut a slow artifact upload
+        print("\n  -> Waiting for MLflow uploads...")
+        ModeloEspecial.tracker().esperar()
+
         # =================================================================
         # STEP 5: PIPELINE SUMMARY
         # =================================================================
@@ -262,5 +455,11 @@ def main(model_path_override: str = None):
 
 if __name__ == "__main__":
     args = parse_args()
-    exit_code = main(model_path_override=args.model_path_override)
+    exit_code = main(model_path_override=args.model_path_override, usar_grafo=args.usar_grafo,
+                     float32=args.float32, incremental=args.incremental,
+                     comparar_estimadores=args.comparar_estimadores, multizona=args.multizona,
+                     reentrenar_incremental=args.reentrenar_incremental,
+                     exportar_onnx=args.exportar_onnx, parada_temprana=args.parada_temprana,
+                     presupuesto_s=args.presupuesto_s, checkpoint_cada=args.checkpoint_cada,
+                     perfilar=args.perfilar, online=args.online, compilar=args.compilar)
     sys.exit(exit_code)
@@ -6,17 +6,19 @@ from sklearn.base import RegressorMixin
 import pandas as pd
 import numpy as np
 import joblib
+import hashlib
 import os
 from typing import Tuple
-import mlflow
-import mlflow.sklearn
 from sklearn.metrics import mean_squared_error, r2_score
 from datetime import datetime
-import dagshub
+from PredictorCompilado import PredictorCompilado
 
 class ModeloEspecial:
     """
     Handles training, saving, loading, and predicting for a production environment.
+
+    Serving only needs load_model/predict: mlflow and dagshub are imported inside
+    train_and_save so they stay out of the API's cold start.
     """
     
     def __init__(
@@ -41,6 +43,10 @@ class ModeloEspecial:
         
         # Initialize pipeline as None
         self.pipeline_ = None 
+        # Compiled tree arrays (<model>.arboles) for small batches, see load_model
+        self.compiled_ = None
+        # Zones predicted by the loaded model (multi-zone artifacts record theirs)
+        self.targets = [target]
 
         
 
@@ -61,6 +67,10 @@ class ModeloEspecial:
         2. Fits the full pipeline (preprocessor + model).
         3. Saves the fitted pipeline to disk.
         """
+        # Training-only dependencies (lazy, see class docstring)
+        import mlflow
+        import dagshub
+
         # Initial set for MLFlow
         dagshub.init(repo_owner='garc1a0scar', repo_name='mna-mlops-team43', mlflow=True)
         mlflow.set_tracking_uri("https://dagshub.com/garc1a0scar/mna-mlops-team43.mlflow")
@@ -135,21 +145,64 @@ class ModeloEspecial:
         return x_test, y_test
     
     def load_model(self):
-        """Loads the fitted pipeline from disk."""
-        if os.path.exists(self.model_path):
-            self.pipeline_ = joblib.load(self.model_path)
-            print(f"Model successfully loaded from: {self.model_path}")
+        """Loads the fitted pipeline from disk.
+
+        Uncompressed artifacts are memory-mapped read-only, so server workers share
+        one page-cached copy of their arrays (compressed ones load normally).
+        A .onnx path (see Project/ModeloONNX.py) is served with ONNX Runtime on CPU.
+        If a compiled ``<model>.arboles`` (ModeloEspecial.compile_model) of this very
+        artifact (SHA-256 recorded at save time) sits next to it, it serves batches of up
+        to its ``max_filas`` rows: its flat tree arrays stay mapped and shared, while
+        sklearn's GradientBoosting/RandomForest trees are copied into every worker on
+        load. The pipeline is then loaded on the first larger batch, where it is faster.
+        Predictions are bit-for-bit the pipeline's either way.
+        """
+        trees = self.model_path + ".arboles"
+        self.pipeline_, self.compiled_ = None, None
+        if os.path.exists(self.model_path) and self.model_path.endswith(".onnx"):
+            from ModeloONNX import PredictorONNX  # only the ONNX backend needs onnxruntime
+
+            self.pipeline_ = PredictorONNX(self.model_path)
+            self.targets = self.pipeline_.targets or self.targets
+            print(f"ONNX model successfully loaded from: {self.model_path}")
+            return True
+        elif os.path.exists(self.model_path):
+            if os.path.exists(trees):
+                compiled = PredictorCompilado.cargar(trees)
+                with open(self.model_path, 'rb') as f:
+                    digest = hashlib.file_digest(f, "sha256").hexdigest()
+                if compiled.huella_origen == digest:
+                    self.compiled_ = compiled
+                    self.targets = list(compiled.targets or self.targets)
+                    print(f"Compiled model successfully loaded from: {trees}")
+                    return True
+            self._load_pipeline()
+            self.targets = list(getattr(self.pipeline_, 'targets_', None) or self.targets)
             return True
         else:
             print(f"Error: Model file not found at {self.model_path}")
             return False
 
+    def _load_pipeline(self):
+        """Loads the joblib pipeline, memory-mapped when uncompressed."""
+        with open(self.model_path, 'rb') as f:
+            compressed = f.read(1) != b'\x80'  # uncompressed joblib = raw pickle
+        self.pipeline_ = joblib.load(self.model_path, mmap_mode=None if compressed else 'r')
+        print(f"Model successfully loaded from: {self.model_path}")
+
     def predict(self, X_new: pd.DataFrame) -> np.ndarray:
         """
         Performs a prediction using the loaded, trained pipeline.
         Must call load_model() first.
         """
-        if self.pipeline_ is None:
+        if self.pipeline_ is None and self.compiled_ is None:
             raise RuntimeError("Model is not loaded. Please call load_model() first.")
-            
+
+        if self.compiled_ is not None:
+            if len(X_new) <= self.compiled_.max_filas:
+                return self.compiled_.predict(X_new)
+            if self.pipeline_ is None:
+                self._load_pipeline()
+
+        # ONNX (PredictorONNX) keeps Pipeline.predict's shape: (n,) or (n, zones)
         return self.pipeline_.predict(X_new)
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Serving copy of Project/ModeloONNX.py (PredictorONNX only; export stays in Project).
+
+Keep in sync with Project/ModeloONNX.py.
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+class PredictorONNX:
+    """Predice con ONNX Runtime (CPU) a partir del archivo de ``exportar_onnx``.
+
+    Solo necesita ``onnxruntime``, ``numpy`` y ``pandas``. La salida es float64 con la
+    misma forma que ``Pipeline.predict``: (n,) para un target, (n, zonas) para varios.
+    """
+
+    def __init__(self, ruta: str | Path, n_hilos: int | None = None):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        if n_hilos:
+            opciones.intra_op_num_threads = n_hilos
+        self.sesion = ort.InferenceSession(str(ruta), opciones, providers=["CPUExecutionProvider"])
+        self.columnas = [entrada.name for entrada in self.sesion.get_inputs()]
+        self.salida = self.sesion.get_outputs()[0].name
+        targets = self.sesion.get_modelmeta().custom_metadata_map.get("targets")
+        self.targets = targets.split(",") if targets else None
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        y = self.sesion.run([self.salida], {c: X[[c]].to_numpy(np.float32) for c in self.columnas})[0]
+        y = y.astype(np.float64)
+        return y.ravel() if y.shape[1] == 1 else y
@@ -0,0 +1,96 @@
+"""
+Serving copy of Project/PredictorCompilado.py (prediction only).
+
+The container ships only app/, so the compiled ensemble saved by
+ModeloEspecial.compile_model (``<model>.arboles``, plain NumPy arrays) is loaded
+here without importing Project. Keep in sync with Project/PredictorCompilado.py.
+"""
+from dataclasses import dataclass
+import joblib
+import numpy as np
+import pandas as pd
+
+# Filas por bloque al predecir: la matriz (árboles x filas) de nodos activos cabe en caché
+FILAS_BLOQUE = 32
+
+
+@dataclass
+class ArbolesPlanos:
+    """Ensamble de árboles concatenado en arreglos contiguos (ver Project/PredictorCompilado.py)."""
+
+    atributo: np.ndarray
+    umbral: np.ndarray
+    nan_izq: np.ndarray
+    hijos: np.ndarray
+    valor: np.ndarray
+    raices: np.ndarray
+    profundidad: int
+    base: float
+    dtype_entrada: str
+    promedio: bool = False
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=self.dtype_entrada)
+        n_arboles, n_cols = len(self.raices), X.shape[1]
+        salida = np.empty(len(X))
+        for inicio in range(0, len(X), FILAS_BLOQUE):
+            bloque = X[inicio:inicio + FILAS_BLOQUE]
+            plano, n = bloque.ravel(), len(bloque)
+            desfase_fila = np.arange(n, dtype=np.intp) * n_cols
+            con_nan = np.isnan(bloque).any()
+
+            nodo = np.repeat(self.raices[:, None], n, axis=1)   # (árboles, filas)
+            for _ in range(self.profundidad):
+                x = plano.take(self.atributo.take(nodo) + desfase_fila)
+                derecha = x > self.umbral.take(nodo)
+                if con_nan:
+                    derecha = np.where(np.isnan(x), ~self.nan_izq.take(nodo), derecha)
+                nodo = self.hijos.take(2 * nodo + derecha)
+
+            sumandos = np.empty((n_arboles + 1, n))
+            sumandos[0] = self.base
+            self.valor.take(nodo, out=sumandos[1:])
+            salida[inicio:inicio + n] = np.add.accumulate(sumandos, axis=0)[-1]
+        if self.promedio:
+            salida /= n_arboles
+        return salida
+
+
+@dataclass
+class PredictorCompilado:
+    """Preprocesamiento (mediana + MinMaxScaler) + ensambles en arreglos planos, mapeados en memoria."""
+
+    columnas: list[str]
+    idx_num: np.ndarray
+    idx_resto: np.ndarray
+    dtype: str
+    mediana: np.ndarray
+    escala: np.ndarray
+    minimo: np.ndarray
+    ensambles: list[ArbolesPlanos]
+    targets: list[str] | None = None
+    max_filas: int = 32    # lotes más grandes van por el pipeline de joblib
+    huella_origen: str | None = None  # SHA-256 del .joblib del que se compiló
+
+    @classmethod
+    def cargar(cls, ruta: str, mmap: bool = True) -> "PredictorCompilado":
+        campos = joblib.load(ruta, mmap_mode="r" if mmap else None)
+        return cls(**{**campos, 'ensambles': [ArbolesPlanos(**e) for e in campos['ensambles']]})
+
+    def transformar(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.columnas].to_numpy(dtype=np.float64)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+        num = X[:, self.idx_num].astype(self.dtype)
+        faltantes = np.isnan(num)
+        if faltantes.any():
+            num[faltantes] = np.broadcast_to(self.mediana.astype(self.dtype), num.shape)[faltantes]
+        num *= self.escala
+        num += self.minimo
+        return np.hstack([num, X[:, self.idx_resto].astype(self.dtype)])
+
+    def predict(self, X) -> np.ndarray:
+        Xt = self.transformar(X)
+        salidas = [e.predict(Xt) for e in self.ensambles]
+        return salidas[0] if len(salidas) == 1 else np.column_stack(salidas)
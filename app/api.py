@@ -18,7 +18,8 @@ from Modelo import ModeloEspecial
 # ----------------------------------------------------
 # 1. Initialize Model
 # ----------------------------------------------------
-MODEL_PATH = "best_model_pipeline.joblib" # <--- **UPDATE THIS PATH** to your saved model file
+# A .onnx file (run_full_pipeline.py --exportar_onnx) is served with ONNX Runtime
+MODEL_PATH = os.getenv("MODEL_PATH", "best_model_pipeline.joblib") # <--- **UPDATE THIS PATH** to your saved model file
 model_instance = ModeloEspecial(model_path=MODEL_PATH)
 
 if not model_instance.load_model():
@@ -57,7 +58,7 @@ app.add_middleware(
 # ----------------------------------------------------
 # 4. Helper Function for Time Features
 # ----------------------------------------------------
-# Replicating the logic of Preprocesamiento._features_tiempo for a single timestamp
+# Replicating the logic of Preprocesamiento.features_tiempo for a single timestamp
 def create_time_features(dt: datetime) -> pd.Series:
     """Extracts required time features from a single datetime object."""
     dt_series = pd.Series([dt])
@@ -78,7 +79,8 @@ def create_time_features(dt: datetime) -> pd.Series:
 @app.post("/predict", tags=["Prediction"])
 def predict_power_consumption(input_data: PredictionInput):
     """
-    Returns the predicted power consumption for Zone 2.
+    Returns the predicted power consumption for Zone 2. A multi-zone model
+    (run_full_pipeline.py --multizona) also returns every zone it predicts.
     """
     try:
         # 1. Prepare base features DataFrame
@@ -121,11 +123,17 @@ def predict_power_consumption(input_data: PredictionInput):
         X_new = X_new[expected_cols]
 
 
-        # 5. Make Prediction
-        prediction = model_instance.predict(X_new)
-        
+        # 5. Make Prediction: (1,) for one zone, (1, zones) for a multi-zone model
+        prediction = np.asarray(model_instance.predict(X_new)).reshape(len(X_new), -1)[0]
+
         # 6. Return Result
-        return {"predicted_power_consumption_zone2": float(prediction[0])}
+        if len(prediction) == 1:
+            return {"predicted_power_consumption_zone2": float(prediction[0])}
+        zones = {target: float(value) for target, value in zip(model_instance.targets, prediction)}
+        return {
+            "predicted_power_consumption_zone2": zones.get("PowerConsumption_Zone2"),
+            "predicted_power_consumption": zones,
+        }
         
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=f"Model Error: {str(e)}")
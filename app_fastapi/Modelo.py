@@ -8,15 +8,15 @@ import numpy as np
 import joblib
 import os
 from typing import Tuple
-import mlflow
-import mlflow.sklearn
 from sklearn.metrics import mean_squared_error, r2_score
 from datetime import datetime
-import dagshub
 
 class ModeloEspecial:
     """
     Handles training, saving, loading, and predicting for a production environment.
+
+    Serving only needs load_model/predict: mlflow and dagshub are imported inside
+    train_and_save so they stay out of the API's cold start.
     """
     
     def __init__(
@@ -61,6 +61,10 @@ class ModeloEspecial:
         2. Fits the full pipeline (preprocessor + model).
         3. Saves the fitted pipeline to disk.
         """
+        # Training-only dependencies (lazy, see class docstring)
+        import mlflow
+        import dagshub
+
         # Initial set for MLFlow
         dagshub.init(repo_owner='garc1a0scar', repo_name='mna-mlops-team43', mlflow=True)
         mlflow.set_tracking_uri("https://dagshub.com/garc1a0scar/mna-mlops-team43.mlflow")
@@ -135,9 +139,15 @@ class ModeloEspecial:
         return x_test, y_test
     
     def load_model(self):
-        """Loads the fitted pipeline from disk."""
+        """Loads the fitted pipeline from disk.
+
+        Uncompressed artifacts are memory-mapped read-only, so server workers share
+        one page-cached copy of their arrays (compressed ones load normally).
+        """
         if os.path.exists(self.model_path):
-            self.pipeline_ = joblib.load(self.model_path)
+            with open(self.model_path, 'rb') as f:
+                compressed = f.read(1) != b'\x80'  # uncompressed joblib = raw pickle
+            self.pipeline_ = joblib.load(self.model_path, mmap_mode=None if compressed else 'r')
             print(f"Model successfully loaded from: {self.model_path}")
             return True
         else:
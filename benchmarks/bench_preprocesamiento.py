@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Preprocesamiento a distintas escalas.
+
+Genera datasets crudos sintéticos con tasas de corrupción similares al CSV modificado
+(fechas nulas o con otro formato, decimales con coma, NaN, outliers, duplicados y
+columna mixta), mide cada paso de ``Preprocesamiento`` y el ``ejecutar`` completo,
+agrega el resultado a un historial JSON y marca regresiones contra la corrida anterior
+de la misma escala.
+
+Uso:
+    python benchmarks/bench_preprocesamiento.py                      # 50k filas
+    python benchmarks/bench_preprocesamiento.py --filas 50000 1000000 10000000
+    python benchmarks/bench_preprocesamiento.py --umbral 0.15 --fallar
+
+Salida:
+    reports/benchmarks/preprocesamiento_history.json
+
+Author: Equipo 43
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from Project.Preprocesamiento import Preprocesamiento
+
+HISTORIAL = project_root / "reports" / "benchmarks" / "preprocesamiento_history.json"
+
+# Tasas aproximadas observadas en power_tetouan_city_modified.csv
+TASAS = {
+    "fecha_nula": 0.009,
+    "fecha_otro_formato": 0.005,
+    "numerico_nulo": 0.015,
+    "numerico_coma": 0.005,
+    "outlier": 0.005,
+    "duplicado": 0.02,
+}
+
+COLUMNAS = {
+    'Temperature': (18.8, 5.8),
+    'Humidity': (68.3, 15.6),
+    'Wind Speed': (1.96, 2.35),
+    'general diffuse flows': (182.7, 264.4),
+    'diffuse flows': (75.0, 124.2),
+    'Zone 1 Power Consumption': (32345.0, 7130.0),
+    'Zone 2  Power Consumption': (21043.0, 5201.0),
+    'Zone 3  Power Consumption': (17835.0, 6622.0),
+}
+
+
+def generar_crudo(filas: int, seed: int = 0) -> pd.DataFrame:
+    """Dataset crudo sintético con la estructura y corrupción del CSV modificado."""
+    rng = np.random.default_rng(seed)
+    base = int(filas / (1 + TASAS["duplicado"]))
+    fechas = pd.date_range("2017-01-01", periods=base, freq="10min")
+
+    texto = pd.Series(fechas.strftime("%m/%d/%Y %H:%M"), dtype=object)
+    otro = rng.random(base) < TASAS["fecha_otro_formato"]
+    texto[otro] = fechas[otro].strftime("%Y-%m-%d %H:%M:%S")
+    texto[rng.random(base) < TASAS["fecha_nula"]] = np.nan
+
+    df = pd.DataFrame({"DateTime": texto})
+    for col, (media, desv) in COLUMNAS.items():
+        v = np.abs(rng.normal(media, desv, base))
+        v[rng.random(base) < TASAS["outlier"]] *= 10
+        v[rng.random(base) < TASAS["numerico_nulo"]] = np.nan
+        df[col] = v
+    # Algunas columnas llegan como texto con coma decimal
+    for col in ('Humidity', 'Zone 2  Power Consumption'):
+        coma = rng.random(base) < TASAS["numerico_coma"]
+        s = df[col].astype(object)
+        s[coma] = df.loc[coma, col].map(lambda x: f"{x:.3f}".replace(".", ","))
+        df[col] = s
+    df["mixed_type_col"] = rng.choice(["a", "1", "2.5", None], base)
+
+    duplicados = df.sample(n=filas - base, random_state=seed, replace=True)
+    return pd.concat([df, duplicados]).sort_index(kind="stable").reset_index(drop=True)
+
+
+def medir_pasos(df_crudo: pd.DataFrame, ventana_mediana: int = 25) -> dict:
+    """Tiempo (s) de cada paso de ``Preprocesamiento.ejecutar`` en orden."""
+    pasos = [
+        ("tranformar_numerica", lambda d: Preprocesamiento.tranformar_numerica(d)),
+        ("drop_col_si_existe", lambda d: Preprocesamiento.drop_col_si_existe(d, "mixed_type_col")),
+        ("limpiar_parsear_datetime", lambda d: Preprocesamiento.limpiar_parsear_datetime(d, "DateTime")),
+        ("imputar_numericos_mediana", lambda d: Preprocesamiento.imputar_numericos_mediana(d)),
+        ("outliers_mediana_rodante",
+         lambda d: Preprocesamiento.outliers_mediana_rodante(d, "DateTime", ventana_mediana)),
+        ("features_tiempo", lambda d: Preprocesamiento.features_tiempo(d, "DateTime")),
+        ("finalizar", lambda d: Preprocesamiento.finalizar(d, "DateTime", True)),
+    ]
+    tiempos = {}
+    df = df_crudo.copy()
+    for nombre, paso in pasos:
+        t0 = time.perf_counter()
+        df = paso(df)
+        tiempos[nombre] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    Preprocesamiento.ejecutar(df_crudo, ventana_mediana=ventana_mediana, eliminar_datetime=True)
+    tiempos["ejecutar"] = time.perf_counter() - t0
+    return tiempos
+
+
+def medir(filas: int, repeticiones: int) -> dict:
+    """Mejor tiempo (mínimo) de cada paso sobre ``repeticiones`` corridas."""
+    print(f"\n>>> {filas:,} filas: generando dataset...")
+    df = generar_crudo(filas)
+    mejores = {}
+    for i in range(repeticiones):
+        for paso, t in medir_pasos(df).items():
+            mejores[paso] = min(t, mejores.get(paso, np.inf))
+    for paso, t in mejores.items():
+        print(f"  {paso:<28} {t:>9.3f} s")
+    return mejores
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def detectar_regresiones(historial: list, corrida: dict, umbral: float) -> list:
+    """Compara con la última corrida previa de la misma escala; devuelve pasos más lentos que ``1 + umbral``."""
+    regresiones = []
+    for filas, tiempos in corrida["resultados"].items():
+        previa = next((c["resultados"][filas] for c in reversed(historial)
+                       if filas in c["resultados"]), None)
+        if previa is None:
+            continue
+        for paso, t in tiempos.items():
+            if paso in previa and previa[paso] > 0 and t > previa[paso] * (1 + umbral):
+                regresiones.append(f"{filas} filas / {paso}: {previa[paso]:.3f}s -> {t:.3f}s "
+                                   f"(+{t / previa[paso] - 1:.0%})")
+    return regresiones
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de Preprocesamiento por escala de datos.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[50_000],
+                        help="Escalas a medir (p. ej. 50000 1000000 10000000).")
+    parser.add_argument("--repeticiones", type=int, default=3,
+                        help="Corridas por escala; se reporta el mínimo.")
+    parser.add_argument("--umbral", type=float, default=0.20,
+                        help="Aumento relativo de tiempo considerado regresión.")
+    parser.add_argument("--historial", type=Path, default=HISTORIAL,
+                        help="Archivo JSON con el historial de corridas.")
+    parser.add_argument("--fallar", action="store_true",
+                        help="Devuelve código 1 si hay regresiones.")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    corrida = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "resultados": {str(n): medir(n, args.repeticiones) for n in args.filas},
+    }
+
+    historial = json.loads(args.historial.read_text()) if args.historial.exists() else []
+    regresiones = detectar_regresiones(historial, corrida, args.umbral)
+
+    args.historial.parent.mkdir(parents=True, exist_ok=True)
+    args.historial.write_text(json.dumps(historial + [corrida], indent=2))
+    print(f"\n[OK] Resultados agregados a: {args.historial}")
+
+    if regresiones:
+        print(f"\n[WARNING] Regresiones > {args.umbral:.0%}:")
+        for r in regresiones:
+            print(f"  - {r}")
+        return 1 if args.fallar else 0
+
+    print("[OK] Sin regresiones respecto a la corrida anterior")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,94 @@
+"""
+Arranque en frío de la API de app/ (import de api.py + carga del modelo) frente a una línea
+base que solo importa sus dependencias de servicio y carga el mismo modelo.
+- pytest -q tests/test_api.py
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+
+from Project.Configuracion import cargar_config
+from Project.Modelo import ZONES, ModeloEspecial
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+MEDIR = """
+import json, sys, time
+import psutil
+inicio = time.perf_counter()
+{codigo}
+print(json.dumps({{
+    "segundos": time.perf_counter() - inicio,
+    # RSS propio (ru_maxrss heredaría el pico del proceso de pytest)
+    "rss_mb": psutil.Process().memory_info().rss / 2**20,
+    "modulos": sorted(m for m in ("mlflow", "dagshub") if m in sys.modules),
+}}))
+"""
+
+API = "import api"
+# Costo inevitable de servir: stack de la API + deserializar el modelo
+BASE = "import fastapi, pydantic, pandas, sklearn, joblib; joblib.load('best_model_pipeline.joblib')"
+
+def _medir(codigo: str) -> dict:
+    salida = subprocess.run([sys.executable, "-W", "ignore", "-c", MEDIR.format(codigo=codigo)], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+def test_api_arranque_frente_a_linea_base():
+    """La API no carga dependencias de entrenamiento ni agrega costo relevante sobre la línea base.
+
+    Se compara contra la línea base medida en la misma máquina (mejor de dos corridas
+    alternadas), no contra segundos/MB absolutos que dependen del runner.
+    """
+    margen = cargar_config()["serving"]
+    api, base = [], []
+    for _ in range(2):
+        api.append(_medir(API))
+        base.append(_medir(BASE))
+
+    assert all(m["modulos"] == [] for m in api), "mlflow/dagshub no deben importarse al servir"
+    segundos = min(m["segundos"] for m in api) - min(m["segundos"] for m in base)
+    rss_mb = min(m["rss_mb"] for m in api) - min(m["rss_mb"] for m in base)
+    assert segundos < margen["cold_start_overhead_s"], (api, base)
+    assert rss_mb < margen["rss_overhead_mb"], (api, base)
+
+PEDIR = """
+import json
+from fastapi.testclient import TestClient
+import api
+respuesta = TestClient(api.app).post("/predict", json={
+    "Temperature": 25.5, "Humidity": 60.2, "WindSpeed": 5.0, "GeneralDiffuseFlows": 150.0,
+    "DiffuseFlows": 80.0, "Timestamp": "2023-10-29T10:30:00"})
+print(json.dumps([respuesta.status_code, respuesta.json()]))
+"""
+
+def _pedir(model_path: str) -> tuple[int, dict]:
+    salida = subprocess.run([sys.executable, "-W", "ignore", "-c", PEDIR], cwd=APP_DIR,
+                            env={**os.environ, "MODEL_PATH": model_path},
+                            capture_output=True, text=True, check=True).stdout
+    return tuple(json.loads(salida.strip().splitlines()[-1]))
+
+def test_api_sirve_modelo_multizona(tmp_path):
+    """Con un artefacto multizona (--multizona) la API devuelve todas las zonas, no un error 500."""
+    columnas = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows',
+                'Day', 'Month', 'Hour', 'Minute', 'DayWeek', 'QuarterYear', 'DayYear']
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1, 100, (200, len(columnas))), columns=columnas)
+    y = np.column_stack([X['Temperature'] * k for k in (1.2, 1.0, 0.8)])
+    modelo = ModeloEspecial(model_path=str(tmp_path / "zonas.joblib"), target=ZONES)
+    modelo.pipeline_ = modelo._build_pipeline(GradientBoostingRegressor(n_estimators=5)).fit(X, y)
+    modelo.pipeline_.targets_ = modelo.targets
+    modelo.save_model()
+
+    estado, cuerpo = _pedir(modelo.model_path)
+    assert estado == 200 and list(cuerpo["predicted_power_consumption"]) == list(ZONES)
+    assert cuerpo["predicted_power_consumption_zone2"] == cuerpo["predicted_power_consumption"][ZONES[1]]
+
+    estado, cuerpo = _pedir("best_model_pipeline.joblib")
+    assert estado == 200 and list(cuerpo) == ["predicted_power_consumption_zone2"]
@@ -0,0 +1,674 @@
+"""
+Pruebas unitarias para Project.Modelo (ModeloEspecial) sin tracking remoto.
+- pytest -q tests/test_modelo.py
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import time
+import pytest
+import joblib
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.base import clone
+from sklearn.linear_model import ElasticNet, SGDRegressor
+from sklearn.model_selection import RepeatedKFold, cross_val_score
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_info
+from sklearn.metrics import mean_squared_error
+
+from Project.Configuracion import cargar_config
+from Project.EvalModelo import Evaluador
+from Project.GestorHilos import GestorHilos
+from Project.ModeloOnline import lotes_streaming
+from Project import ArtefactoModelo, Modelo
+from Project.Modelo import ESTIMATORS, ZONES, ModeloEspecial
+from Project.ParadaTemprana import ParadaTemprana
+from Project.PredictorCompilado import PredictorCompilado
+from Project.PuntoControl import PuntoControl
+from Project.RegistroAsincrono import RegistroAsincrono
+from Project.Submuestreo import Submuestreo
+
+APP_DIR = Path(__file__).parent.parent / "app"
+NUM_COLS = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
+
+# --- FIXTURES ---
+def _servir_en_app(ruta, X: pd.DataFrame, tmp_path) -> np.ndarray:
+    """Predicción de app/Modelo.py en un proceso aparte que solo ve app/ (como la imagen de la API)."""
+    X.to_pickle(tmp_path / "x_app.pkl")
+    servir = ("import sys, numpy as np, pandas as pd, Project; from Modelo import ModeloEspecial; "
+              "assert Project.__file__.startswith(sys.argv[1]); m = ModeloEspecial(model_path=sys.argv[2]); "
+              "m.load_model(); np.save(sys.argv[4], m.predict(pd.read_pickle(sys.argv[3])))")
+    subprocess.run([sys.executable, "-W", "ignore", "-c", servir, str(APP_DIR), str(ruta),
+                    str(tmp_path / "x_app.pkl"), str(tmp_path / "pred_app.npy")], cwd=APP_DIR, check=True)
+    return np.load(tmp_path / "pred_app.npy")
+
+@pytest.fixture(scope="module")
+def processed_data():
+    """Dataset procesado sintético (15 columnas) con señal dependiente del clima y la hora."""
+    rng = np.random.default_rng(42)
+    n = 2000
+    fechas = pd.date_range("2017-01-01", periods=n, freq="10min")
+    df = pd.DataFrame({
+        'Temperature': rng.normal(20, 5, n),
+        'Humidity': rng.uniform(30, 80, n),
+        'WindSpeed': rng.uniform(0, 10, n),
+        'GeneralDiffuseFlows': rng.uniform(100, 300, n),
+        'DiffuseFlows': rng.uniform(50, 150, n),
+    })
+    base = 20000 + 400 * df['Temperature'] - 30 * df['Humidity'] + 3000 * np.sin(fechas.hour / 24 * 2 * np.pi)
+    df['PowerConsumption_Zone1'] = base * 1.2 + rng.normal(0, 300, n)
+    df['PowerConsumption_Zone2'] = base + rng.normal(0, 300, n)
+    df['PowerConsumption_Zone3'] = base * 0.8 + rng.normal(0, 300, n)
+    df['Day'] = fechas.day
+    df['Month'] = fechas.month
+    df['Hour'] = fechas.hour
+    df['Minute'] = fechas.minute
+    df['DayWeek'] = fechas.dayofweek + 1
+    df['QuarterYear'] = fechas.quarter
+    df['DayYear'] = fechas.dayofyear
+    return df
+
+def _split(df, ratio=0.8):
+    X = df.drop(columns=[c for c in df.columns if 'PowerConsumption_Zone' in c])
+    y = df['PowerConsumption_Zone2'].to_numpy()
+    i = int(len(df) * ratio)
+    return X.iloc[:i], y[:i], X.iloc[i:], y[i:]
+
+# --- UNIT TESTS ---
+def test_float32_acota_diferencia_vs_float64(processed_data, tmp_path):
+    """El modo float32 mantiene el RMSE dentro del 1% del baseline float64."""
+    x_train, y_train, x_test, y_test = _split(processed_data)
+    rmse = {}
+    for dtype in ("float64", "float32"):
+        modelo = ModeloEspecial(model_path=str(tmp_path / f"m_{dtype}.joblib"), dtype=dtype)
+        pipe = modelo._build_pipeline(GradientBoostingRegressor(n_estimators=50, random_state=0))
+        pipe.fit(x_train, y_train)
+        assert pipe.named_steps['ct'].transform(x_test).dtype == np.dtype(dtype), "dtype de entrada al estimador"
+        rmse[dtype] = np.sqrt(mean_squared_error(y_test, pipe.predict(x_test)))
+
+    assert abs(rmse['float32'] - rmse['float64']) / rmse['float64'] < 0.01, "Diferencia de RMSE > 1%"
+
+def test_hist_gradient_boosting_desde_config(processed_data, tmp_path):
+    """El modo rápido se elige por config y se reporta junto al baseline con RMSE comparable."""
+    training = cargar_config()["models"]["training"]
+    modelo_rapido = ModeloEspecial.build_estimator({**training, "estimator": "hist_gradient_boosting"})
+    assert isinstance(modelo_rapido, HistGradientBoostingRegressor)
+    assert modelo_rapido.early_stopping is True
+
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    tabla = modelo.compare_estimators(processed_data.copy(), {
+        "gradient_boosting": GradientBoostingRegressor(n_estimators=100, random_state=0),
+        "hist_gradient_boosting": modelo_rapido,
+    })
+    assert list(tabla["estimator"]) == list(ESTIMATORS)
+    assert (tabla["fit_time_s"] > 0).all()
+    rmse = tabla.set_index("estimator")["rmse"]
+    assert rmse["hist_gradient_boosting"] < rmse["gradient_boosting"] * 1.10, "RMSE del modo rápido"
+
+    with pytest.raises(ValueError):
+        ModeloEspecial.build_estimator({"estimator": "desconocido"})
+
+def test_multizona_un_artefacto_equivale_a_modelos_separados(processed_data, tmp_path):
+    """Las tres zonas se entrenan sobre la misma matriz y predicen en una llamada, igual que por separado."""
+    ruta = tmp_path / "zonas.joblib"
+    modelo = ModeloEspecial(model_path=str(ruta), target=ZONES, n_jobs=2)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    assert y_train.shape == (len(x_train), 3)
+
+    modelo.pipeline_ = modelo._build_pipeline(GradientBoostingRegressor(n_estimators=30, random_state=0))
+    modelo.pipeline_.fit(x_train, y_train)
+    modelo.pipeline_.targets_ = modelo.targets
+    joblib.dump(modelo.pipeline_, ruta)
+
+    cargado = ModeloEspecial(model_path=str(ruta))
+    assert cargado.load_model()
+    pred = cargado.predict_zones(x_test)
+    assert list(pred.columns) == list(ZONES)
+
+    for j, zona in enumerate(ZONES):
+        sola = ModeloEspecial(model_path=str(tmp_path / "z.joblib"), target=zona)
+        pipe = sola._build_pipeline(GradientBoostingRegressor(n_estimators=30, random_state=0))
+        pipe.fit(x_train, y_train[:, j])
+        np.testing.assert_allclose(pred[zona], pipe.predict(x_test))
+
+@pytest.mark.parametrize("estimador", [
+    GradientBoostingRegressor(n_estimators=500, learning_rate=0.3, random_state=0),
+    HistGradientBoostingRegressor(max_iter=500, learning_rate=0.3, early_stopping=True, random_state=0),
+])
+def test_parada_temprana_validacion_temporal_y_presupuesto(processed_data, tmp_path, estimador):
+    """El boosting para al estancarse la cola de validación o al agotar el presupuesto de tiempo."""
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"),
+                            early_stopping=ParadaTemprana(paciencia=20, bloque=5))
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(clone(estimador))
+    reporte = modelo._fit_early_stopping(x_train, y_train)[modelo.target]
+    m = modelo.pipeline_.named_steps['m']
+    assert reporte['stop_reason'] == 'plateau' and reporte['n_iter'] < 500
+    assert reporte['n_iter'] - reporte['best_iter'] >= 20
+    assert (getattr(m, 'n_iter_', None) or m.n_estimators_) == reporte['best_iter']
+    assert reporte['validation_rows'] == len(x_train) - int(len(x_train) * 0.9)
+    assert m.get_params()['warm_start'] is False, "params originales restaurados"
+
+    # El modelo guardado es el de best_iter iteraciones ajustado con todo el entrenamiento
+    tamano = 'max_iter' if 'max_iter' in m.get_params() else 'n_estimators'
+    Xt = modelo.pipeline_.named_steps['ct'].transform(x_train)
+    referencia = clone(estimador).set_params(**{tamano: reporte['best_iter']})
+    if 'early_stopping' in m.get_params():
+        referencia.set_params(early_stopping=False)
+    np.testing.assert_array_equal(m.predict(Xt), referencia.fit(Xt, y_train).predict(Xt))
+
+    zonas = ModeloEspecial(model_path=str(tmp_path / "z.joblib"), target=ZONES,
+                           early_stopping=ParadaTemprana(presupuesto_s=0.0, bloque=5))
+    x_train, y_train, x_test, _ = zonas.split(processed_data.copy())
+    zonas.pipeline_ = zonas._build_pipeline(clone(estimador))
+    reportes = zonas._fit_early_stopping(x_train, y_train)
+    assert list(reportes) == list(ZONES)
+    assert all(r['stop_reason'] == 'time_budget' and r['n_iter'] == r['best_iter'] == 5 for r in reportes.values())
+    assert zonas.pipeline_.predict(x_test).shape == (len(x_test), 3)
+
+def test_parada_temprana_respeta_presupuesto(processed_data, tmp_path):
+    """Con time_budget no hay reajuste extra: el ajuste dura a lo sumo el presupuesto más un bloque."""
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    x_train, y_train, _, _ = modelo.split(processed_data.copy())
+    Xt = modelo._build_pipeline(GradientBoostingRegressor()).named_steps['ct'].fit_transform(x_train)
+    inicio = time.perf_counter()
+    GradientBoostingRegressor(n_estimators=5, random_state=0).fit(Xt, y_train)
+    bloque_s = time.perf_counter() - inicio
+
+    m = GradientBoostingRegressor(n_estimators=100000, learning_rate=0.01, random_state=0)
+    inicio = time.perf_counter()
+    reporte = ParadaTemprana(paciencia=100000, bloque=5, presupuesto_s=0.5).ajustar(m, Xt, y_train)
+    total = time.perf_counter() - inicio
+    assert reporte['stop_reason'] == 'time_budget' and not reporte['refit']
+    # un bloque (más el predict de validación) de margen, con piso por el ruido del reloj
+    assert total <= 0.5 + max(2 * bloque_s, 0.2), "sin reajuste fuera del presupuesto"
+    assert m.n_estimators_ == m.n_estimators == reporte['model_iter'] == reporte['n_iter']
+
+@pytest.mark.parametrize("estimador, target", [
+    (RandomForestRegressor(n_estimators=30, random_state=0), "PowerConsumption_Zone2"),
+    (GradientBoostingRegressor(n_estimators=30, random_state=0), ZONES),
+])
+def test_checkpoint_retoma_entrenamiento_interrumpido(processed_data, tmp_path, monkeypatch, estimador, target):
+    """Un ajuste interrumpido se retoma desde el checkpoint y termina igual que uno sin cortes."""
+    ruta, checkpoint = str(tmp_path / "m.joblib"), tmp_path / "m.joblib.ckpt"
+    modelo = ModeloEspecial(model_path=ruta, target=target, checkpoint_every=10)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+
+    guardar = PuntoControl.guardar
+    guardados = []
+    def guardar_y_cortar(self, pipeline, huella):
+        guardar(self, pipeline, huella)
+        guardados.append(huella)
+        if len(guardados) == 2:
+            raise KeyboardInterrupt("preempted")
+    monkeypatch.setattr(PuntoControl, "guardar", guardar_y_cortar)
+    modelo.pipeline_ = modelo._build_pipeline(clone(estimador))
+    with pytest.raises(KeyboardInterrupt):
+        modelo._fit_checkpointed(x_train, y_train, clone(estimador))
+    assert checkpoint.exists()
+    monkeypatch.setattr(PuntoControl, "guardar", guardar)
+
+    retomado = ModeloEspecial(model_path=ruta, target=target, checkpoint_every=10)
+    retomado.pipeline_ = retomado._build_pipeline(clone(estimador))
+    retomado._fit_checkpointed(x_train, y_train, clone(estimador))
+    assert not checkpoint.exists(), "el checkpoint se borra al terminar"
+    m = retomado.pipeline_.named_steps['m']
+    for e in (m.estimators_ if retomado.multi_target else [m]):
+        assert PuntoControl.ajustados(e) == 30 and e.get_params()['warm_start'] is False
+
+    completo = modelo._build_pipeline(clone(estimador)).fit(x_train, y_train)
+    np.testing.assert_array_equal(retomado.pipeline_.predict(x_test), completo.predict(x_test))
+
+    with pytest.raises(ValueError):
+        ModeloEspecial(model_path=ruta, early_stopping=ParadaTemprana(), checkpoint_every=10)
+
+@pytest.mark.parametrize("estimador", [
+    GradientBoostingRegressor(n_estimators=40, random_state=0),
+    HistGradientBoostingRegressor(max_iter=40, early_stopping=False, random_state=0),
+])
+def test_reentreno_incremental_agrega_etapas(processed_data, tmp_path, estimador):
+    """El warm start conserva el preprocesador, agrega etapas y valida contra el modelo previo."""
+    ruta = tmp_path / "modelo.joblib"
+    modelo = ModeloEspecial(model_path=str(ruta))
+    x_train, y_train, _, _ = modelo.split(processed_data.copy())
+    joblib.dump(modelo._build_pipeline(estimador).fit(x_train, y_train), ruta)
+    ct_previo = joblib.load(ruta).named_steps['ct']
+
+    _, _, reporte = modelo.retrain_incremental(processed_data.copy(), extra_iter=10, recent_rows=500,
+                                               tolerance=1.0)
+    assert reporte['accepted'] and reporte['recent_rows'] == 500
+    nuevo = joblib.load(ruta)
+    m = nuevo.named_steps['m']
+    assert (getattr(m, 'n_iter_', None) or m.n_estimators_) == 50, "40 etapas previas + 10 nuevas"
+    assert m.get_params()['warm_start'] is False, "un fit posterior reentrena desde cero"
+    np.testing.assert_array_equal(nuevo.named_steps['ct'].transform(x_train), ct_previo.transform(x_train))
+
+    _, _, rechazo = modelo.retrain_incremental(processed_data.copy(), extra_iter=10, recent_rows=500,
+                                               tolerance=-1.0)
+    assert not rechazo['accepted']
+    assert joblib.load(ruta).named_steps['m'].get_params() == m.get_params(), "el artefacto no cambia"
+
+def test_registro_asincrono_no_bloquea_y_reintenta(tmp_path):
+    """El run se escribe al spool al instante; la subida (lenta y con fallos) ocurre en segundo plano."""
+    uri = (tmp_path / "mlruns").as_uri()
+    fallos = {"n": 2}
+
+    def configurar(experimento):
+        time.sleep(0.5)                      # latencia del servidor de tracking
+        if fallos["n"]:
+            fallos["n"] -= 1
+            raise ConnectionError("servidor no disponible")
+        mlflow.set_tracking_uri(uri)
+        mlflow.set_experiment(experimento)
+
+    artefacto = tmp_path / "modelo.joblib"
+    artefacto.write_bytes(b"modelo")
+    registro = RegistroAsincrono(configurar, tmp_path / "spool", reintentos=3, espera=0.01)
+
+    inicio = time.perf_counter()
+    with registro.start_run("exp_prueba", "run_prueba") as run:
+        run.log_params({"n_estimators": 10})
+        run.log_metric("rmse", 1.5)
+        run.log_artifact(str(artefacto), "model")
+    assert time.perf_counter() - inicio < 0.5, "el registro no espera al servidor"
+
+    assert registro.esperar(timeout=30)
+    datos = mlflow.MlflowClient(uri).get_run(registro.subidos[run.id]).data
+    assert datos.params["n_estimators"] == "10" and datos.metrics["rmse"] == 1.5
+    assert not (tmp_path / "spool" / run.id).exists()
+
+def test_evaluador_comparte_preprocesamiento_entre_modelos(processed_data):
+    """Cada fold se preprocesa una vez para todos los candidatos, con los mismos scores que antes."""
+    evaluador = Evaluador(processed_data)
+    evaluador.modelos = [ElasticNet(alpha=0.1, random_state=0), RandomForestRegressor(n_estimators=10, random_state=0)]
+    evaluador.nombres = ['ElasticNet', 'RandomForest']
+    _, detalles = evaluador.cross_validate(n_splits=3, n_repeats=2)
+    assert len(evaluador._cache_ct) == 6, "un ct por fold, no por fold x modelo"
+
+    cv = RepeatedKFold(n_splits=3, n_repeats=2, random_state=8)
+    for modelo, nombre in zip(evaluador.modelos, evaluador.nombres):
+        pipe = Pipeline(steps=[('ct', evaluador.ct), ('m', clone(modelo))])
+        mse = cross_val_score(pipe, evaluador.x_train, evaluador.y_train, scoring='neg_mean_squared_error', cv=cv)
+        np.testing.assert_allclose(detalles[nombre], np.sqrt(-mse))
+
+    pipeline, rmse = evaluador.fit_best()
+    assert len(evaluador._cache_ct) == 7
+    referencia = Pipeline(steps=[('ct', clone(evaluador.ct)), ('m', clone(evaluador.best_estimator_))])
+    referencia.fit(evaluador.x_train, evaluador.y_train)
+    np.testing.assert_allclose(pipeline.predict(evaluador.x_test), referencia.predict(evaluador.x_test))
+    assert rmse == pytest.approx(np.sqrt(mean_squared_error(evaluador.y_test, referencia.predict(evaluador.x_test))))
+    assert evaluador.best_estimator_.n_jobs == evaluador.recursos.nucleos
+    evaluador.cross_validate(n_splits=3, n_repeats=2)
+    assert evaluador.modelos[1].n_jobs is None, "fit_best/cross_validate no fijan hilos en self.modelos"
+
+def test_destilacion_estudiante_compacto(processed_data):
+    """El estudiante imita al maestro con exactitud cercana y es más chico y rápido de servir."""
+    evaluador = Evaluador(processed_data)
+    evaluador.modelos = [RandomForestRegressor(n_estimators=150, random_state=0)]
+    evaluador.nombres = ['RandomForest']
+    evaluador.cross_validate(n_splits=2, n_repeats=1)
+
+    estudiante, reporte = evaluador.distill(n_synthetic=3)
+    assert estudiante is evaluador.student_pipeline_ and list(reporte['role']) == ['teacher', 'student']
+    maestro, alumno = reporte.set_index('role').loc['teacher'], reporte.set_index('role').loc['student']
+    assert alumno['rmse'] < maestro['rmse'] * 1.15, "exactitud cercana al maestro"
+    assert alumno['fidelity_rmse'] < maestro['rmse']
+    assert alumno['size_mb'] < maestro['size_mb'] / 5
+    assert alumno['batch_us_per_row'] < maestro['batch_us_per_row']
+
+def test_modo_online_partial_fit_en_streaming(processed_data, tmp_path):
+    """El modelo online aprende lote a lote (DataFrame o CSV por bloques) y el artefacto se sirve igual."""
+    df = processed_data.copy()
+    df.iloc[::13, 1] = np.nan                               # el imputador incremental entra en juego
+    corte = int(len(df) * 0.8)
+    df.iloc[:corte].to_csv(tmp_path / "stream.csv", index=False)
+
+    ruta = tmp_path / "online.joblib"
+    modelo = ModeloEspecial(model_path=str(ruta))
+    reporte = modelo.train_online(lotes_streaming(df.iloc[:corte], 10), SGDRegressor(random_state=0), save_every=50)
+    assert reporte['batches'] == corte // 10 and reporte['rows_evaluated'] == corte - 10
+
+    _, _, x_test, y_test = modelo.split(df.copy())
+    pred = modelo.predict(x_test)
+    assert np.sqrt(mean_squared_error(y_test, pred)) < 0.5 * y_test.std(), "aprende la señal"
+    cargado = ModeloEspecial(model_path=str(ruta))
+    assert cargado.load_model()
+    np.testing.assert_array_equal(cargado.predict(x_test), pred)
+
+    # La API (solo app/, sin el Project del repo) deserializa y sirve el artefacto online
+    np.testing.assert_array_equal(_servir_en_app(ruta, x_test, tmp_path), pred)
+
+    calentado = ModeloEspecial(model_path=str(tmp_path / "calentado.joblib"))
+    reporte = calentado.train_online(lotes_streaming(df.iloc[:corte], 10), SGDRegressor(random_state=0),
+                                     warmup_rows=100)
+    assert reporte['rows_evaluated'] == corte - 100 and reporte['warmup_rows'] == 100
+
+    desde_csv = ModeloEspecial(model_path=str(tmp_path / "csv.joblib"))
+    desde_csv.train_online(lotes_streaming(tmp_path / "stream.csv", 10), SGDRegressor(random_state=0))
+    np.testing.assert_allclose(desde_csv.predict(x_test), pred)
+
+    zonas = ModeloEspecial(model_path=str(tmp_path / "zonas.joblib"), target=ZONES)
+    zonas.train_online(lotes_streaming(df.iloc[:corte], 100))
+    assert zonas.predict(x_test).shape == (len(x_test), 3)
+
+    offline = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    x_train, y_train, _, _ = offline.split(df.copy())
+    offline.pipeline_ = offline._build_pipeline(GradientBoostingRegressor(n_estimators=5)).fit(x_train, y_train)
+    with pytest.raises(ValueError):
+        offline.partial_fit(df.iloc[:10])
+
+def test_gestor_hilos_reparte_presupuesto(processed_data, tmp_path, monkeypatch):
+    """Externos x internos nunca excede el presupuesto y se aplica a zonas, folds y estimadores."""
+    monkeypatch.setattr(GestorHilos, "desde_n_jobs", classmethod(lambda cls, n_jobs=-1: cls(nucleos=8)))
+    gestor = GestorHilos.desde_n_jobs()
+    assert gestor.repartir(3) == (3, 2) and gestor.repartir(10) == (8, 1) and gestor.repartir(1) == (1, 8)
+
+    zonas = ModeloEspecial(model_path=str(tmp_path / "z.joblib"), target=ZONES)
+    pipe = zonas._build_pipeline(RandomForestRegressor(n_estimators=5))
+    assert pipe.named_steps['m'].n_jobs == 3 and pipe.named_steps['m'].estimator.n_jobs == 2
+
+    una = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    propio = RandomForestRegressor()
+    assert una._build_pipeline(propio).named_steps['m'].n_jobs == 8 and propio.n_jobs is None
+    assert una._build_pipeline(RandomForestRegressor(n_jobs=2)).named_steps['m'].n_jobs == 2, "explícito se respeta"
+
+    with GestorHilos.limitar(1, 2):
+        assert all(p['num_threads'] <= 2 for p in threadpool_info())
+
+def test_perfil_de_entrenamiento(processed_data, tmp_path, monkeypatch):
+    """train_and_save(profile=True) mide costo del ajuste, predicción y artefacto y lo registra."""
+    uri = (tmp_path / "mlruns").as_uri()
+    def configurar(experimento):
+        mlflow.set_tracking_uri(uri)
+        mlflow.set_experiment(experimento)
+    monkeypatch.setattr(ModeloEspecial, "_tracker", RegistroAsincrono(configurar, tmp_path / "spool"))
+    monkeypatch.setattr(Modelo, "PROFILE_PATH", str(tmp_path / "outputs" / "train_profile.json"))
+
+    ruta = tmp_path / "m.joblib"
+    modelo = ModeloEspecial(model_path=str(ruta))
+    modelo.train_and_save(processed_data.copy(), RandomForestRegressor(n_estimators=20, n_jobs=2, random_state=0),
+                          profile=True)
+    perfil = json.loads((tmp_path / "outputs" / "train_profile.json").read_text())
+    assert perfil == json.loads(json.dumps(modelo.profile_))
+    assert perfil['fit_time_s'] > 0 and perfil['predict_time_s'] > 0 and perfil['predict_rows'] == 400
+    assert perfil['peak_rss_mb'] >= perfil['rss_start_mb'] > 0
+    assert perfil['threads_max'] >= 1 and perfil['cores'] == modelo.resources.nucleos
+    assert perfil['n_jobs'] == 2, "el n_jobs explícito del estimador no se sobrescribe"
+    assert perfil['artifact_size_mb'] == pytest.approx(ruta.stat().st_size / 2**20)
+
+    registro = ModeloEspecial.tracker()
+    assert registro.esperar(timeout=60)
+    metricas = mlflow.MlflowClient(uri).get_run(next(iter(registro.subidos.values()))).data.metrics
+    assert {'fit_time_s', 'predict_time_s', 'peak_rss_mb', 'threads_max', 'artifact_size_mb'} <= set(metricas)
+
+def test_registro_asincrono_conserva_pendientes(tmp_path):
+    """Un run que agota los reintentos queda en el spool y se sube con el siguiente registro."""
+    uri = (tmp_path / "mlruns").as_uri()
+
+    def caido(experimento):
+        raise ConnectionError("sin red")
+
+    def disponible(experimento):
+        mlflow.set_tracking_uri(uri)
+        mlflow.set_experiment(experimento)
+
+    registro = RegistroAsincrono(caido, tmp_path / "spool", reintentos=2, espera=0.01)
+    with registro.start_run("exp_prueba", "pendiente") as run:
+        run.log_metric("rmse", 2.0)
+    registro.esperar(timeout=10)
+    assert (tmp_path / "spool" / run.id / "run.json").exists()
+
+    nuevo = RegistroAsincrono(disponible, tmp_path / "spool")
+    assert nuevo.esperar(timeout=30)
+    assert mlflow.MlflowClient(uri).get_run(nuevo.subidos[run.id]).data.metrics["rmse"] == 2.0
+
+def test_registro_asincrono_reintento_retoma_el_mismo_run(tmp_path, monkeypatch):
+    """Una subida cortada después de crear el run se retoma con su run_id: no quedan runs duplicados."""
+    uri = (tmp_path / "mlruns").as_uri()
+
+    def disponible(experimento):
+        mlflow.set_tracking_uri(uri)
+        mlflow.set_experiment(experimento)
+
+    artefacto = tmp_path / "modelo.joblib"
+    artefacto.write_bytes(b"modelo")
+    subir_artefactos = mlflow.log_artifacts
+    def cortado(*args, **kwargs):
+        raise ConnectionError("subida interrumpida")
+    monkeypatch.setattr(mlflow, "log_artifacts", cortado)
+
+    registro = RegistroAsincrono(disponible, tmp_path / "spool", reintentos=1)
+    with registro.start_run("exp_prueba", "cortado") as run:
+        run.log_metric("rmse", 4.0)
+        run.log_artifact(str(artefacto), "model")
+    registro.esperar(timeout=30)
+    run_id = json.loads((tmp_path / "spool" / run.id / "run.json").read_text())["run_id"]
+
+    monkeypatch.setattr(mlflow, "log_artifacts", subir_artefactos)
+    nuevo = RegistroAsincrono(disponible, tmp_path / "spool")
+    assert nuevo.esperar(timeout=30) and nuevo.subidos[run.id] == run_id
+    cliente = mlflow.MlflowClient(uri)
+    runs = cliente.search_runs([cliente.get_experiment_by_name("exp_prueba").experiment_id])
+    assert [r.info.run_id for r in runs] == [run_id] and runs[0].info.status == "FINISHED"
+    assert [a.path for a in cliente.list_artifacts(run_id)] == ["model"]
+
+def test_registro_asincrono_run_fallido_y_salida_acotada(tmp_path):
+    """Una excepción en el bloque sube el run como FAILED; la salida no espera todos los reintentos."""
+    uri = (tmp_path / "mlruns").as_uri()
+
+    def disponible(experimento):
+        mlflow.set_tracking_uri(uri)
+        mlflow.set_experiment(experimento)
+
+    registro = RegistroAsincrono(disponible, tmp_path / "spool")
+    with pytest.raises(RuntimeError):
+        with registro.start_run("exp_prueba", "interrumpido") as run:
+            run.log_metric("rmse", 3.0)
+            raise RuntimeError("fallo en el entrenamiento")
+    assert registro.esperar(timeout=30)
+    subido = mlflow.MlflowClient(uri).get_run(registro.subidos[run.id])
+    assert subido.info.status == "FAILED" and subido.data.metrics["rmse"] == 3.0
+    assert not (tmp_path / "spool" / run.id).exists()
+
+    def caido(experimento):
+        raise ConnectionError("sin red")
+
+    lento = RegistroAsincrono(caido, tmp_path / "spool_caido", reintentos=5, espera=10.0, espera_salida=0.2)
+    with lento.start_run("exp_prueba", "pendiente"):
+        pass
+    inicio = time.perf_counter()
+    assert not lento.al_salir()
+    assert time.perf_counter() - inicio < 2, "la salida no espera los reintentos"
+
+@pytest.mark.parametrize("compress", [0, 3])
+def test_artefacto_mapeado_en_memoria(processed_data, tmp_path, compress):
+    """El artefacto (comprimido o no) se carga con sus arreglos mapeados y predice igual."""
+    ruta = tmp_path / "modelo.joblib"
+    modelo = ModeloEspecial(model_path=str(ruta), compress=compress)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(HistGradientBoostingRegressor(max_iter=30, random_state=0))
+    esperado = modelo.pipeline_.fit(x_train, y_train).predict(x_test)
+    modelo.save_model()
+    assert ArtefactoModelo.esta_comprimido(ruta) == bool(compress)
+
+    cargado = ModeloEspecial(model_path=str(ruta))
+    assert cargado.load_model()
+    nodos = cargado.pipeline_.named_steps['m']._predictors[0][0].nodes
+    assert isinstance(nodos, np.memmap) and not nodos.flags.writeable
+    np.testing.assert_array_equal(cargado.predict(x_test), esperado)
+
+    cache = ArtefactoModelo.ruta_cache(ruta)
+    assert cache.exists() == bool(compress)
+    if compress:
+        assert ruta.stat().st_size < cache.stat().st_size
+        modelo.save_model()
+        assert not cache.exists(), "guardar invalida la caché"
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("estimador", [
+    GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0),
+    HistGradientBoostingRegressor(max_iter=40, random_state=0),
+    RandomForestRegressor(n_estimators=10, random_state=0),
+])
+def test_predictor_compilado_bit_a_bit(processed_data, tmp_path, estimador, dtype):
+    """Preprocesamiento + ensamble en arreglos planos predicen exactamente lo mismo que el Pipeline."""
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"), target=ZONES, dtype=dtype)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(estimador).fit(x_train, y_train)
+    x_test = x_test.copy()
+    x_test.iloc[::7, 0] = np.nan                     # la mediana del imputador entra en juego
+
+    modelo.save_model()
+    ruta = ArtefactoModelo.ruta_arboles(modelo.model_path)
+    modelo.compile_model(path=str(ruta))
+    assert b"Project" not in ruta.read_bytes(), "solo arreglos y tipos básicos: app/ lo carga sin Project"
+    compilado = PredictorCompilado.cargar(ruta)
+    assert isinstance(compilado.ensambles[0].umbral, np.memmap)
+    esperado = modelo.pipeline_.predict(x_test)
+    np.testing.assert_array_equal(compilado.predict(x_test), esperado)
+
+    # Copia de serving en app/ (la imagen solo lleva app/)
+    spec = importlib.util.spec_from_file_location("app_predictor", APP_DIR / "PredictorCompilado.py")
+    app_predictor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_predictor)
+    np.testing.assert_array_equal(app_predictor.PredictorCompilado.cargar(str(ruta)).predict(x_test), esperado)
+
+    cargado = ModeloEspecial(model_path=modelo.model_path, target=ZONES, dtype=dtype, mmap=True)
+    assert cargado.load_model() and cargado.compiled_ is not None
+    fila = x_test.iloc[[3]]
+    np.testing.assert_array_equal(cargado.predict(fila), modelo.pipeline_.predict(fila))
+
+def test_app_compilado_despacha_por_tamano_y_huella(processed_data, tmp_path):
+    """app/ sirve lotes chicos con el .arboles y grandes con el pipeline; el .arboles vale por su huella."""
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"), target="PowerConsumption_Zone2")
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(
+        GradientBoostingRegressor(n_estimators=20, random_state=0)).fit(x_train, y_train)
+    modelo.save_model()
+    ruta = ArtefactoModelo.ruta_arboles(modelo.model_path)
+    modelo.compile_model(path=str(ruta))
+    esperado = modelo.pipeline_.predict(x_test)
+    futuro = ruta.stat().st_mtime + 100
+    os.utime(modelo.model_path, (futuro, futuro))   # el mtime (COPY, checkout) ya no decide
+
+    x_test.to_pickle(tmp_path / "x.pkl")
+    servir = ("import sys, numpy as np, pandas as pd; from Modelo import ModeloEspecial; "
+              "m = ModeloEspecial(model_path=sys.argv[1]); m.load_model(); X = pd.read_pickle(sys.argv[2]); "
+              "compilado = m.compiled_ is not None; fila = m.predict(X.iloc[:1]); sin_pipeline = m.pipeline_ is None; "
+              "todo = m.predict(X); np.save(sys.argv[3], np.concatenate([fila, todo])); "
+              "print(compilado, sin_pipeline, m.pipeline_ is not None)")
+    def en_app():
+        salida = subprocess.run([sys.executable, "-W", "ignore", "-c", servir, modelo.model_path,
+                                 str(tmp_path / "x.pkl"), str(tmp_path / "p.npy")],
+                                cwd=APP_DIR, capture_output=True, text=True, check=True).stdout
+        return salida.strip().splitlines()[-1], np.load(tmp_path / "p.npy")
+
+    estado, pred = en_app()
+    assert estado == "True True True", "1 fila por el compilado; 400 filas cargan el pipeline"
+    np.testing.assert_array_equal(pred, np.concatenate([esperado[:1], esperado]))
+    cargado = ModeloEspecial(model_path=modelo.model_path)
+    assert cargado.load_model() and cargado.compiled_ is not None
+
+    # Artefacto reemplazado sin pasar por save_model: el .arboles viejo no se usa
+    otro = modelo._build_pipeline(GradientBoostingRegressor(n_estimators=5, random_state=0)).fit(x_train, y_train)
+    joblib.dump(otro, modelo.model_path)
+    estado, pred = en_app()
+    assert estado.startswith("False")
+    np.testing.assert_array_equal(pred[1:], otro.predict(x_test))
+    cargado = ModeloEspecial(model_path=modelo.model_path)
+    assert cargado.load_model() and cargado.compiled_ is None
+
+def test_predictor_compilado_calibra_corte(processed_data, tmp_path, monkeypatch):
+    """compile_model(X_sample=...) mide el cruce por tamaño de lote, lo guarda y predict lo respeta."""
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"), target="PowerConsumption_Zone2")
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(
+        GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0)).fit(x_train, y_train)
+    pipeline = modelo.pipeline_
+
+    class Lento:
+        def predict(self, X):
+            time.sleep(0.02)
+            return pipeline.predict(X)
+
+    compilado = modelo.compile_model()
+    assert compilado.max_filas == 32, "sin muestra queda el corte por defecto"
+    assert compilado.calibrar(Lento(), x_test) >= 32
+    instantaneo = type("Instantaneo", (), {"predict": lambda self, X: np.zeros(len(X))})()
+    assert compilado.calibrar(instantaneo, x_test) == 0
+
+    compilado.max_filas = 8
+    ruta = tmp_path / "compilado.arboles"
+    compilado.guardar(ruta)
+    assert PredictorCompilado.cargar(ruta).max_filas == 8
+
+    llamadas = []
+    monkeypatch.setattr(compilado, "predict", lambda X: llamadas.append(len(X)) or pipeline.predict(X))
+    modelo.predict(x_test.iloc[:8])
+    modelo.predict(x_test.iloc[:9])
+    assert llamadas == [8]
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("target", ["PowerConsumption_Zone2", ZONES])
+@pytest.mark.parametrize("estimador", [
+    GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0),
+    HistGradientBoostingRegressor(max_iter=40, random_state=0),
+    RandomForestRegressor(n_estimators=10, random_state=0),
+])
+def test_onnx_paridad_con_pipeline(processed_data, tmp_path, estimador, target, dtype):
+    """El pipeline exportado a ONNX y servido con ONNX Runtime predice lo mismo (tolerancia float32)."""
+    pytest.importorskip("skl2onnx")
+    pytest.importorskip("onnxruntime")
+    from Project.ModeloONNX import PredictorONNX
+
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"), target=target, dtype=dtype)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(estimador).fit(x_train, y_train)
+    modelo.pipeline_.targets_ = modelo.targets
+    x_test = x_test.copy()
+    x_test.iloc[::7, 0] = np.nan
+
+    predictor = PredictorONNX(modelo.export_onnx())
+    assert predictor.targets == modelo.targets
+    np.testing.assert_allclose(predictor.predict(x_test), modelo.pipeline_.predict(x_test), rtol=1e-5)
+
+def test_app_sirve_onnx_multizona(processed_data, tmp_path):
+    """app/Modelo.py sirve el .onnx con la forma de Pipeline.predict: (n, zonas), sin aplanar."""
+    pytest.importorskip("skl2onnx")
+    pytest.importorskip("onnxruntime")
+    from Project.ModeloONNX import PredictorONNX
+
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"), target=ZONES)
+    x_train, y_train, x_test, _ = modelo.split(processed_data.copy())
+    modelo.pipeline_ = modelo._build_pipeline(GradientBoostingRegressor(n_estimators=20, random_state=0))
+    modelo.pipeline_.fit(x_train, y_train)
+    ruta = modelo.export_onnx()
+    pred = _servir_en_app(ruta, x_test, tmp_path)
+    assert pred.shape == (len(x_test), 3)
+    np.testing.assert_array_equal(pred, PredictorONNX(ruta).predict(x_test))
+
+def test_submuestreo_estratificado_para_busqueda(processed_data):
+    """El subconjunto tiene el tamaño pedido, cubre todos los estratos y favorece lo reciente."""
+    evaluador = Evaluador(processed_data, subsample=400)
+    sub = evaluador.idx_busqueda_
+    x_train = evaluador.x_train
+    assert len(sub) == 400 and len(np.unique(sub)) == 400 and np.all(np.diff(sub) > 0)
+    estratos = ['Hour', 'DayWeek', 'QuarterYear']
+    assert len(x_train.iloc[sub].groupby(estratos)) == len(x_train.groupby(estratos))
+    reciente = Submuestreo(400, vida_media=300).indices(x_train)
+    assert reciente.mean() > sub.mean() + 100, "una vida media corta favorece lo reciente"
+
+    evaluador.modelos, evaluador.nombres = [ElasticNet(alpha=0.1, random_state=0)], ['ElasticNet']
+    evaluador.cross_validate(n_splits=2, n_repeats=1)
+    assert all(len(ct_train) == 200 for _, ct_train, _ in evaluador._cache_ct.values())
+
+    reporte = evaluador.subsample_report(sizes=(200, 800))
+    assert list(reporte['rows']) == [200, 800, len(x_train)]
+    assert reporte['rmse_vs_full'].iloc[-1] == 1.0
+    assert reporte['rmse_vs_full'].iloc[0] < 1.5, "exactitud cercana con una fracción de las filas"
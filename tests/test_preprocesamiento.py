@@ -0,0 +1,268 @@
+"""
+Pruebas unitarias para Project.Preprocesamiento sobre datos crudos sintéticos.
+- pytest -q tests/test_preprocesamiento.py
+"""
+import pytest
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+
+from Project.AlmacenParquet import AlmacenParquet
+from Project.Configuracion import cargar_config
+from Project.GrafoPreprocesamiento import GrafoPreprocesamiento
+from Project.Modelo import ModeloEspecial
+from Project.Preprocesamiento import HUECO, Preprocesamiento
+from Project.RegistroAsincrono import RegistroAsincrono
+from Project.ReprocesoIncremental import ReprocesoIncremental
+from Project.SketchCuantiles import SketchKLL
+from Project.ValidacionDatos import ErrorValidacion, ValidadorDatos
+
+# --- FIXTURES ---
+@pytest.fixture
+def raw_data():
+    """Genera un DataFrame con la estructura del CSV modificado (10 min entre lecturas)."""
+    rng = np.random.default_rng(0)
+    n = 500
+    fechas = pd.date_range("2017-01-01", periods=n, freq="10min")
+    df = pd.DataFrame({
+        'DateTime': fechas.strftime("%m/%d/%Y %H:%M"),
+        'Temperature': rng.normal(20, 5, n),
+        'Humidity': rng.uniform(30, 80, n),
+        'Wind Speed': rng.uniform(0, 10, n),
+        'general diffuse flows': rng.uniform(100, 300, n),
+        'diffuse flows': rng.uniform(50, 150, n),
+        'Zone 1 Power Consumption': rng.uniform(20000, 40000, n),
+        'Zone 2  Power Consumption': rng.uniform(15000, 30000, n),
+        'Zone 3  Power Consumption': rng.uniform(10000, 25000, n),
+        'mixed_type_col': rng.choice(['a', '1', 'b'], n),
+    })
+    return df
+
+# --- UNIT TESTS ---
+def test_remuestrear_grilla_interpola_huecos_cortos(raw_data):
+    """Los huecos cortos se interpolan y los largos se dejan para la imputación."""
+    df = raw_data.drop(index=list(range(10, 13)) + list(range(100, 120))).reset_index(drop=True)
+    df = Preprocesamiento.tranformar_numerica(df)
+    df = Preprocesamiento.drop_col_si_existe(df, "mixed_type_col")
+    df = Preprocesamiento.limpiar_parsear_datetime(df, "DateTime")
+
+    out = Preprocesamiento.remuestrear_grilla(df, "DateTime", "10min", max_hueco=6)
+
+    assert len(out) == len(raw_data), "La grilla debe recuperar todas las marcas de 10 min"
+    assert (out["DateTime"].diff().dropna() == pd.Timedelta(minutes=10)).all(), "Paso regular"
+    assert out.loc[10:12, "Temperature"].notna().all(), "Hueco de 3 pasos debe interpolarse"
+    assert out.loc[100:119, "Temperature"].isna().all(), "Hueco de 20 pasos no debe interpolarse"
+    assert out.loc[100:119, HUECO].all() and out[HUECO].sum() == 20, "Solo el hueco largo se marca"
+
+    esperado = np.linspace(out.loc[9, "Humidity"], out.loc[13, "Humidity"], 5)[1:-1]
+    np.testing.assert_allclose(out.loc[10:12, "Humidity"].to_numpy(), esperado)
+
+def test_hueco_largo_se_descarta_sin_inventar_filas(raw_data):
+    """Un corte de 3 días no se rellena con medianas: esas marcas no llegan al dataset final."""
+    rng = np.random.default_rng(1)
+    n = 2 * 432
+    fechas = pd.date_range("2017-01-01", periods=n, freq="10min")
+    df = pd.concat([raw_data.iloc[:1]] * n, ignore_index=True)
+    df['DateTime'] = fechas.strftime("%m/%d/%Y %H:%M")
+    for c in df.columns[1:9]:
+        df[c] = rng.uniform(100, 200, n)
+    df.loc[200:202, 'Temperature'] = np.nan                 # faltante aislado: se imputa
+    corte = df.drop(index=range(300, 300 + 432)).reset_index(drop=True)
+
+    out = Preprocesamiento.ejecutar(corte, ventana_mediana=25, eliminar_datetime=False,
+                                    frecuencia="10min", max_hueco=6)
+
+    assert len(out) == len(corte), "Ninguna fila inventada dentro del corte"
+    en_corte = out['DateTime'].between(fechas[300], fechas[300 + 431])
+    assert not en_corte.any()
+    assert HUECO not in out.columns
+    assert out['Temperature'].notna().all()
+
+    config = cargar_config()
+    grafo = GrafoPreprocesamiento.correr(corte, config)
+    assert len(grafo) == len(corte)
+
+
+def test_grafo_equivale_a_ejecutar(raw_data):
+    """El grafo construido desde la configuración reproduce Preprocesamiento.ejecutar."""
+    df = raw_data.copy()
+    df.loc[::40, 'Temperature'] = 500.0
+    config = cargar_config()
+
+    esperado = Preprocesamiento.ejecutar(
+        df, ventana_mediana=config['preprocessing']['outlier_window'], eliminar_datetime=True,
+        frecuencia=config['preprocessing']['resample_frequency'],
+        max_hueco=config['preprocessing']['max_gap'],
+    )
+    grafo = GrafoPreprocesamiento.correr(df, config)
+    assert list(grafo.columns) == list(esperado.columns) + ['Season', 'Is Weekend']
+    pd.testing.assert_frame_equal(grafo[esperado.columns], esperado)
+
+    config['feature_engineering']['temporal_features'] = ['hour', 'is_weekend']
+    solo = GrafoPreprocesamiento.correr(df, config)
+    assert [c for c in solo.columns if c not in esperado.columns[:8]] == ['Hour', 'Is Weekend']
+    assert solo['Is Weekend'].eq((pd.to_datetime(df['DateTime']).dt.dayofweek >= 5).astype(int)).all()
+
+    config['feature_engineering']['temporal_features'] = ['weekday']
+    with pytest.raises(ValueError, match="weekday"):
+        GrafoPreprocesamiento.correr(df, config)
+
+def test_grafo_con_lags_entrena_de_punta_a_punta(raw_data, tmp_path, monkeypatch):
+    """Lags, móviles y temporales extra del grafo llegan como features a ModeloEspecial.train_and_save."""
+    config = cargar_config()
+    fe = config['feature_engineering']
+    fe['lag_features']['enabled'] = True
+    fe['rolling_features'].update(enabled=True, windows=[3, 6], stats=['mean'])
+    df = GrafoPreprocesamiento.correr(raw_data, config)
+    extras = ['Season', 'Is Weekend', 'Temperature lag 1', 'Zone 2  Power Consumption lag 24',
+              'Humidity roll6 mean']
+    assert set(extras) <= set(df.columns)
+
+    def configurar(experimento):
+        mlflow.set_tracking_uri((tmp_path / "mlruns").as_uri())
+        mlflow.set_experiment(experimento)
+    monkeypatch.setattr(ModeloEspecial, "_tracker", RegistroAsincrono(configurar, tmp_path / "spool"))
+    modelo = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    x_test, y_test = modelo.train_and_save(df, GradientBoostingRegressor(n_estimators=20, random_state=0))
+
+    assert set(extras) <= set(x_test.columns) and 'PowerConsumption_Zone2' not in x_test.columns
+    assert modelo.pipeline_.n_features_in_ == x_test.shape[1] == df.shape[1] - 3
+    cargado = ModeloEspecial(model_path=str(tmp_path / "m.joblib"))
+    assert cargado.load_model()
+    np.testing.assert_allclose(cargado.predict(x_test), modelo.predict(x_test))
+    assert ModeloEspecial.tracker().esperar(timeout=60)
+
+def test_validador_rechaza_datos_invalidos(raw_data):
+    """La compuerta acepta el crudo sano y rechaza esquema, faltantes y rangos inválidos."""
+    validador = ValidadorDatos.desde_config()
+    reporte = validador.validar(raw_data)
+    assert reporte['filas'] == len(raw_data), "El reporte debe contar todas las filas"
+
+    with pytest.raises(ErrorValidacion, match="ausentes"):
+        validador.validar(raw_data.drop(columns=['Humidity']))
+
+    df = raw_data.copy()
+    df.loc[::10, 'Temperature'] = np.nan
+    df.loc[::5, 'Humidity'] = 250.0
+    with pytest.raises(ErrorValidacion) as exc:
+        validador.validar(df)
+    assert 'Temperature' in str(exc.value) and 'Humidity' in str(exc.value), "Debe reportar ambas fallas"
+
+def test_sketch_kll_fusionado_aproxima_cuartiles():
+    """Sketches de particiones fusionados estiman cuartiles con error de rango < 2%."""
+    rng = np.random.default_rng(1)
+    x = rng.lognormal(size=200_000)
+    partes = [SketchKLL(k=200, seed=i).actualizar(p) for i, p in enumerate(np.array_split(x, 4))]
+    sketch = partes[0]
+    for p in partes[1:]:
+        sketch.fusionar(p)
+
+    assert sketch.n == x.size, "El peso total debe conservar el número de valores"
+    x_ord = np.sort(x)
+    for q, est in zip([0.25, 0.5, 0.75], sketch.cuantiles([0.25, 0.5, 0.75])):
+        rango = np.searchsorted(x_ord, est) / x.size
+        assert abs(rango - q) < 0.02, f"Cuantil {q} fuera de tolerancia"
+
+def test_sketch_kll_copia_conserva_generador():
+    """Una copia compacta igual que el original: mismo seed y mismo estado del generador."""
+    rng = np.random.default_rng(2)
+    sketch = SketchKLL(k=50, seed=7).actualizar(rng.normal(size=5_000))
+    copia = sketch.copia()
+    assert copia.seed == 7
+    lote = rng.normal(size=5_000)
+    sketch.actualizar(lote)
+    copia.actualizar(lote)
+    for a, b in zip(sketch.niveles, copia.niveles):
+        np.testing.assert_array_equal(a, b)
+
+def test_almacen_parquet_lee_solo_el_rango(raw_data, tmp_path):
+    """El almacén particionado reproduce el dataset y filtra por rango de fechas."""
+    df = Preprocesamiento.ejecutar(raw_data, ventana_mediana=25, eliminar_datetime=False)
+    almacen = AlmacenParquet(tmp_path / "procesado")
+    almacen.escribir(df)
+
+    completo = almacen.leer()
+    pd.testing.assert_frame_equal(completo, df.drop(columns=['DateTime']).reset_index(drop=True))
+
+    parcial = almacen.leer("2017-01-02", "2017-01-02 23:59", eliminar_datetime=False)
+    assert parcial['DateTime'].dt.day.eq(2).all(), "Solo deben leerse filas del rango"
+    assert len(parcial) == 144, "Un día completo tiene 144 lecturas de 10 min"
+
+def test_almacen_parquet_ultimo_mes_abre_solo_su_particion(tmp_path):
+    """leer(*ultimo_mes()) no abre archivos de otros meses (se corrompen para comprobarlo)."""
+    fechas = pd.date_range("2017-01-01", "2017-03-31 23:50", freq="10min")
+    df = pd.DataFrame({'DateTime': fechas, 'Temperature': np.arange(len(fechas), dtype=float)})
+    almacen = AlmacenParquet(tmp_path / "procesado")
+    almacen.escribir(df)
+
+    desde, hasta = almacen.ultimo_mes()
+    assert (desde, hasta) == (pd.Timestamp("2017-03-01"), pd.Timestamp("2017-03-31 23:59:59.999999999"))
+    assert all("month=3" in ruta for ruta in almacen.archivos(desde, hasta))
+    for archivo in (tmp_path / "procesado").glob("year=2017/month=[12]/*.parquet"):
+        archivo.write_bytes(b"no es parquet")
+
+    marzo = almacen.leer(*almacen.ultimo_mes(), eliminar_datetime=False)
+    esperado = df[df['DateTime'].dt.month == 3].reset_index(drop=True)
+    pd.testing.assert_frame_equal(marzo, esperado, check_dtype=False)
+
+def test_orden_temporal_evita_sort_si_ya_esta_ordenado(raw_data):
+    """Con datos ya ordenados no se reordena; con NaT o desorden coincide con sort_values."""
+    df = Preprocesamiento.limpiar_parsear_datetime(raw_data.copy(), "DateTime")
+    assert Preprocesamiento.orden_temporal(df, "DateTime") is df, "Fast path: sin copia ni sort"
+
+    df.loc[[5, 50], "DateTime"] = pd.NaT
+    esperado = df.sort_values("DateTime", kind="stable")
+    pd.testing.assert_frame_equal(Preprocesamiento.orden_temporal(df, "DateTime"), esperado)
+
+    desordenado = df.sample(frac=1, random_state=0)
+    pd.testing.assert_frame_equal(Preprocesamiento.orden_temporal(desordenado, "DateTime"),
+                                  desordenado.sort_values("DateTime", kind="stable"))
+
+def test_outliers_mediana_rodante_no_modifica_la_entrada_ordenada(raw_data):
+    """En el fast path (entrada ya ordenada) la entrada queda intacta y el resultado es el de siempre."""
+    df = Preprocesamiento.limpiar_parsear_datetime(raw_data.copy(), "DateTime").dropna()
+    df.loc[df.index[10], "Temperature"] = 1e6
+    original = df.copy()
+
+    salida = Preprocesamiento.outliers_mediana_rodante(df, "DateTime", 5)
+
+    pd.testing.assert_frame_equal(df, original)
+    esperado = original.copy()
+    for c in esperado.select_dtypes("number").columns:
+        esperado[c] = Preprocesamiento.outliers_columna(esperado[c], 5)
+    pd.testing.assert_frame_equal(salida, esperado.dropna())
+    assert salida["Temperature"].max() < 1e6
+
+def test_correr_pipeline_con_sketches_lee_el_csv_una_vez(raw_data, tmp_path, monkeypatch):
+    """Con ``precision_cuantiles`` los sketches salen del DataFrame ya leído, no de una segunda lectura."""
+    (tmp_path / "raw").mkdir()
+    raw_data.to_csv(tmp_path / "raw" / "modificado.csv", index=False)
+    lecturas = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **kw: lecturas.append(a) or read_csv(*a, **kw))
+
+    ruta = Preprocesamiento.correr_pipeline(tmp_path / "raw", tmp_path / "processed", "salida.csv",
+                                            "modificado.csv", validar=False, precision_cuantiles=200)
+
+    assert len(lecturas) == 1, "El CSV crudo se lee una sola vez"
+    assert len(read_csv(ruta)) > 0
+
+def test_reproceso_incremental_solo_toca_dias_cambiados(raw_data, tmp_path):
+    """Corregir un día del crudo reprocesa ese día y deja intactos los demás."""
+    almacen = AlmacenParquet(tmp_path / "procesado")
+    reproceso = ReprocesoIncremental(almacen)
+    reproceso.actualizar(raw_data)
+    antes = almacen.leer(eliminar_datetime=False)
+    assert reproceso.actualizar(raw_data) == [], "Sin cambios no se reprocesa nada"
+
+    corregido = raw_data.copy()
+    corregido.loc[200:210, 'Temperature'] += 3.0
+    assert reproceso.actualizar(corregido) == ['2017-01-02'], "Solo cambia el 2 de enero"
+
+    despues = almacen.leer(eliminar_datetime=False)
+    otros = despues['DateTime'].dt.day.ne(2).to_numpy()
+    assert len(despues) == len(antes), "La fusión conserva todas las filas"
+    pd.testing.assert_frame_equal(despues[otros].reset_index(drop=True), antes[otros].reset_index(drop=True))
+    assert not np.allclose(despues.loc[~otros, 'Temperature'], antes.loc[~otros, 'Temperature']), \
+        "El día corregido debe reflejar el cambio"